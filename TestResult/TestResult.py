@@ -1,21 +1,28 @@
+import os
+import sys
 import pandas as pd
 import tabulate
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 專案根目錄 (signal_lib)
+from signal_lib.assembly import assemble_daily_frame
+from signal_lib.engine import SignalEngine, BandScorer, WeightedSum, Bands, discount_bands, vix_range_bands
+from signal_lib.columnar_store import read_table
+
 # --- 讀入 CSV 並轉換時間格式 ---
 # 讀入某一支ETF的折溢價利率(%)
-df_PremiumDiscount = pd.read_csv("MoneyDJ_ETF_PremiumDiscount_0050.csv")
+df_PremiumDiscount = read_table("MoneyDJ_ETF_PremiumDiscount_0050.csv")
 df_PremiumDiscount.set_index("交易日期", inplace=True)
 
 # 讀入某一則新聞輿情的情緒分數 (請先跑 Winnie 的sentiment_result.py)
-df_NewsAndPublicOpinion = pd.read_csv("sentiment_result.csv")
+df_NewsAndPublicOpinion = read_table("sentiment_result.csv")
 df_NewsAndPublicOpinion.set_index("日期", inplace=True)
 
 # 讀入恐懼貪婪指數
-df_Fear_And_Greed = pd.read_csv("Fear_And_Greed_index.csv")
+df_Fear_And_Greed = read_table("Fear_And_Greed_index.csv")
 df_Fear_And_Greed.set_index("Date", inplace=True)
 
 # 讀入VIX
-df_VIX = pd.read_csv("vix_daily.csv")
+df_VIX = read_table("vix_daily.csv")
 df_VIX["Date"] = pd.to_datetime(df_VIX["Date"])
 df_VIX.set_index("Date", inplace=True)
 
@@ -29,95 +36,54 @@ all_dates = pd.date_range(start=start_date, end=end_date, freq="D")
 # 篩選 df 的資料範圍
 df_range = df_Fear_And_Greed.loc[start_date:end_date]
 
+# 評分引擎 (見 signal_lib/engine.py)
+# 折溢價利率分數：根據 折溢價率(%) 決定 (<= -0.1 → 1，>= 0.1 → -1，其餘 → 0)
+# 指數綜合分數：依照簡報p.17 (已修改為只抓VIX)，VIX * 0.8 > 25 → 1，< 15 → -1，其餘 → 0
+# 總分 = 折溢價利率分數 * 0.5 + 新聞輿情分數 * 0.3 + 指數綜合分數 * 0.2 (任一為空則為空)
+ENGINE = SignalEngine(
+    scorers=[
+        ("折溢價利率分數", BandScorer("折溢價利率(%)", discount_bands(discount_bound=-0.1, premium_bound=0.1))),
+        ("指數綜合分數", BandScorer("VIX", vix_range_bands(15, 25, scale=0.8))),  # 可自行調整數字
+    ],
+    total=WeightedSum([("折溢價利率分數", 0.5), ("新聞輿情分數", 0.3), ("指數綜合分數", 0.2)],
+                      fill_missing=False),
+    # 燈號分類 (區間之間的空隙為空值)
+    classifier=Bands([
+        ("深綠燈", (">=", 1.5)),
+        ("淺綠燈", [(">=", 0.8), ("<", 1.5)]),
+        ("黃燈", [(">=", -0.79), ("<=", 0.79)]),
+        ("淺紅燈", [(">=", -1.49), ("<", -0.8)]),
+        ("紅燈", ("<=", -1.5)),
+    ]),
+)
+
+
+# 填入數據 (各來源一次對齊到日曆)
+daily = assemble_daily_frame(all_dates, [
+    (df_Fear_And_Greed, {"is_trading_day": "is_trading_day"}),
+    (df_PremiumDiscount, {"市價": "市價", "折溢價利率(%)": "折溢價利率(%)"}),
+    (df_NewsAndPublicOpinion, {"左側情緒分類": "新聞輿情分數"}),
+    (df_VIX, {"Close": "VIX"}),
+])
+# 只填入恐懼貪婪指數中有的日期
+in_range = daily["Date"].isin(pd.to_datetime(df_range.index))
+daily[daily.columns[1:]] = daily[daily.columns[1:]].where(in_range, axis=0)
+
 # 初始化結果 DataFrame，包含目標欄位
 result = pd.DataFrame({
-    "Date": all_dates,
-    "is_trading_day": pd.Series([pd.NA] * len(all_dates), dtype="boolean"),
-    "市價": pd.Series([pd.NA] * len(all_dates), dtype="object"),
-    "折溢價利率(%)": pd.Series([pd.NA] * len(all_dates), dtype="object"),
-    "折溢價利率分數": pd.Series([pd.NA] * len(all_dates), dtype="Int64"),
-    "新聞輿情分數": pd.Series([pd.NA] * len(all_dates), dtype="Int64"),
+    "Date": daily["Date"],
+    "is_trading_day": daily["is_trading_day"].astype("boolean"),
+    "市價": daily["市價"],
+    "折溢價利率(%)": daily["折溢價利率(%)"],
+    "新聞輿情分數": pd.to_numeric(daily["新聞輿情分數"], errors="coerce").astype("Int64"),
     # "fear_and_greed_index": pd.Series([pd.NA] * len(all_dates), dtype="object"),
-    "VIX": pd.Series([pd.NA] * len(all_dates), dtype="object"),
-    "指數綜合分數": pd.Series([pd.NA] * len(all_dates), dtype="Int64"),
+    "VIX": daily["VIX"],
 })
 
-# 分數分類函式：根據 vix 決定
-def classify_score_index( vix):
-    if pd.isna(vix):
-        return pd.NA
-    total = (vix *0.8) # 可自行調整數字
-    if total > 25: # 依照簡報p.17 指標綜合分數(已修改為只抓VIX)
-        return 1
-    elif total < 15: # 依照簡報p.17 指標綜合分數
-        return -1
-    else:
-        return 0 # 依照簡報p.17 指標綜合分數
-
-# 分數分類函式：根據 折溢價率(%) 決定
-def classify_score_PremiumDiscount(PremiumDiscount):
-    if pd.isna(PremiumDiscount):
-        return pd.NA
-    try:
-        value = float(PremiumDiscount.replace('%', ''))  # 直接處理字串中的 %
-    except:
-        return pd.NA
-
-    if value <= -0.1:
-        return 1
-    elif value >= 0.1:
-        return -1
-    else:
-        return 0
-
-
-# 填入數據
-for d in df_range.index:
-    result.loc[result["Date"] == d, "is_trading_day"] = df_Fear_And_Greed.at[d, "is_trading_day"]
-
-    marketprice = df_PremiumDiscount["市價"].get(d, pd.NA)
-    result.loc[result["Date"] == d, "市價"] = marketprice
-
-    rate = df_PremiumDiscount["折溢價利率(%)"].get(d, pd.NA)
-    result.loc[result["Date"] == d, "折溢價利率(%)"] = rate
-    result.loc[result["Date"] == d, "折溢價利率分數"] = classify_score_PremiumDiscount(rate)
-    # result.loc[result["Date"] == d, "fear_and_greed_index"] = df_Fear_And_Greed.at[d, "fear_and_greed_index"]
-
-    NewsAndPublicOpinion = df_NewsAndPublicOpinion["左側情緒分類"].get(d, pd.NA)
-    result.loc[result["Date"] == d, "新聞輿情分數"] = NewsAndPublicOpinion
-
-    # fgi = df_Fear_And_Greed["fear_and_greed_index"].get(d, pd.NA)
-    vix_close = df_VIX["Close"].get(d, pd.NA)
-    result.loc[result["Date"] == d, "VIX"] = vix_close
-    result.loc[result["Date"] == d, "指數綜合分數"] = classify_score_index(vix_close)
-
-
-# 計算總分欄位
-result["總分"] = (
-    result["折溢價利率分數"].astype("float") * 0.5 +
-    result["新聞輿情分數"].astype("float") * 0.3 +
-    result["指數綜合分數"].astype("float") * 0.2
-)
-
-# 定義燈號分類函式
-def classify_signal(score):
-    if pd.isna(score):
-        return pd.NA
-    if score >= 1.5:
-        return "深綠燈"
-    elif 0.8 <= score < 1.5:
-        return "淺綠燈"
-    elif -0.79 <= score <= 0.79:
-        return "黃燈"
-    elif -1.49 <= score < -0.8:
-        return "淺紅燈"
-    elif score <= -1.5:
-        return "紅燈"
-    else:
-        return pd.NA
-
-# 套用燈號分類
-result["燈號"] = result["總分"].apply(classify_signal)
+# 計算分項分數、總分與燈號
+result = ENGINE.run(result)
+result = result[["Date", "is_trading_day", "市價", "折溢價利率(%)", "折溢價利率分數", "新聞輿情分數",
+                 "VIX", "指數綜合分數", "總分", "燈號"]]
 
 
 # print(tabulate.tabulate(result, headers='keys', tablefmt='grid'))
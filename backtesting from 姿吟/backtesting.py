@@ -13,11 +13,14 @@ import pandas as pd
 import datetime as dt
 from tabulate import tabulate
 import glob
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from matplotlib.patches import Rectangle
-from matplotlib.lines import Line2D
-import plotly.express as px  # 新增plotly套件
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 專案根目錄 (signal_lib)
+from signal_lib import profiling, rendering, schema
+from signal_lib.engine import SignalEngine, BandScorer, WeightedSum, discount_bands, vix_bands, light_bands
+from signal_lib.columnar_store import read_table
 
 # ------------------------------------------------------
 
@@ -42,81 +45,39 @@ LIGHT_RED_LOWER_BOUND = -0.8  # 淺紅燈下界
 
 
 # ------------------------------------------------------
-# 分數分類設定
+# 評分引擎設定 (整欄向量化計算，見 signal_lib/engine.py)
+# 折溢價分數: 折價大於1% → 1，溢價大於1% → -1，-1%~1%之間 → 0
+# 總分: 折溢價分數 * DISCOUNT_WEIGHT + (三情緒總和) * SENTIMENT_WEIGHT + vix * VIX_WEIGHT (空值視為0)
 # ------------------------------------------------------
-def classify_discount(rate):
-    ''''折溢價分數分類'''
-    if pd.isna(rate):
-        return pd.NA
-
-    try:
-        value = float(str(rate).replace('%', ''))
-    except:
-        return pd.NA
-
-    if value <= -1:  # 折價大於1%
-        return 1
-    elif value >= 1:  # 溢價大於1%
-        return -1
-    else:  # -1%~1%之間
-        return 0
-
-
-def classify_vix(vix_value):
-    ''''VIX指數分數分類'''
-    if pd.isna(vix_value):
-        return pd.NA
-
-    if vix_value <= VIX_LOW:
-        return -1
-    elif vix_value <= VIX_MID:
-        return 0
-    else:
-        return 1
-
-def classify_signal(score):
-    ''''燈號分類'''
-    if pd.isna(score):
-        return pd.NA
-
-    if score >= DARK_GREEN_LOWER_BOUND:
-        return "深綠燈"
-    elif score >= LIGHT_GREEN_LOWER_BOUND:
-        return "淺綠燈"
-    elif score >= YELLOW_LOWER_BOUND:
-        return "黃燈"
-    elif score >= LIGHT_RED_LOWER_BOUND:
-        return "淺紅燈"
-    else:
-        return "紅燈"
+ENGINE = SignalEngine(
+    scorers=[
+        ("折溢價分數", BandScorer("折溢價利率(%)", discount_bands(discount_bound=-1, premium_bound=1))),
+        ("VIX分數", BandScorer("VIX收盤價", vix_bands(VIX_LOW, VIX_MID))),
+    ],
+    total=WeightedSum([
+        ("折溢價分數", DISCOUNT_WEIGHT),
+        (("鉅亨網左側情緒", "兆豐左側情緒", "PTT左側情緒"), SENTIMENT_WEIGHT),
+        ("VIX分數", VIX_WEIGHT),
+    ], fill_missing=True, decimals=2),
+    classifier=light_bands([DARK_GREEN_LOWER_BOUND,
+                            LIGHT_GREEN_LOWER_BOUND,
+                            YELLOW_LOWER_BOUND,
+                            LIGHT_RED_LOWER_BOUND]),
+)
 
 
 # ------------------------------------------------------
-# 計算總分: 折溢價分數 * DISCOUNT_WEIGHT + (三情緒總和) * SENTIMENT_WEIGHT + vix * VIX_WEIGHT
-# ------------------------------------------------------
-
-def calculate_total_score(row):
-    """計算總分"""
-    # 取得各分數，若為空值則設為0
-    discount = row["折溢價分數"] if not pd.isna(row["折溢價分數"]) else 0
-    vix = row["VIX分數"] if not pd.isna(row["VIX分數"]) else 0
-    cnyes = row["鉅亨網左側情緒"] if not pd.isna(row["鉅亨網左側情緒"]) else 0
-    megabank = row["兆豐左側情緒"] if not pd.isna(row["兆豐左側情緒"]) else 0
-    ptt = row["PTT左側情緒"] if not pd.isna(row["PTT左側情緒"]) else 0
-    sentiment_sum = cnyes + megabank + ptt
-
-    total = (discount * DISCOUNT_WEIGHT +
-             sentiment_sum * SENTIMENT_WEIGHT +
-             vix * VIX_WEIGHT)
-
-    return round(total, 2)
-
-
-# ------------------------------------------------------
-# 繪製評分趨勢圖
+# 繪製評分趨勢圖 (繪圖套件在需要時才載入)
 # ------------------------------------------------------
 
 def plot_signal_with_background(df, etf_code, start_date, end_date):
+    import matplotlib
+    matplotlib.use("Agg")  # 只輸出圖檔，背景行程不需要視窗
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+    from matplotlib.patches import Rectangle
+    from matplotlib.lines import Line2D
+
     try:
         plt.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'Microsoft JhengHei']
         plt.rcParams['axes.unicode_minus'] = False
@@ -191,6 +152,8 @@ def plot_signal_with_background(df, etf_code, start_date, end_date):
 def create_interactive_plot(df, etf_code, start_date, end_date):
     """創建互動式市價與燈號標記圖"""
     try:
+        import plotly.express as px
+
         # 篩選有燈號且不是黃燈的數據點
         plot_df = df[(df["燈號"].notna()) & (df["燈號"] != "黃燈")].copy()
         plot_df["市價"] = pd.to_numeric(plot_df["市價"], errors="coerce")
@@ -237,9 +200,10 @@ def create_interactive_plot(df, etf_code, start_date, end_date):
 
 # ------------------------------------------------------
 
-def main():
-    start_date = pd.to_datetime(START_DATE).date()
-    end_date = pd.to_datetime(END_DATE).date()
+def load_component_frame(etf_code, start_date, end_date):
+    """載入輿情、折溢價、VIX (步驟 1~3)，回傳每日資料表 (分項分數由 ENGINE 計算)"""
+    start_date = pd.to_datetime(start_date).date()
+    end_date = pd.to_datetime(end_date).date()
 
     # 創建日期範圍的DataFrame
     result_df = pd.DataFrame({
@@ -249,128 +213,144 @@ def main():
     # ------------------------------------------------------
     # 1. 載入輿情分數數據 (讀取 sentiment_score.csv)
     # ------------------------------------------------------
-    try:
-        sentiment_df = pd.read_csv("sentiment_score.csv")
-        sentiment_df["日期"] = pd.to_datetime(sentiment_df["日期"]).dt.date
-        sentiment_df = sentiment_df[["日期", "鉅亨網左側情緒", "兆豐左側情緒", "PTT左側情緒"]]
-        result_df = pd.merge(result_df, sentiment_df, on="日期", how="left")
-
-        result_df[["鉅亨網左側情緒", "兆豐左側情緒", "PTT左側情緒"]] = result_df[
-            ["鉅亨網左側情緒", "兆豐左側情緒", "PTT左側情緒"]].fillna(0)
-
-    except Exception as e:
-        print(f"載入輿情分數數據時發生錯誤: {e}")
-        # 如果讀取失敗，初始化這三個欄位為0
-        result_df["鉅亨網左側情緒"] = 0
-        result_df["兆豐左側情緒"] = 0
-        result_df["PTT左側情緒"] = 0
+    with profiling.span("1. 載入輿情分數"):
+        try:
+            sentiment_df = read_table("sentiment_score.csv")
+            sentiment_df["日期"] = pd.to_datetime(sentiment_df["日期"]).dt.date
+            sentiment_df = sentiment_df[["日期", "鉅亨網左側情緒", "兆豐左側情緒", "PTT左側情緒"]]
+            result_df = pd.merge(result_df, sentiment_df, on="日期", how="left")
+
+            result_df[["鉅亨網左側情緒", "兆豐左側情緒", "PTT左側情緒"]] = result_df[
+                ["鉅亨網左側情緒", "兆豐左側情緒", "PTT左側情緒"]].fillna(0)
+
+        except Exception as e:
+            print(f"載入輿情分數數據時發生錯誤: {e}")
+            # 如果讀取失敗，初始化這三個欄位為0
+            result_df["鉅亨網左側情緒"] = 0
+            result_df["兆豐左側情緒"] = 0
+            result_df["PTT左側情緒"] = 0
 
     # ------------------------------------------------------
-    # 2. 載入折溢價數據 (讀取 MoneyDJ_ETF_PremiumDiscount_{ETF_CODE}.csv)
+    # 2. 載入折溢價數據 (讀取 MoneyDJ_ETF_PremiumDiscount_{etf_code}.csv)
     # ------------------------------------------------------
-    try:
-        discount_df = pd.read_csv(f"MoneyDJ_ETF_PremiumDiscount_{ETF_CODE}.csv")
-        discount_df["日期"] = pd.to_datetime(discount_df["交易日期"]).dt.date
-        discount_df = discount_df.sort_values("日期")
-        discount_df = discount_df.drop_duplicates("日期", keep="last")
-        discount_df = discount_df[(discount_df["日期"] >= start_date) &
-                                  (discount_df["日期"] <= end_date)].copy()
-        # 計算折溢價分數
-        discount_df["折溢價分數"] = discount_df["折溢價利率(%)"].apply(classify_discount)
-
-        result_df = pd.merge(result_df, discount_df[["日期", "市價", "折溢價利率(%)", "折溢價分數"]],
-                             on="日期", how="left")
-    except Exception as e:
-        print(f"載入折溢價數據時發生錯誤: {e}")
-        result_df["折溢價分數"] = pd.NA
-        result_df["折溢價利率(%)"] = pd.NA
-        result_df["市價"] = pd.NA
+    with profiling.span("2. 載入折溢價"):
+        try:
+            discount_df = read_table(f"MoneyDJ_ETF_PremiumDiscount_{etf_code}.csv")
+            discount_df["日期"] = pd.to_datetime(discount_df["交易日期"]).dt.date
+            discount_df = discount_df.sort_values("日期")
+            discount_df = discount_df.drop_duplicates("日期", keep="last")
+            discount_df = discount_df[(discount_df["日期"] >= start_date) &
+                                      (discount_df["日期"] <= end_date)].copy()
+
+            result_df = pd.merge(result_df, discount_df[["日期", "市價", "折溢價利率(%)"]],
+                                 on="日期", how="left")
+        except Exception as e:
+            print(f"載入折溢價數據時發生錯誤: {e}")
+            result_df["折溢價利率(%)"] = pd.NA
+            result_df["市價"] = pd.NA
 
     # ------------------------------------------------------
     # 3. 載入VIX數據 (讀取 vix_daily.csv)
     # ------------------------------------------------------
-    try:
-        vix_df = pd.read_csv("vix_daily.csv")
-        vix_df["日期"] = pd.to_datetime(vix_df["Date"]).dt.date
-        vix_df = vix_df.drop_duplicates("日期", keep="last")
-        vix_df = vix_df[(vix_df["日期"] >= start_date) &
-                        (vix_df["日期"] <= end_date)].copy()
-
-        # 計算VIX分數
-        vix_df["VIX分數"] = vix_df["Close"].apply(classify_vix)
-
-        result_df = pd.merge(result_df, vix_df[["日期", "Close", "VIX分數"]],
-                             on="日期", how="left")
-        result_df.rename(columns={"Close": "VIX收盤價"}, inplace=True)
-    except Exception as e:
-        print(f"載入VIX數據時發生錯誤: {e}")
-        result_df["VIX分數"] = pd.NA
-        result_df["VIX收盤價"] = pd.NA
+    with profiling.span("3. 載入VIX"):
+        try:
+            vix_df = read_table("vix_daily.csv")
+            vix_df["日期"] = pd.to_datetime(vix_df["Date"]).dt.date
+            vix_df = vix_df.drop_duplicates("日期", keep="last")
+            vix_df = vix_df[(vix_df["日期"] >= start_date) &
+                            (vix_df["日期"] <= end_date)].copy()
 
-    # ------------------------------------------------------
-    # 4. 計算總分和燈號
-    # ------------------------------------------------------
-    # 計算總分
-    result_df["總分"] = result_df.apply(calculate_total_score, axis=1)
+            result_df = pd.merge(result_df, vix_df[["日期", "Close"]],
+                                 on="日期", how="left")
+            result_df.rename(columns={"Close": "VIX收盤價"}, inplace=True)
+        except Exception as e:
+            print(f"載入VIX數據時發生錯誤: {e}")
+            result_df["VIX收盤價"] = pd.NA
 
-    # 判斷燈號
-    result_df["燈號"] = result_df["總分"].apply(classify_signal)
+    return result_df
 
-    # 標記是否為交易日
-    result_df["is_trading_day"] = ~result_df["市價"].isna()
+
+def main(plots=True):
+    result_df = load_component_frame(ETF_CODE, START_DATE, END_DATE)
 
     # ------------------------------------------------------
-    # 5. 輸出結果
+    # 4. 計算分項分數、總分和燈號
     # ------------------------------------------------------
-    # 定義輸出欄位
-    output_columns = [
-        "日期",
-        "is_trading_day",
-        "折溢價分數",
-        "VIX分數",
-        "鉅亨網左側情緒",
-        "兆豐左側情緒",
-        "PTT左側情緒",
-        "總分",
-        "燈號"
-    ]
+    with profiling.span("4. 計算總分和燈號"):
+        result_df = ENGINE.run(result_df)
+
+        # 標記是否為交易日
+        result_df["is_trading_day"] = ~result_df["市價"].isna()
 
-    print("\n最終回測結果:")
-    print(tabulate(
-        result_df[output_columns],
-        headers='keys',
-        tablefmt='grid',
-        stralign='center',
-        numalign='center',
-        colalign=("center",) * len(output_columns)
-    ))
-
-    # 保存結果
-    output_file = f"{ETF_CODE}買入評分回測{START_DATE}至{END_DATE}.csv"
-    result_df[output_columns].to_csv(output_file, index=False, encoding="utf-8-sig")
-    print(f"\n結果已保存到: {output_file}")
+        # 轉為精簡型別 (見 signal_lib/schema.py)
+        result_df = schema.compact(result_df)
 
     # ------------------------------------------------------
-    # 6. 繪製燈號視覺化圖
+    # 5. 輸出結果
     # ------------------------------------------------------
-    try:
-        plot_file = plot_signal_with_background(result_df, ETF_CODE, START_DATE, END_DATE)
-        print(f"\n燈號視覺化圖已保存到: {plot_file}")
-    except Exception as e:
-        print(f"\n繪製燈號視覺化圖時發生錯誤: {e}")
+    with profiling.span("5. 輸出結果"):
+        # 定義輸出欄位
+        output_columns = [
+            "日期",
+            "is_trading_day",
+            "折溢價分數",
+            "VIX分數",
+            "鉅亨網左側情緒",
+            "兆豐左側情緒",
+            "PTT左側情緒",
+            "總分",
+            "燈號"
+        ]
+
+        # 分項分數為可為空的整數型別，輸出時轉回 float (同原本的 0.0 / 1.0 格式)
+        output_df = result_df[output_columns].astype({"折溢價分數": "float64", "VIX分數": "float64"})
+
+        print("\n最終回測結果:")
+        print(tabulate(
+            output_df.assign(日期=output_df["日期"].dt.date),  # 顯示為日期 (不含時間)
+            headers='keys',
+            tablefmt='grid',
+            stralign='center',
+            numalign='center',
+            colalign=("center",) * len(output_columns)
+        ))
+
+        # 保存結果
+        output_file = f"{ETF_CODE}買入評分回測{START_DATE}至{END_DATE}.csv"
+        schema.to_signal_csv(output_df, output_file)
+        print(f"\n結果已保存到: {output_file}")
 
     # ------------------------------------------------------
-    # 7. 創建互動式圖表
+    # 6. 繪製燈號視覺化圖、7. 創建互動式圖表
+    # (數值結果已輸出，兩張圖於背景行程同時繪製；--no-plots 時略過)
     # ------------------------------------------------------
-    try:
-        interactive_file = create_interactive_plot(result_df, ETF_CODE, START_DATE, END_DATE)
-        if interactive_file:
-            print(f"\n 互動式圖表已儲存為 {interactive_file}")
+    if not plots:
+        return
+
+    plot_args = (result_df, ETF_CODE, START_DATE, END_DATE)
+    results, failures = rendering.render_in_background([
+        ("6. 燈號視覺化圖", plot_signal_with_background, plot_args),
+        ("7. 互動式圖表", create_interactive_plot, plot_args),
+    ])
+    outputs = dict(results)
+
+    if "6. 燈號視覺化圖" in outputs:
+        print(f"\n燈號視覺化圖已保存到: {outputs['6. 燈號視覺化圖']}")
+    else:
+        print(f"\n繪製燈號視覺化圖時發生錯誤: {failures['6. 燈號視覺化圖'].strip().splitlines()[-1]}")
+
+    if "7. 互動式圖表" in outputs:
+        if outputs["7. 互動式圖表"]:
+            print(f"\n 互動式圖表已儲存為 {outputs['7. 互動式圖表']}")
         else:
             print("\n 互動式圖表創建失敗")
-    except Exception as e:
-        print(f"\n創建互動式圖表時發生錯誤: {e}")
+    else:
+        print(f"\n創建互動式圖表時發生錯誤: {failures['7. 互動式圖表'].strip().splitlines()[-1]}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="ETF 買入評分回測")
+    parser.add_argument("--no-plots", action="store_true", help="不繪製圖表 (不載入 matplotlib / plotly)")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.run_main(lambda: main(plots=not args.no_plots), args)
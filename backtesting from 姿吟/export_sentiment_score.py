@@ -7,17 +7,45 @@
 # PTT_sentiment
 #
 # 最後匯出 sentiment_score.csv (鉅亨&兆豐&PTT 每日情緒總分 以及 左側情緒分數)
+#
+# 增量更新 (每日排程用):  python export_sentiment_score.py --incremental
+# 只計算新的新聞並更新 sentiment_score.csv 中受影響的日期，
+# 各來源的每日加總與處理進度存在 sentiment_aggregates.csv / sentiment_state.json
+#
+# 多核心評分:  python export_sentiment_score.py --workers 4   (0: 依 CPU 核心數)
 # -----------------------------------------------------
+import argparse
+import json
+import os
+import sys
 import pandas as pd
 import datetime as dt
 import glob
 from tabulate import tabulate
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 專案根目錄 (signal_lib)
+from signal_lib.keyword_matcher import KeywordMatcher
+from signal_lib.columnar_store import read_table
+from signal_lib.headlines import iter_headline_chunks, daily_scores
+from signal_lib.engine import left_side_bands
+
 # ------------------------------------------------------
 
 START_DATE = "2020-01-01"
 END_DATE = "2025-05-31"
 
+OUTPUT_FILE = "sentiment_score.csv"
+STATE_FILE = "sentiment_state.json"  # 增量更新進度 (watermark、鉅亨網檔案 mtime)
+AGGREGATE_FILE = "sentiment_aggregates.csv"  # 各來源、各檔案的每日原始分數加總
+WORKERS = 1  # 標題評分的行程數 (1: 不平行，None: 依 CPU 核心數)
+
+OUTPUT_COLUMNS = [
+    "日期",
+    "鉅亨網情緒總分", "鉅亨網左側情緒",
+    "兆豐情緒總分", "兆豐左側情緒",
+    "PTT情緒總分", "PTT左側情緒"
+]
+
 
 # ------------------------------------------------------
 
@@ -30,26 +58,62 @@ def load_keywords(positive_path, negative_path):
     return positive, negative
 
 
-def calculate_sentiment(title, positive_words, negative_words):
-    """計算情緒分數"""
-    if pd.isna(title):
-        return 0
-    pos = sum(word in title for word in positive_words)
-    neg = sum(word in title for word in negative_words)
-    return pos - neg
+def calculate_sentiment(title, matcher):
+    """計算情緒分數 (正面詞數 - 負面詞數)"""
+    return matcher.score(title)
 
 
-def classify_sentiment(score):
-    """將情緒分數轉換為交易信號"""
-    if score > 0:
-        return -1  # 正面情緒
-    elif score < 0:
-        return 1  # 負面情緒
-    else:
-        return 0  # 中立
+# 將情緒分數轉換為交易信號: 正面情緒 → -1，負面情緒 → 1，中立 → 0 (整欄計算，見 signal_lib/engine.py)
+classify_sentiment = left_side_bands()
+
+
+def combine_sentiment(result_df, cnyes_sentiment, megabank_sentiment, ptt_sentiment):
+    """合併三個來源的每日情緒總分，並新增左側情緒欄位"""
+    result_df = pd.merge(result_df, cnyes_sentiment[["日期", "鉅亨網情緒總分"]],
+                         on="日期", how="left")
+    result_df = pd.merge(result_df, megabank_sentiment[["日期", "兆豐情緒總分"]],
+                         on="日期", how="left")
+    result_df = pd.merge(result_df, ptt_sentiment[["日期", "PTT情緒總分"]],
+                         on="日期", how="left")
+
+    # 填充缺失值為0
+    with pd.option_context('future.no_silent_downcasting', True):
+        result_df.fillna(0, inplace=True)
+
+    # 鉅亨網左側情緒
+    result_df['鉅亨網左側情緒'] = classify_sentiment(result_df['鉅亨網情緒總分'])
+
+    # 兆豐左側情緒
+    result_df['兆豐左側情緒'] = classify_sentiment(result_df['兆豐情緒總分'])
+
+    # PTT左側情緒
+    result_df['PTT左側情緒'] = classify_sentiment(result_df['PTT情緒總分'])
+
+    return result_df[OUTPUT_COLUMNS]
+
+
+def load_ptt_sentiment(start_date, end_date):
+    """讀取 PTT 每日情緒總分 (PTT_sentiment.csv 已是每日加總)"""
+    ptt_df = read_table("PTT_sentiment.csv")
+    ptt_df.columns = ptt_df.columns.str.strip()
 
+    # 日期格式處理
+    ptt_df['日期'] = pd.to_datetime(ptt_df['日期']).dt.date
 
-def export_sentiment_scores():
+    # 篩選日期範圍
+    ptt_df = ptt_df[(ptt_df["日期"] >= start_date) &
+                    (ptt_df["日期"] <= end_date)]
+
+    # 重新命名欄位
+    ptt_sentiment = ptt_df[['日期', '每日原始總分']].copy()
+    ptt_sentiment = ptt_sentiment.rename(columns={'每日原始總分': 'PTT情緒總分'})
+
+    # 確保分數是數值類型
+    ptt_sentiment['PTT情緒總分'] = pd.to_numeric(ptt_sentiment['PTT情緒總分'], errors='coerce').fillna(0)
+    return ptt_sentiment
+
+
+def export_sentiment_scores(workers=WORKERS):
     """匯出輿情分數到CSV檔"""
     start_date = pd.to_datetime(START_DATE).date()
     end_date = pd.to_datetime(END_DATE).date()
@@ -60,36 +124,20 @@ def export_sentiment_scores():
 
     # 載入關鍵詞
     positive_words, negative_words = load_keywords("positive.txt", "negative.txt")
+    matcher = KeywordMatcher(positive_words, negative_words)
 
     # ------------------------------------------------------
-    # 1. 鉅亨網新聞 (讀取cnyes_headlines_*.csv)
+    # 1. 鉅亨網新聞 (分塊讀取cnyes_headlines_*.csv，見 signal_lib/headlines.py)
     # ------------------------------------------------------
 
     cnyes_sentiment = pd.DataFrame(columns=["日期", "鉅亨網情緒總分"])
     try:
-        news_files = glob.glob("cnyes_headlines_*.csv")
-        all_news = []
-
-        for file in news_files:
-            df = pd.read_csv(file)
-            df.columns = df.columns.str.strip()
-            df['日期'] = pd.to_datetime(df['時間']).dt.date
-            all_news.append(df[['日期', '標題']])
-
-        if all_news:
-            news_df = pd.concat(all_news, ignore_index=True)
-            news_df = news_df[(news_df["日期"] >= start_date) &
-                              (news_df["日期"] <= end_date)]
-
-            # 計算每篇新聞的情緒分數
-            news_scores = []
-            for date, title in zip(news_df['日期'], news_df['標題']):
-                score = calculate_sentiment(title, positive_words, negative_words)
-                news_scores.append({'日期': date, '原始分數': score})
+        news_files = sorted(glob.glob("cnyes_headlines_*.csv"))
 
-            scores_df = pd.DataFrame(news_scores)
-
-            cnyes_sentiment = scores_df.groupby('日期')['原始分數'].sum().reset_index()
+        if news_files:
+            # 逐塊計算每篇新聞的情緒分數並累加為每日總分
+            chunks = iter_headline_chunks(news_files, '時間', '標題')
+            cnyes_sentiment = daily_scores(chunks, matcher, start_date, end_date, workers)
             cnyes_sentiment = cnyes_sentiment.rename(columns={'原始分數': '鉅亨網情緒總分'})
             cnyes_sentiment['鉅亨網情緒總分'] = cnyes_sentiment['鉅亨網情緒總分'].round(2)
 
@@ -101,20 +149,9 @@ def export_sentiment_scores():
     # ------------------------------------------------------
     megabank_sentiment = pd.DataFrame(columns=["日期", "兆豐情緒總分"])
     try:
-
-        megabank_df = pd.read_csv("megabank_news.csv")
-        megabank_df['日期'] = pd.to_datetime(megabank_df['日期']).dt.date
-        megabank_df = megabank_df[(megabank_df['日期'] >= start_date) &
-                                  (megabank_df['日期'] <= end_date)]
-
-        # 計算每篇標題的情緒分數
-        megabank_scores = []
-        for index, row in megabank_df.iterrows():
-            score = calculate_sentiment(row['標題'], positive_words, negative_words)
-            megabank_scores.append({'日期': row['日期'], '原始分數': score})
-
-        scores_df = pd.DataFrame(megabank_scores)
-        megabank_sentiment = scores_df.groupby('日期')['原始分數'].sum().reset_index()
+        # 逐塊計算每篇標題的情緒分數並累加為每日總分
+        chunks = iter_headline_chunks("megabank_news.csv", '日期', '標題')
+        megabank_sentiment = daily_scores(chunks, matcher, start_date, end_date, workers)
         megabank_sentiment = megabank_sentiment.rename(columns={'原始分數': '兆豐情緒總分'})
         megabank_sentiment['兆豐情緒總分'] = megabank_sentiment['兆豐情緒總分'].round(2)
 
@@ -125,22 +162,7 @@ def export_sentiment_scores():
     # ------------------------------------------------------
     ptt_sentiment = pd.DataFrame(columns=["日期", "PTT情緒總分"])
     try:
-        ptt_df = pd.read_csv("PTT_sentiment.csv")
-        ptt_df.columns = ptt_df.columns.str.strip()
-
-        # 日期格式處理
-        ptt_df['日期'] = pd.to_datetime(ptt_df['日期']).dt.date
-
-        # 篩選日期範圍
-        ptt_df = ptt_df[(ptt_df["日期"] >= start_date) &
-                        (ptt_df["日期"] <= end_date)]
-
-        # 重新命名欄位
-        ptt_sentiment = ptt_df[['日期', '每日原始總分']].copy()
-        ptt_sentiment = ptt_sentiment.rename(columns={'每日原始總分': 'PTT情緒總分'})
-
-        # 確保分數是數值類型
-        ptt_sentiment['PTT情緒總分'] = pd.to_numeric(ptt_sentiment['PTT情緒總分'], errors='coerce').fillna(0)
+        ptt_sentiment = load_ptt_sentiment(start_date, end_date)
 
     except Exception as e:
         print(f"處理PTT輿情時發生錯誤: {e}")
@@ -148,60 +170,183 @@ def export_sentiment_scores():
         traceback.print_exc()
 
     # ------------------------------------------------------
-    # 合併所有輿情數據
+    # 合併所有輿情數據，新增左側情緒欄位
     # ------------------------------------------------------
-    result_df = pd.merge(result_df, cnyes_sentiment[["日期", "鉅亨網情緒總分"]],
-                         on="日期", how="left")
-    result_df = pd.merge(result_df, megabank_sentiment[["日期", "兆豐情緒總分"]],
-                         on="日期", how="left")
-    result_df = pd.merge(result_df, ptt_sentiment[["日期", "PTT情緒總分"]],
-                         on="日期", how="left")
-
-    # 填充缺失值為0
-    with pd.option_context('future.no_silent_downcasting', True):
-        result_df.fillna(0, inplace=True)
-
-    # ------------------------------------------------------
-    # 新增左側情緒欄位
-    # ------------------------------------------------------
-
-    # 鉅亨網左側情緒
-    result_df['鉅亨網左側情緒'] = result_df['鉅亨網情緒總分'].apply(classify_sentiment)
-
-    # 兆豐左側情緒
-    result_df['兆豐左側情緒'] = result_df['兆豐情緒總分'].apply(classify_sentiment)
-
-    # PTT左側情緒
-    result_df['PTT左側情緒'] = result_df['PTT情緒總分'].apply(classify_sentiment)
-
-    # ------------------------------------------------------
-
-    # 選擇要輸出的欄位
-    output_columns = [
-        "日期",
-        "鉅亨網情緒總分", "鉅亨網左側情緒",
-        "兆豐情緒總分", "兆豐左側情緒",
-        "PTT情緒總分", "PTT左側情緒"
-    ]
+    result_df = combine_sentiment(result_df, cnyes_sentiment, megabank_sentiment, ptt_sentiment)
 
     print(tabulate(
-        result_df[output_columns],
+        result_df,
         headers='keys',
         tablefmt='grid',
         stralign='center',
         numalign='center',
         showindex=False,
         missingval='nan',
-        colalign=("center",) * len(output_columns)
+        colalign=("center",) * len(OUTPUT_COLUMNS)
     ))
 
     # 保存結果
-    output_file = f"sentiment_score.csv"
-    result_df[output_columns].to_csv(output_file, index=False, encoding="utf-8-sig")
+    output_file = OUTPUT_FILE
+    result_df.to_csv(output_file, index=False, encoding="utf-8-sig")
     print(f"\n輿情數結果已保存到: {output_file}")
 
     return output_file
 
 
+# ------------------------------------------------------
+# 增量更新
+# ------------------------------------------------------
+
+def load_update_state():
+    """讀取增量更新進度"""
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"cnyes_mtimes": {}, "megabank_watermark": None, "ptt_watermark": None}
+
+
+def save_update_state(state):
+    """保存增量更新進度"""
+    with open(STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+
+def load_aggregates():
+    """讀取各來源、各檔案的每日原始分數加總"""
+    if not os.path.exists(AGGREGATE_FILE):
+        return pd.DataFrame({"來源": pd.Series(dtype="object"), "檔案": pd.Series(dtype="object"),
+                             "日期": pd.Series(dtype="object"), "原始分數": pd.Series(dtype="int64")})
+    aggregates = pd.read_csv(AGGREGATE_FILE, dtype={"來源": "object", "檔案": "object"})
+    aggregates["日期"] = pd.to_datetime(aggregates["日期"]).dt.date
+    return aggregates
+
+
+def _source_daily(aggregates, source, column):
+    """將某來源的每日加總整理成 (日期, 欄位名稱)"""
+    daily = aggregates[aggregates["來源"] == source].groupby("日期")["原始分數"].sum().reset_index()
+    daily = daily.rename(columns={"原始分數": column})
+    daily[column] = daily[column].round(2)
+    return daily
+
+
+def _to_date(value):
+    return pd.to_datetime(value).date() if value else None
+
+
+def update_sentiment_scores(workers=WORKERS):
+    """增量更新 sentiment_score.csv：只計算新的新聞，並 upsert 受影響日期的列 (日期範圍同完整匯出)"""
+    start_date = pd.to_datetime(START_DATE).date()
+    end_date = pd.to_datetime(END_DATE).date()
+
+    state = load_update_state()
+    aggregates = load_aggregates()
+    positive_words, negative_words = load_keywords("positive.txt", "negative.txt")
+    matcher = KeywordMatcher(positive_words, negative_words)
+
+    changed_dates = set()
+    new_rows = []
+
+    # ------------------------------------------------------
+    # 1. 鉅亨網新聞: 只重算 mtime 有變動 (或新增/刪除) 的檔案
+    # ------------------------------------------------------
+    news_files = sorted(glob.glob("cnyes_headlines_*.csv"))
+    mtimes = {file: os.path.getmtime(file) for file in news_files}
+    changed_files = [file for file in news_files if state["cnyes_mtimes"].get(file) != mtimes[file]]
+    removed_files = [file for file in state["cnyes_mtimes"] if file not in mtimes]
+
+    stale = (aggregates["來源"] == "cnyes") & aggregates["檔案"].isin(changed_files + removed_files)
+    changed_dates.update(aggregates.loc[stale, "日期"])
+    aggregates = aggregates[~stale]
+
+    for file in changed_files:
+        daily = daily_scores(iter_headline_chunks(file, '時間', '標題'), matcher, start_date, end_date, workers)
+        daily.insert(0, "檔案", file)
+        daily.insert(0, "來源", "cnyes")
+        new_rows.append(daily)
+        changed_dates.update(daily["日期"])
+    print(f"鉅亨網: 重新計算 {len(changed_files)} / {len(news_files)} 個檔案")
+
+    # ------------------------------------------------------
+    # 2. 兆豐新聞: 只計算 watermark 當天 (可能不完整) 之後的新聞
+    # ------------------------------------------------------
+    megabank_watermark = max(_to_date(state["megabank_watermark"]) or start_date, start_date)
+    try:
+        # 與完整重算相同，逐塊讀取並以 workers 個行程評分
+        chunks = iter_headline_chunks("megabank_news.csv", '日期', '標題')
+        daily = daily_scores(chunks, matcher, megabank_watermark, end_date, workers)
+
+        # 計算成功後才取代 watermark 之後的舊加總 (讀檔失敗時保留原本的資料)
+        stale = (aggregates["來源"] == "megabank") & (aggregates["日期"] >= megabank_watermark)
+        changed_dates.update(aggregates.loc[stale, "日期"])
+        aggregates = aggregates[~stale]
+
+        daily.insert(0, "檔案", "megabank_news.csv")
+        daily.insert(0, "來源", "megabank")
+        new_rows.append(daily)
+        changed_dates.update(daily["日期"])
+        if not daily.empty:
+            state["megabank_watermark"] = str(daily['日期'].max())
+        print(f"兆豐: 計算 {len(daily)} 天的新聞 (自 {megabank_watermark} 起)")
+    except Exception as e:
+        print(f"處理兆豐新聞時發生錯誤: {e}")
+
+    # ------------------------------------------------------
+    # 3. PTT輿情: 已是每日加總，只取 watermark 之後的日期
+    # ------------------------------------------------------
+    ptt_watermark = max(_to_date(state["ptt_watermark"]) or start_date, start_date)
+    try:
+        ptt_sentiment = load_ptt_sentiment(start_date, end_date)
+        changed_dates.update(ptt_sentiment.loc[ptt_sentiment["日期"] >= ptt_watermark, "日期"])
+        if not ptt_sentiment.empty:
+            state["ptt_watermark"] = str(ptt_sentiment["日期"].max())
+    except Exception as e:
+        print(f"處理PTT輿情時發生錯誤: {e}")
+        ptt_sentiment = pd.DataFrame(columns=["日期", "PTT情緒總分"])
+
+    aggregates = pd.concat([aggregates] + new_rows, ignore_index=True)
+
+    # ------------------------------------------------------
+    # 4. upsert 受影響日期之後的每日分數
+    # ------------------------------------------------------
+    if os.path.exists(OUTPUT_FILE):
+        existing = pd.read_csv(OUTPUT_FILE)
+        existing["日期"] = pd.to_datetime(existing["日期"]).dt.date
+    else:
+        existing = pd.DataFrame(columns=OUTPUT_COLUMNS)
+        changed_dates.add(start_date)
+
+    if changed_dates:
+        update_start = max(min(changed_dates), start_date)
+        result_df = pd.DataFrame({
+            "日期": pd.date_range(start=update_start, end=end_date, freq="D").date
+        })
+        updated = combine_sentiment(result_df,
+                                    _source_daily(aggregates, "cnyes", "鉅亨網情緒總分"),
+                                    _source_daily(aggregates, "megabank", "兆豐情緒總分"),
+                                    ptt_sentiment)
+        kept = existing[existing["日期"] < update_start]
+        output_df = pd.concat([kept, updated], ignore_index=True) if not kept.empty else updated
+        output_df.to_csv(OUTPUT_FILE, index=False, encoding="utf-8-sig")
+        print(f"\n已更新 {update_start} 起共 {len(updated)} 天的輿情分數: {OUTPUT_FILE}")
+    else:
+        print("\n沒有新的新聞資料，不需更新")
+
+    aggregates.to_csv(AGGREGATE_FILE, index=False, encoding="utf-8-sig")
+    state["cnyes_mtimes"] = mtimes
+    save_update_state(state)
+    return OUTPUT_FILE
+
+
 if __name__ == "__main__":
-    export_sentiment_scores()
+    parser = argparse.ArgumentParser(description="匯出鉅亨&兆豐&PTT 每日輿情分數")
+    parser.add_argument("--incremental", action="store_true",
+                        help="增量更新: 只計算新的新聞並更新受影響的日期")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="標題評分的行程數 (預設 1 不平行，0: 依 CPU 核心數)")
+    args = parser.parse_args()
+    workers = args.workers or None
+
+    if args.incremental:
+        update_sentiment_scores(workers)
+    else:
+        export_sentiment_scores(workers)
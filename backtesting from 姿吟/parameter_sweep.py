@@ -0,0 +1,63 @@
+# -----------------------------------------------------
+# 權重與燈號門檻參數掃描
+# 需要的檔案同 backtesting.py
+# 折溢價數據: MoneyDJ_ETF_PremiumDiscount_{ETF_CODE}.csv
+# vix指數數據: vix_daily.csv
+# 輿情情緒分數數據: sentiment_score.csv
+#
+# 最後匯出 {ETF_CODE}參數掃描{START_DATE}至{END_DATE}.csv (依年化報酬率排序)
+# -----------------------------------------------------
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 專案根目錄 (signal_lib)
+from signal_lib import sweep
+from backtesting import ETF_CODE, START_DATE, END_DATE, load_component_frame
+
+# ------------------------------------------------------
+# 掃描範圍設定
+# ------------------------------------------------------
+
+# 權重 (折溢價、輿情、VIX)
+DISCOUNT_WEIGHTS = [0.3, 0.4, 0.5, 0.6]
+SENTIMENT_WEIGHTS = [0.05, 0.1, 0.15]
+VIX_WEIGHTS = [0.1, 0.2, 0.3]
+
+# 折溢價分類界線 (折價界線, 溢價界線)，單位 %
+# 原版: ±1；BT1 三分版: ±0.10
+DISCOUNT_BOUNDS = [(-1, 1), (-0.5, 0.5), (-0.1, 0.1)]
+
+# VIX (低標, 中標)，原版: 15/25；BT1 三分版: 15/19
+VIX_LOWS = [13, 15]
+VIX_MIDS = [19, 20, 25]
+
+# 燈號下界 (深綠燈、淺綠燈、黃燈、淺紅燈)
+DARK_GREEN_BOUNDS = [0.6, 0.8]
+LIGHT_GREEN_BOUNDS = [0.2, 0.3]
+YELLOW_BOUNDS = [-0.3, -0.2]
+LIGHT_RED_BOUNDS = [-0.8, -0.6]
+
+TOP_N = 20  # 畫面顯示前幾名
+
+
+def main():
+    result_df = load_component_frame(ETF_CODE, START_DATE, END_DATE)
+
+    weights = sweep.weight_grid(DISCOUNT_WEIGHTS, SENTIMENT_WEIGHTS, VIX_WEIGHTS)
+    vix_pairs = sweep.vix_grid(VIX_LOWS, VIX_MIDS)
+    bound_sets = sweep.bound_grid(DARK_GREEN_BOUNDS, LIGHT_GREEN_BOUNDS, YELLOW_BOUNDS, LIGHT_RED_BOUNDS)
+    total = len(weights) * len(vix_pairs) * len(bound_sets) * len(DISCOUNT_BOUNDS)
+    print(f"參數組合數: {total}")
+
+    ranking = sweep.run_sweep(result_df, weights, vix_pairs, bound_sets, discount_pairs=DISCOUNT_BOUNDS)
+
+    print(f"\n前 {TOP_N} 名參數組合:")
+    print(ranking.head(TOP_N).to_string(index=False))
+
+    output_file = f"{ETF_CODE}參數掃描{START_DATE}至{END_DATE}.csv"
+    ranking.to_csv(output_file, index=False, encoding="utf-8-sig")
+    print(f"\n結果已保存到: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
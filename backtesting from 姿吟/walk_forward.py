@@ -0,0 +1,56 @@
+# -----------------------------------------------------
+# 滾動視窗 (walk-forward) 回測
+# 需要的檔案同 backtesting.py
+# 折溢價數據: MoneyDJ_ETF_PremiumDiscount_{ETF_CODE}.csv
+# vix指數數據: vix_daily.csv
+# 輿情情緒分數數據: sentiment_score.csv
+#
+# HISTORY_START_DATE ~ END_DATE 的完整歷史只載入、評分一次 (權重與門檻同 backtesting.py)，
+# 再依 TRAIN_DAYS / TEST_DAYS 切出多個樣本內 / 樣本外視窗，各自回測並計算績效
+#
+# 最後匯出 {ETF_CODE}滾動回測{HISTORY_START_DATE}至{END_DATE}.csv (每個視窗一列)
+# -----------------------------------------------------
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 專案根目錄 (signal_lib)
+from signal_lib import profiling, walk_forward
+from backtesting import ETF_CODE, END_DATE, ENGINE, load_component_frame
+
+# ------------------------------------------------------
+# 視窗設定 (單位: 交易日)
+# ------------------------------------------------------
+
+HISTORY_START_DATE = "2024-01-01"  # 完整歷史起始日
+TRAIN_DAYS = 60  # 樣本內天數
+TEST_DAYS = 20  # 樣本外天數
+STEP_DAYS = 5  # 每次前進天數
+EXPANDING = False  # True: 樣本內由歷史起始日開始逐步擴張
+
+
+def main(expanding=EXPANDING):
+    with profiling.span("1. 載入與評分完整歷史"):
+        scored = ENGINE.run(load_component_frame(ETF_CODE, HISTORY_START_DATE, END_DATE))
+
+    with profiling.span("2. 各視窗回測"):
+        windows = walk_forward.rolling_windows(scored["市價"].notna().sum(), TRAIN_DAYS, TEST_DAYS,
+                                               step=STEP_DAYS, expanding=expanding)
+        result = walk_forward.walk_forward(scored, windows)
+
+    print(f"視窗數: {len(windows)} ({'擴張' if expanding else '滾動'}視窗，"
+          f"樣本內 {TRAIN_DAYS} / 樣本外 {TEST_DAYS} 交易日，每次前進 {STEP_DAYS} 日)")
+    print("\n樣本外績效分布:")
+    print(walk_forward.summarize(result).to_string())
+
+    output_file = f"{ETF_CODE}滾動回測{HISTORY_START_DATE}至{END_DATE}.csv"
+    result.to_csv(output_file, index=False, encoding="utf-8-sig")
+    print(f"\n結果已保存到: {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ETF 買入評分滾動視窗回測")
+    parser.add_argument("--expanding", action="store_true", help="使用擴張視窗 (樣本內由歷史起始日開始)")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.run_main(lambda: main(expanding=args.expanding or EXPANDING), args)
@@ -0,0 +1,274 @@
+# -----------------------------------------------------
+# 各流程階段的基準測試
+#
+# 以合成資料 (benchmarks/synthetic.py) 量測：
+#   load_raw            讀取折溢價、VIX、輿情分數檔 (columnar_store.read_table)
+#   export_sentiment    export_sentiment_score.export_sentiment_scores (鉅亨、兆豐標題評分)
+#   backtest_scoring    backtesting.py main() 的分數與燈號計算 (backtesting.ENGINE)
+#   zscore_dynamic      ETF_signalNEWTEST.score_PremiumDiscount_z_dynamic
+#   simulation          performance_summary.py 的多筆倉位回測 (portfolio.simulate)
+#   walk_forward        60 個滾動視窗的樣本內 / 樣本外回測 (walk_forward.walk_forward，評分只做一次)
+#   dashboard_load      儀表板讀檔與交易日索引 (同 load_signal_data)
+#   plotting            backtesting.plot_signal_with_background
+# 資料量為目前的 1×、10×、100× (--scales)，與 ETF 相關的項目對每支合成 ETF 各執行一次，
+# 缺少套件的項目會略過
+#
+# 使用方式 (於專案根目錄):
+#   python benchmarks/run_benchmarks.py                   # 與基準比較，變慢超過 --tolerance 即回報
+#   python benchmarks/run_benchmarks.py --save-baseline   # 以本次結果更新此機器的基準
+# 基準檔 benchmarks/baseline.json 記錄的是執行機器上的秒數，換一台機器就無法比較，
+# 因此不納入版本控制：每台機器第一次執行 (尚無基準檔) 時會將結果存為基準並告知，之後的執行才比較
+# -----------------------------------------------------
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # 專案根目錄 (signal_lib)
+sys.path.insert(0, os.path.join(ROOT, "backtesting from 姿吟"))
+sys.path.insert(0, os.path.join(ROOT, "抓進場出場時機-Wade"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+import synthetic
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+@contextlib.contextmanager
+def _chdir(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+# ------------------------------------------------------
+# 各階段: 傳入 (資料目錄, 日曆, ETF 代碼)，完成不計時的前置作業後回傳要計時的函式
+# ------------------------------------------------------
+
+def bench_load_raw(directory, dates, codes):
+    from signal_lib.columnar_store import read_table
+
+    def run():
+        for code in codes:
+            read_table(os.path.join(directory, f"MoneyDJ_ETF_PremiumDiscount_{code}.csv"))
+        read_table(os.path.join(directory, "vix_daily.csv"))
+        read_table(os.path.join(directory, "sentiment_score.csv"))
+    return run
+
+
+def bench_export_sentiment(directory, dates, codes):
+    import export_sentiment_score as export
+
+    def run():
+        export.START_DATE = str(dates[0].date())
+        export.END_DATE = str(dates[-1].date())
+        export.OUTPUT_FILE = "sentiment_score_benchmark.csv"  # 不覆蓋合成的 sentiment_score.csv
+        with _chdir(directory), contextlib.redirect_stdout(io.StringIO()):
+            export.export_sentiment_scores()
+    return run
+
+
+def _component_frames(directory, dates, codes):
+    import backtesting
+    with _chdir(directory), contextlib.redirect_stdout(io.StringIO()):
+        frames = {code: backtesting.load_component_frame(code, dates[0], dates[-1]) for code in codes}
+    return backtesting, frames
+
+
+def bench_backtest_scoring(directory, dates, codes):
+    backtesting, frames = _component_frames(directory, dates, codes)
+
+    def run():
+        for frame in frames.values():
+            backtesting.ENGINE.run(frame)
+    return run
+
+
+def bench_zscore_dynamic(directory, dates, codes):
+    import ETF_signalNEWTEST as newtest
+    from signal_lib import data_cache
+    frames = [data_cache.load_premium_discount(
+        os.path.join(directory, f"MoneyDJ_ETF_PremiumDiscount_{code}.csv")) for code in codes]
+
+    def run():
+        for frame in frames:
+            newtest.score_PremiumDiscount_z_dynamic(frame)
+    return run
+
+
+def bench_simulation(directory, dates, codes):
+    from signal_lib import portfolio
+    inputs = []
+    for code in codes:
+        frame = pd.read_csv(os.path.join(directory, f"ETF_signal_{code}.csv"))
+        signals = frame["燈號"].map(portfolio.SIGNAL_MAP).fillna(0).astype(int).to_numpy()
+        inputs.append((frame["市價"].to_numpy(), signals))
+
+    def run():
+        for prices, signals in inputs:
+            portfolio.simulate(prices, signals)
+    return run
+
+
+def bench_walk_forward(directory, dates, codes):
+    from signal_lib import walk_forward
+    backtesting, frames = _component_frames(directory, dates, codes)
+
+    def run():
+        for frame in frames.values():
+            scored = backtesting.ENGINE.run(frame)
+            n_days = scored["市價"].notna().sum()
+            test = max(n_days // 80, 1)
+            windows = walk_forward.rolling_windows(n_days, train=20 * test, test=test)[:60]
+            walk_forward.walk_forward(scored, windows)
+    return run
+
+
+def bench_dashboard_load(directory, dates, codes):
+    from signal_lib.date_index import TradingDateIndex
+    from signal_lib.schema import read_signal_csv
+
+    def run():
+        for code in codes:
+            # 同 etf_signal_dashboard_new.load_signal_data (Streamlit 腳本無法直接 import)
+            df = read_signal_csv(os.path.join(directory, f"ETF_signal_{code}.csv"))
+            df = df[df["總分"].notna()].sort_values("Date").reset_index(drop=True)
+            TradingDateIndex.from_frame(df)
+    return run
+
+
+def bench_plotting(directory, dates, codes):
+    # plot_signal_with_background 在繪圖時才載入 matplotlib，先確認已安裝 (缺少時略過此項)
+    import matplotlib  # noqa: F401
+
+    backtesting, frames = _component_frames(directory, dates, codes)
+    frames = {code: backtesting.ENGINE.run(frame) for code, frame in frames.items()}
+
+    def run():
+        with _chdir(directory):
+            for code, frame in frames.items():
+                backtesting.plot_signal_with_background(frame, code, dates[0].date(), dates[-1].date())
+    return run
+
+
+BENCHMARKS = {
+    "load_raw": bench_load_raw,
+    "export_sentiment": bench_export_sentiment,
+    "backtest_scoring": bench_backtest_scoring,
+    "zscore_dynamic": bench_zscore_dynamic,
+    "simulation": bench_simulation,
+    "walk_forward": bench_walk_forward,
+    "dashboard_load": bench_dashboard_load,
+    "plotting": bench_plotting,
+}
+
+
+# ------------------------------------------------------
+# 執行與比較
+# ------------------------------------------------------
+
+def time_function(func, repeat):
+    """執行 repeat 次，回傳每次秒數"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_benchmarks(scales, names, repeat, data_dir=None):
+    """回傳 {"名稱@N×": 最短秒數}，略過的項目不列入"""
+    results = {}
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = os.path.join(data_dir, f"scale_{scale}") if data_dir else tmp
+            print(f"產生 {scale}× 合成資料 ...")
+            dates, codes = synthetic.write_dataset(directory, scale)
+
+            for name in names:
+                key = f"{name}@{scale}x"
+                try:
+                    func = BENCHMARKS[name](directory, dates, codes)
+                except ImportError as e:
+                    print(f"  {key:<28} 略過 (缺少套件: {e.name})")
+                    continue
+                timings = time_function(func, repeat)
+                results[key] = min(timings)
+                print(f"  {key:<28} 最短 {min(timings):9.4f}s  中位數 {statistics.median(timings):9.4f}s")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """與基準比較，回傳變慢超過 tolerance 的項目 [(名稱, 基準秒數, 目前秒數)]"""
+    regressions = []
+    print("\n與基準比較:")
+    for key, seconds in results.items():
+        if key not in baseline:
+            print(f"  {key:<28} (基準無此項)")
+            continue
+        ratio = seconds / baseline[key] if baseline[key] > 0 else float("inf")
+        mark = "⚠️ 變慢" if ratio > 1 + tolerance else ""
+        print(f"  {key:<28} {baseline[key]:9.4f}s → {seconds:9.4f}s  ({ratio:5.2f}×) {mark}")
+        if ratio > 1 + tolerance:
+            regressions.append((key, baseline[key], seconds))
+    return regressions
+
+
+def save_baseline(path, results):
+    """將結果合併寫入基準檔 (保留本次未執行項目的既有基準)"""
+    baseline = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    baseline.update(results)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="各流程階段基準測試")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100],
+                        help="資料量倍數 (預設 1 10 100)")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS),
+                        help="只執行指定項目")
+    parser.add_argument("--repeat", type=int, default=3, help="每項重複次數 (取最短時間)")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="基準檔路徑")
+    parser.add_argument("--save-baseline", action="store_true", help="將本次結果存為基準")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="可容許的變慢比例 (預設 0.25，即慢 25%% 以上視為退步)")
+    parser.add_argument("--data-dir", help="保留合成資料的目錄 (預設使用暫存目錄)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scales, args.only, args.repeat, args.data_dir)
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        if not args.save_baseline:
+            print("\n此機器尚無基準檔 (基準與機器相關，不納入版本控制)，以本次結果建立")
+        save_baseline(args.baseline, results)
+        print(f"\n基準已保存到: {args.baseline}")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} 項變慢超過 {args.tolerance:.0%}")
+        return 1
+    print("\n✅ 無效能退步")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+# -----------------------------------------------------
+# 基準測試用的合成資料
+#
+# 欄位與實際資料相同：
+#   MoneyDJ_ETF_PremiumDiscount_{ETF}.csv  交易日期, 市價, 淨值, 折溢價利率(%)
+#   vix_daily.csv                          Date, Close
+#   cnyes_headlines_*.csv                  時間, 標題
+#   megabank_news.csv                      日期, 標題
+#   PTT_sentiment.csv                      日期, 每日原始總分
+#   sentiment_score.csv                    同 export_sentiment_score.OUTPUT_COLUMNS
+#   ETF_signal_{ETF}.csv                   Date, 市價, 總分, 燈號
+#   positive.txt / negative.txt            關鍵詞 (每行一個)
+# scale=1 約為目前資料量 (2020-01 ~ 2025-05，一支 ETF)
+# scale 倍數先增加天數 (最多約 100 年，受 pandas 日期範圍限制)，
+# 不足的倍數以增加 ETF 檔數與每日新聞標題數補足；VIX、輿情分數為每日一筆，只隨天數增加
+# -----------------------------------------------------
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+BASE_DAYS = 1978  # 2020-01-01 ~ 2025-05-31
+MAX_DAYS = 36525  # 日曆最長約 100 年
+CNYES_PER_DAY = 20  # 鉅亨網每日標題數
+MEGABANK_PER_DAY = 5  # 兆豐每日標題數
+LEXICON_SIZE = 300  # 正、負面關鍵詞各幾個
+ETF_CODE = "0050"
+
+
+def calendar(scale):
+    """合成資料的日曆"""
+    return pd.date_range(start="2020-01-01", periods=min(BASE_DAYS * scale, MAX_DAYS), freq="D")
+
+
+def etf_codes(scale):
+    """合成的 ETF 代碼 (天數不足 scale 倍時以多支 ETF 補足)"""
+    count = math.ceil(BASE_DAYS * scale / len(calendar(scale)))
+    return [ETF_CODE] + [f"9{i:03d}" for i in range(1, count)]
+
+
+def headlines_per_day(scale, per_day):
+    """每日標題數 (天數不足 scale 倍時增加每日標題數)"""
+    return max(1, round(per_day * BASE_DAYS * scale / len(calendar(scale))))
+
+
+def _words(rng, count, length=2):
+    """隨機中文詞 (常用字區段)"""
+    codes = rng.integers(0x4E00, 0x4E00 + 2000, size=(count, length))
+    return ["".join(map(chr, row)) for row in codes]
+
+
+def lexicon(seed=0):
+    """正、負面關鍵詞"""
+    rng = np.random.default_rng(seed)
+    words = list(dict.fromkeys(_words(rng, LEXICON_SIZE * 3)))
+    return words[:LEXICON_SIZE], words[LEXICON_SIZE:LEXICON_SIZE * 2]
+
+
+def headlines(rng, count, positive, negative):
+    """由關鍵詞與隨機字組成的新聞標題"""
+    vocabulary = np.array(positive + negative + _words(rng, 500))
+    picks = vocabulary[rng.integers(0, len(vocabulary), size=(count, 6))]
+    return ["".join(row) for row in picks]
+
+
+def premium_discount(dates, rng):
+    """MoneyDJ 折溢價資料 (僅交易日)"""
+    trading = dates[dates.dayofweek < 5]
+    price = np.round(np.cumprod(1 + rng.normal(0, 0.01, len(trading))) * 100, 2)
+    rate = rng.normal(0, 0.5, len(trading))
+    return pd.DataFrame({
+        "交易日期": trading.strftime("%Y/%m/%d"),
+        "市價": price,
+        "淨值": np.round(price / (1 + rate / 100), 2),
+        "折溢價利率(%)": [f"{value:.2f}%" for value in rate],
+    })
+
+
+def vix(dates, rng):
+    """VIX 日資料 (僅交易日)"""
+    trading = dates[dates.dayofweek < 5]
+    return pd.DataFrame({"Date": trading.strftime("%Y-%m-%d"),
+                         "Close": np.round(rng.gamma(9, 2, len(trading)), 2)})
+
+
+def sentiment_scores(dates, rng):
+    """sentiment_score.csv"""
+    frame = {"日期": dates.strftime("%Y-%m-%d")}
+    for source in ["鉅亨網", "兆豐", "PTT"]:
+        total = rng.integers(-20, 21, len(dates))
+        frame[f"{source}情緒總分"] = total
+        frame[f"{source}左側情緒"] = -np.sign(total)
+    return pd.DataFrame(frame)
+
+
+def signal_file(dates, rng):
+    """ETF_signal_{ETF}.csv (儀表板與 performance_summary.py 使用)"""
+    trading = dates[dates.dayofweek < 5]
+    score = np.round(rng.normal(0, 0.5, len(trading)), 2)
+    lights = np.select([score >= 0.5, score >= 0.2, score > -0.5, score > -0.7],
+                       ["深綠燈", "淺綠燈", "黃燈", "淺紅燈"], default="紅燈")
+    return pd.DataFrame({
+        "Date": trading.strftime("%Y-%m-%d"),
+        "市價": np.round(np.cumprod(1 + rng.normal(0, 0.01, len(trading))) * 100, 2),
+        "總分": score,
+        "燈號": lights,
+    })
+
+
+def write_dataset(directory, scale, seed=0):
+    """將 scale 倍資料量的所有合成檔案寫入 directory，回傳 (日曆, ETF 代碼)"""
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    dates = calendar(scale)
+    codes = etf_codes(scale)
+    positive, negative = lexicon(seed)
+
+    for name, words in [("positive.txt", positive), ("negative.txt", negative)]:
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write("\n".join(words))
+
+    for code in codes:
+        premium_discount(dates, rng).to_csv(
+            os.path.join(directory, f"MoneyDJ_ETF_PremiumDiscount_{code}.csv"), index=False)
+        signal_file(dates, rng).to_csv(os.path.join(directory, f"ETF_signal_{code}.csv"), index=False)
+    vix(dates, rng).to_csv(os.path.join(directory, "vix_daily.csv"), index=False)
+    sentiment_scores(dates, rng).to_csv(os.path.join(directory, "sentiment_score.csv"),
+                                        index=False, encoding="utf-8-sig")
+
+    # 鉅亨網新聞依月份分檔
+    per_day = headlines_per_day(scale, CNYES_PER_DAY)
+    count = len(dates) * per_day
+    cnyes = pd.DataFrame({
+        "時間": np.repeat(dates, per_day).strftime("%Y-%m-%d %H:%M"),
+        "標題": headlines(rng, count, positive, negative),
+    })
+    for month, group in cnyes.groupby(cnyes["時間"].str[:7]):
+        group.to_csv(os.path.join(directory, f"cnyes_headlines_{month}.csv"), index=False)
+
+    per_day = headlines_per_day(scale, MEGABANK_PER_DAY)
+    count = len(dates) * per_day
+    pd.DataFrame({
+        "日期": np.repeat(dates, per_day).strftime("%Y-%m-%d"),
+        "標題": headlines(rng, count, positive, negative),
+    }).to_csv(os.path.join(directory, "megabank_news.csv"), index=False)
+
+    pd.DataFrame({"日期": dates.strftime("%Y-%m-%d"),
+                  "每日原始總分": rng.integers(-10, 11, len(dates))}).to_csv(
+        os.path.join(directory, "PTT_sentiment.csv"), index=False)
+    return dates, codes
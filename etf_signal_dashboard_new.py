@@ -1,10 +1,15 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from datetime import timedelta
+import os
+from urllib.error import HTTPError
 from pyecharts import options as opts
 from pyecharts.charts import Gauge
 from streamlit_echarts import st_pyecharts
+from signal_lib import dataset
+from signal_lib.date_index import TradingDateIndex
+from signal_lib.schema import read_signal_csv
+from signal_lib.signal_api import API_URL, fetch_json
 
 # === ETF 選單設定 ===
 etf_list = {
@@ -20,33 +25,70 @@ etf_list = {
     "00850": "元大台灣ESG永續"
 }
 
+# === 資料快取 ===
+@st.cache_data(show_spinner=False)
+def load_signal_data(file_path, mtime):
+    """讀取燈號檔 (精簡型別) 並建立交易日索引 (以路徑與修改時間為快取鍵，檔案更新後才重新解析)"""
+    df = read_signal_csv(file_path)
+    df = df[df["總分"].notna()].sort_values("Date").reset_index(drop=True)
+    return df, TradingDateIndex.from_frame(df)
+
+
+@st.cache_data(show_spinner=False)
+def load_dataset_data(dataset_dir, code, mtime):
+    """由分區資料集只讀取該 ETF 的分區 (以分區最新修改時間為快取鍵)"""
+    df = dataset.read_dataset(dataset_dir, etfs=[code]).drop(columns="ETF")
+    df = df[df["總分"].notna()].reset_index(drop=True)
+    return df, TradingDateIndex.from_frame(df)
+
+
 # === Streamlit 介面 ===
 st.title("📈 ETF 買賣決策訊號儀錶板")
 selected_etf = st.selectbox("請選擇欲查詢的 ETF", options=list(etf_list.keys()),
                             format_func=lambda x: f"{x} - {etf_list[x]}")
 
-# === 載入資料 ===
-file_path = f"C:/Users/andre/Desktop/ETF_signal_{selected_etf}.csv"
-df = pd.read_csv(file_path, parse_dates=["Date"])
-df = df[df["總分"].notna()].sort_values("Date")
-available_dates = df["Date"].dt.date.unique()
-selected_date = st.selectbox("請選擇查詢日期", available_dates)
-
-# === 取得資料（以日期為主，不用 index）===
-today_row = df[df["Date"].dt.date == selected_date]
-if today_row.empty:
-    st.warning(f"⚠️ 選擇的日期 {selected_date} 沒有資料。")
-    st.stop()
-today = today_row.iloc[0]
-
-# 計算昨天日期，找昨天的資料（注意可能缺資料）
-yesterday_date = selected_date - timedelta(days=1)
-yesterday_row = df[df["Date"].dt.date == yesterday_date]
-yesterday = yesterday_row.iloc[0] if not yesterday_row.empty else None
+# === 載入資料（優先查詢本機燈號 API：python -m signal_lib.signal_api C:/Users/andre/Desktop；未啟動時直接讀檔）===
+# API 與直接讀檔的資料來源相同：分區資料集 (ETF_signalNEWTEST.py 輸出) 中有該 ETF 時讀資料集，
+# 否則讀 ETF_signal_{code}.csv，顯示結果不受 API 是否啟動影響
+signal_dir = "C:/Users/andre/Desktop"
+file_path = os.path.join(signal_dir, f"ETF_signal_{selected_etf}.csv")
+dataset_dir = os.path.join(signal_dir, dataset.DATASET_DIR)
+try:
+    dates = [pd.Timestamp(date).date() for date in fetch_json(API_URL, f"/dates/{selected_etf}")["dates"]]
+    use_api = True
+    st.caption(f"資料來源：燈號 API ({API_URL})")
+except OSError:
+    dataset_mtime = dataset.last_modified(dataset_dir, etfs=[selected_etf])
+    if dataset_mtime is not None:
+        df, date_index = load_dataset_data(dataset_dir, selected_etf, dataset_mtime)
+        st.caption(f"資料來源：分區資料集 {dataset_dir}")
+    else:
+        df, date_index = load_signal_data(file_path, os.path.getmtime(file_path))
+        st.caption(f"資料來源：{file_path}")
+    dates = date_index.dates
+    use_api = False
+selected_date = st.selectbox("請選擇查詢日期", dates)
+
+# === 取得資料（API 或交易日索引查詢）===
+# 前一交易日的資料（週一、連假後為上一個有資料的日期；第一天則無）
+if use_api:
+    try:
+        result = fetch_json(API_URL, f"/signal/{selected_etf}/{selected_date}")
+    except HTTPError:
+        st.warning(f"⚠️ 選擇的日期 {selected_date} 沒有資料。")
+        st.stop()
+    today, yesterday = result["row"], result["previous"]
+else:
+    if selected_date not in date_index:
+        st.warning(f"⚠️ 選擇的日期 {selected_date} 沒有資料。")
+        st.stop()
+    today = df.iloc[date_index.position(selected_date)]
+    yesterday_position = date_index.previous_position(selected_date)
+    yesterday = df.iloc[yesterday_position] if yesterday_position is not None else None
 
 # 計算分數與變動
-score = round(today["總分"], 2)
-delta_score = round(score - (yesterday["總分"] if yesterday is not None else 0), 2)
+score = round(float(today["總分"]), 2)
+delta_score = round(score - (float(yesterday["總分"]) if yesterday is not None else 0), 2)
 
 # === 使用 pyecharts 建立儀表板 ===
 gauge = (
@@ -145,7 +187,7 @@ with col1:
     ● <b>日期：</b> {selected_date}<br>
     ● <b>今日燈號：</b> <span style="color:{color}; font-weight:bold">{level}</span><br>
     ● <b>總分：</b> {score:.2f}<br>
-    ● <b>昨日燈號：</b> {yesterday['燈號'] if yesterday is not None else '無'}<br>
+    ● <b>前一交易日燈號：</b> {yesterday['燈號'] if yesterday is not None else '無'}<br>
     ● <b>分數變化：</b> Δ {delta_score:+.2f}
     </div>
     """, unsafe_allow_html=True)
@@ -2,34 +2,52 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import os
+import glob
+from signal_lib.columnar_store import read_table
+from signal_lib import dataset, portfolio
+from signal_lib.metrics import performance_metrics, matrix_metrics, write_report
 
 # === 1. 載入資料並處理 ===
 STOCK_ID = "00646"
 base_path = os.path.dirname(__file__)
-filename = f"ETF_signal_{STOCK_ID}.csv"
-df = pd.read_csv(os.path.join(base_path, filename))
-df['Date'] = pd.to_datetime(df['Date'])
-df = df.rename(columns={'Date': 'date', '市價': 'close', '燈號': 'signal'})
-df = df.sort_values('date').reset_index(drop=True)
-
-# === 載入調整收盤價資料（Adj Close） ===
-price_filename = f"{STOCK_ID}_price_data.csv"
-price_df = pd.read_csv(price_filename)
-price_df['Date'] = pd.to_datetime(price_df['Date'])
-price_df = price_df.rename(columns={'Adj Close': 'adj_close'})
-df = df.merge(price_df[['Date', 'adj_close']], how='left', left_on='date', right_on='Date')
-df['close'] = df['adj_close'].fillna(df['close'])
-df.drop(columns=['Date', 'adj_close'], inplace=True)
-
-# 燈號轉換邏輯
-signal_map = {
-    '淺綠燈': 1,
-    '綠燈': 1,
-    '淺紅燈': -1,
-    '紅燈': -1,
-    '黃燈': 0
-}
-df['signal'] = df['signal'].map(signal_map).fillna(0).astype(int)
+REPORT_FILE = os.path.join(base_path, "performance_summary_report.csv")  # 所有 ETF 的績效報告
+DATASET_DIR = os.path.join(base_path, "signal_dataset")  # 燈號結果分區資料集 (見 signal_lib/dataset.py)，沒有時讀 CSV
+
+
+def load_signal_frame(stock_id):
+    """讀取燈號 (資料集中有該 ETF 時只讀其分區，否則讀 ETF_signal_{stock_id}.csv)，
+    有調整收盤價資料 (Adj Close) 時以其取代市價，燈號轉為買進賣出訊號"""
+    if dataset.partitions(DATASET_DIR, etfs=[stock_id]):
+        df = dataset.read_dataset(DATASET_DIR, etfs=[stock_id], columns=['市價', '燈號']).drop(columns='ETF')
+        print(f"{stock_id}: 讀取分區資料集 {DATASET_DIR}")
+    else:
+        signal_file = os.path.join(base_path, f"ETF_signal_{stock_id}.csv")
+        df = read_table(signal_file)
+        print(f"{stock_id}: 讀取 {signal_file}")
+    df['Date'] = pd.to_datetime(df['Date'])
+    df = df.rename(columns={'Date': 'date', '市價': 'close', '燈號': 'signal'})
+    df = df.sort_values('date').reset_index(drop=True)
+
+    # === 載入調整收盤價資料（Adj Close） ===
+    price_filename = f"{stock_id}_price_data.csv"
+    if os.path.exists(price_filename):
+        price_df = read_table(price_filename)
+        price_df['Date'] = pd.to_datetime(price_df['Date'])
+        price_df = price_df.rename(columns={'Adj Close': 'adj_close'})
+        df = df.merge(price_df[['Date', 'adj_close']], how='left', left_on='date', right_on='Date')
+        df['close'] = df['adj_close'].fillna(df['close'])
+        df.drop(columns=['Date', 'adj_close'], inplace=True)
+
+    # 只保留有收盤價的交易日 (資料集含週末、假日的列；市價空白但有 Adj Close 的日子也保留)，
+    # 各 ETF 的年化與持倉比例才以相同的交易日計算
+    df = df[df['close'].notna()].reset_index(drop=True)
+
+    # 燈號轉換邏輯 (見 signal_lib/portfolio.py 的 SIGNAL_MAP)
+    df['signal'] = df['signal'].astype(object).map(portfolio.SIGNAL_MAP).fillna(0).astype(int)
+    return df
+
+
+df = load_signal_frame(STOCK_ID)
 
 # === 2. 設定參數 ===
 transaction_cost_rate = 0.001
@@ -37,79 +55,32 @@ tax_rate = 0.003
 position_fraction = 0.1  # 每次固定投入10%資金
 
 
-# === 3. 多筆倉位回測主程式 ===
-positions = []
-equity = 100000  # 初始資金
-equity_curve = []
-trades = []
-
-for i, row in df.iterrows():
-    date = row['date']
-    price = row['close']
-    signal = row['signal']
-
-    if signal == 1:
-        position_size = equity * position_fraction
-        entry_price = price * (1 + transaction_cost_rate)
-        positions.append({
-            'entry_date': date,
-            'entry_price': entry_price,
-            'position_size': position_size
-        })
-
-    elif signal == -1 and positions:
-        position = positions.pop(0)
-        exit_price = price * (1 - transaction_cost_rate - tax_rate)
-        ret = (exit_price / position['entry_price']) - 1
-        profit = position['position_size'] * ret
-        equity += profit
-        trades.append({
-            'entry_date': position['entry_date'],
-            'exit_date': date,
-            'entry_price': position['entry_price'],
-            'exit_price': exit_price,
-            'return': ret,
-            'position_size': position['position_size'],
-            'profit': profit,
-            'holding_days': (date - position['entry_date']).days
-        })
-
-    equity_curve.append(equity)
+# === 3. 多筆倉位回測主程式 (見 signal_lib/portfolio.py) ===
+def run_backtest(df):
+    """回測單一 ETF，回傳 (每日資金, 交易紀錄)"""
+    return portfolio.simulate(
+        df['close'].to_numpy(), df['signal'].to_numpy(),
+        initial_equity=100000,  # 初始資金
+        position_fraction=position_fraction,
+        cost_rate=transaction_cost_rate,
+        tax_rate=tax_rate)
 
-df['equity'] = equity_curve
 
-# === 4. 回撤與績效計算 ===
-df['peak'] = df['equity'].cummax()
-df['drawdown'] = (df['equity'] - df['peak']) / df['peak']
-df['drawdown'] = pd.to_numeric(df['drawdown'], errors='coerce').fillna(0.0).astype(float)
-
-trade_df = pd.DataFrame(trades)
-# 安全提取 equity 起訖值
-if 'equity' in df.columns and not df['equity'].isna().all():
-    start_equity = df['equity'].iloc[0]
-    end_equity = df['equity'].iloc[-1]
-else:
-    start_equity = end_equity = np.nan
-# 安全計算報酬率
-if pd.notna(start_equity) and pd.notna(end_equity) and start_equity > 0:
-    total_return = (end_equity / start_equity) - 1
-else:
-    total_return = np.nan
-# 安全計算年化報酬
-if 'date' in df.columns and not df['date'].empty:
-    total_days = (df['date'].iloc[-1] - df['date'].iloc[0]).days
-    if total_days > 0 and not np.isnan(total_return):
-        annualized_return = (1 + total_return) ** (365 / total_days) - 1
-    else:
-        annualized_return = np.nan
-else:
-    total_days = 0
-    annualized_return = np.nan
+equity_curve, trades = run_backtest(df)
+
+df['equity'] = equity_curve
 
-win_rate = (trade_df['return'] > 0).mean() if not trade_df.empty else 0
-avg_return = trade_df['return'].mean() if not trade_df.empty else 0
-max_drawdown_trade = trade_df['return'].min() if not trade_df.empty else 0
-max_drawdown_pct = df['drawdown'].min()
+# === 4. 回撤與績效計算 (見 signal_lib/metrics.py) ===
+trade_df = portfolio.trade_log(trades, df['date'])
+metrics = performance_metrics(df['date'], df['equity'], trades['return'])
+start_equity = metrics['start_equity']
+end_equity = metrics['end_equity']
+total_return = metrics['total_return']
+annualized_return = metrics['annualized_return']
+win_rate = metrics['win_rate']
+avg_return = metrics['avg_return']
+max_drawdown_trade = metrics['worst_trade']
+max_drawdown_pct = metrics['max_drawdown']
 
 # === 5. 繪製資金曲線圖（log Y 軸） ===
 plt.figure(figsize=(12, 6))
@@ -138,3 +109,25 @@ print(f"最大回撤: {max_drawdown_pct:.2%}")
 
 # === 7. 匯出交易紀錄 ===
 trade_df.to_csv(f"multi_position_trade_log_{STOCK_ID}.csv", index=False)
+
+# === 8. 所有 ETF 的績效報告 (performance_summary_report.csv) ===
+# 各 ETF 分別回測後，資金曲線依日期對齊為矩陣 (天數 × ETF，無資料的日期為 NaN)，
+# 以 matrix_metrics 一次計算所有 ETF 的績效，另附 Sharpe、Sortino、Calmar 與持倉比例
+stock_ids = sorted(set(dataset.etf_codes(DATASET_DIR)) |
+                   {os.path.basename(path)[len("ETF_signal_"):-len(".csv")]
+                    for path in glob.glob(os.path.join(base_path, "ETF_signal_*.csv"))})
+if stock_ids:
+    equity_columns, signal_columns, trade_returns = {}, {}, []
+    for stock_id in stock_ids:
+        etf_df = df if stock_id == STOCK_ID else load_signal_frame(stock_id)
+        etf_equity, etf_trades = (equity_curve, trades) if stock_id == STOCK_ID else run_backtest(etf_df)
+        equity_columns[stock_id] = pd.Series(etf_equity, index=etf_df['date'])
+        signal_columns[stock_id] = pd.Series(etf_df['signal'].to_numpy(), index=etf_df['date'])
+        trade_returns.append(etf_trades['return'])
+
+    equity_matrix = pd.DataFrame(equity_columns).sort_index()
+    signal_matrix = pd.DataFrame(signal_columns).reindex(equity_matrix.index).fillna(0).astype(int)
+    all_metrics = matrix_metrics(equity_matrix.index, equity_matrix.to_numpy(), trade_returns,
+                                 signals=signal_matrix.to_numpy())
+    write_report(REPORT_FILE, stock_ids, all_metrics, risk=True)
+    print(f"\n已匯出 {len(stock_ids)} 檔 ETF 的績效報告：{REPORT_FILE}")
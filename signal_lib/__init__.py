@@ -0,0 +1 @@
+# 回測共用模組
@@ -0,0 +1,31 @@
+# -----------------------------------------------------
+# 每日資料組合 (join-based)
+#
+# 將 折溢價 / 輿情 / VIX 等以日期為索引的來源資料，
+# 一次 reindex 到完整日曆後再合併欄位，
+# 取代逐日 result.loc[result["Date"] == d, ...] 的填值迴圈
+# -----------------------------------------------------
+import pandas as pd
+
+
+def align_to_calendar(frame, calendar, columns):
+    """將以日期為索引的來源資料對齊到完整日曆，缺資料的日期為 NaN"""
+    aligned = frame[columns]
+    index = pd.to_datetime(aligned.index)
+    aligned = aligned.set_axis(index, axis=0)
+    # 同一天有多筆資料時保留最後一筆
+    aligned = aligned[~index.duplicated(keep="last")]
+    return aligned.reindex(pd.DatetimeIndex(calendar))
+
+
+def assemble_daily_frame(calendar, sources, date_column="Date"):
+    """
+    組合每日資料表
+    sources: [(來源DataFrame, {來源欄位: 輸出欄位}), ...]
+    """
+    result = pd.DataFrame({date_column: pd.DatetimeIndex(calendar)})
+    for frame, columns in sources:
+        aligned = align_to_calendar(frame, calendar, list(columns))
+        for source_column, output_column in columns.items():
+            result[output_column] = aligned[source_column].to_numpy()
+    return result
@@ -0,0 +1,111 @@
+# -----------------------------------------------------
+# 欄式儲存 (Parquet) 原始資料
+#
+# 將 MoneyDJ_ETF_PremiumDiscount_*.csv、vix_daily.csv、sentiment_score.csv、
+# cnyes_headlines_*.csv、megabank_news.csv 轉成同名 .parquet 檔：
+#   日期欄位 → datetime64；"0.12%" 之類的百分比欄位維持原本的字串
+#   (輸出檔照原樣寫回，計算時再以 scoring.parse_rate 轉為數值)
+#
+# 讀取時優先使用較新的 .parquet，否則讀 CSV 並套用相同的型別轉換，
+# 因此不論哪一種來源，各腳本拿到的欄位型別都一樣
+#
+# 匯入指令 (需安裝 pyarrow):
+#   python -m signal_lib.columnar_store [資料夾或檔案 ...]
+# -----------------------------------------------------
+import glob
+import os
+import sys
+
+import pandas as pd
+
+INGEST_PATTERNS = [
+    "MoneyDJ_ETF_PremiumDiscount_*.csv",
+    "vix_daily.csv",
+    "sentiment_score.csv",
+    "cnyes_headlines_*.csv",
+    "megabank_news.csv",
+]
+
+DATE_COLUMNS = ("Date", "日期", "交易日期", "時間")
+
+
+def has_parquet_engine():
+    """是否可讀寫 Parquet (需 pyarrow)"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def parquet_path(csv_path):
+    """CSV 對應的 .parquet 路徑"""
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def apply_types(df):
+    """套用欄位型別: 日期 → datetime64 (其餘欄位同 pd.read_csv)"""
+    df.columns = df.columns.str.strip()
+    for column in df.columns:
+        if column in DATE_COLUMNS:
+            try:
+                df[column] = pd.to_datetime(df[column])
+            except (ValueError, TypeError):
+                pass
+    return df
+
+
+def fresh_parquet(path):
+    """若有可讀取且不比 CSV 舊的 .parquet 則回傳其路徑，否則回傳 None"""
+    parquet = parquet_path(path)
+    if os.path.exists(parquet) and has_parquet_engine():
+        if not os.path.exists(path) or os.path.getmtime(parquet) >= os.path.getmtime(path):
+            return parquet
+    return None
+
+
+def read_table(path, **csv_kwargs):
+    """讀取資料表：優先讀取較新的 .parquet，否則讀 CSV 並轉換型別"""
+    parquet = fresh_parquet(path)
+    if parquet:
+        return pd.read_parquet(parquet)
+    return apply_types(pd.read_csv(path, **csv_kwargs))
+
+
+def ingest_file(csv_path):
+    """將單一 CSV 轉為 .parquet，回傳輸出路徑"""
+    df = apply_types(pd.read_csv(csv_path))
+    output = parquet_path(csv_path)
+    df.to_parquet(output, index=False)
+    return output
+
+
+def find_ingest_files(targets):
+    """找出資料夾中需轉檔的 CSV (也可直接指定檔案)"""
+    files = []
+    for target in targets:
+        if os.path.isdir(target):
+            for pattern in INGEST_PATTERNS:
+                files.extend(sorted(glob.glob(os.path.join(target, pattern))))
+        else:
+            files.append(target)
+    return files
+
+
+def main(argv=None):
+    targets = (sys.argv[1:] if argv is None else argv) or ["."]
+    if not has_parquet_engine():
+        print("找不到 pyarrow，請先安裝: pip install pyarrow")
+        return 1
+
+    for csv_path in find_ingest_files(targets):
+        try:
+            output = ingest_file(csv_path)
+            print(f"已轉檔: {csv_path} → {output}")
+        except Exception as e:
+            print(f"轉檔 {csv_path} 時發生錯誤: {e}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+# -----------------------------------------------------
+# 共用資料載入層 (行程內快取)
+#
+# 同一個檔案在同一個行程中只解析一次，以 (絕對路徑, 標記) 為鍵、
+# 檔案修改時間 (mtime) 為版本；檔案更新後會自動重新載入。
+# 回傳的 DataFrame 為共用物件，呼叫端請勿直接修改 (需修改時先 .copy())
+# -----------------------------------------------------
+import os
+
+import pandas as pd
+
+from signal_lib.columnar_store import read_table
+
+_CACHE = {}
+
+
+def cached_load(path, tag, loader, *args):
+    """依 (路徑, 標記, mtime) 快取 loader(path, *args) 的結果"""
+    path = os.path.abspath(path)
+    mtime = os.path.getmtime(path)
+    key = (path, tag)
+
+    entry = _CACHE.get(key)
+    if entry is not None and entry[0] == mtime:
+        return entry[1]
+
+    value = loader(path, *args)
+    _CACHE[key] = (mtime, value)
+    return value
+
+
+def clear_cache():
+    """清除所有快取"""
+    _CACHE.clear()
+
+
+def _read_dated_csv(path, date_column, normalize=False):
+    """讀取 CSV 並以日期欄位為索引 (normalize: 去除時間只保留日期)"""
+    df = read_table(path)
+    df[date_column] = pd.to_datetime(df[date_column])
+    if normalize:
+        df[date_column] = df[date_column].dt.normalize()
+    return df.set_index(date_column)
+
+
+def load_premium_discount(path):
+    """MoneyDJ 折溢價資料 (索引: 交易日期)"""
+    return cached_load(path, "premium_discount", _read_dated_csv, "交易日期")
+
+
+def load_sentiment(path):
+    """新聞輿情分數 (索引: 日期)"""
+    return cached_load(path, "sentiment", _read_dated_csv, "日期", True)
+
+
+def load_vix(path):
+    """VIX 每日資料 (索引: Date)"""
+    return cached_load(path, "vix", _read_dated_csv, "Date")
+
+
+def slice_dates(frame, start_date, end_date):
+    """取出日期區間內的資料 (索引已排序時為切片，不複製資料)"""
+    start_date, end_date = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    if frame.index.is_monotonic_increasing:
+        return frame.loc[start_date:end_date]
+    return frame[(frame.index >= start_date) & (frame.index <= end_date)]
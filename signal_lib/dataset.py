@@ -0,0 +1,193 @@
+# -----------------------------------------------------
+# 燈號結果的分區資料集
+#
+# 所有 ETF、所有年度的燈號結果寫入同一個資料夾，依 ETF 與年度分區：
+#   signal_dataset/etf=0050/year=2024/part.parquet   (未安裝 pyarrow 時為 part.csv)
+# 各分區的欄位同 ETF_signalNEWTEST.py 的燈號結果 (精簡型別，見 schema.py)
+#
+#   write_partitions(result, "signal_dataset", "0050")            # 依 Date 的年度寫入 (覆寫同年度分區)
+#   upsert_rows(rows, "signal_dataset", "0050")                   # 新的列併入既有分區 (同一天以新的列為準)
+#   df = read_dataset("signal_dataset", etfs=["0050"], start="2024-01-01")
+#
+# 讀取時先依 ETF / 年度挑出需要的分區 (資料夾名稱即可判斷，不需開檔)，
+# 只讀這些分區 (Parquet 只讀需要的欄位並在讀檔時過濾日期)，再合併為一張表 (加上 ETF 欄)
+#
+# 匯入既有的 CSV (燈號結果_{ETF}_{年度}.csv、ETF_signal_{ETF}.csv):
+#   python -m signal_lib.dataset [資料夾或檔案 ...] [--output signal_dataset]
+# -----------------------------------------------------
+import argparse
+import glob
+import os
+import re
+import sys
+
+import pandas as pd
+
+from signal_lib import schema
+from signal_lib.columnar_store import has_parquet_engine
+
+DATASET_DIR = "signal_dataset"
+DATE_COLUMN = "Date"
+INGEST_PATTERNS = {
+    "燈號結果_*_*.csv": re.compile(r"燈號結果_(?P<etf>[^_]+)_\d{4}\.csv$"),
+    "ETF_signal_*.csv": re.compile(r"ETF_signal_(?P<etf>.+)\.csv$"),
+}
+
+
+def partition_dir(root, etf, year):
+    """分區資料夾路徑"""
+    return os.path.join(root, f"etf={etf}", f"year={year}")
+
+
+def _partition_file(directory):
+    """分區內的資料檔 (可讀取 Parquet 時優先，否則 CSV)，不存在時為 None"""
+    parquet = os.path.join(directory, "part.parquet")
+    if os.path.exists(parquet) and has_parquet_engine():
+        return parquet
+    csv = os.path.join(directory, "part.csv")
+    return csv if os.path.exists(csv) else None
+
+
+def _write_partition(frame, directory):
+    """寫入單一分區 (先寫暫存檔再取代，並移除另一種格式的舊檔)"""
+    os.makedirs(directory, exist_ok=True)
+    if has_parquet_engine():
+        path, stale = os.path.join(directory, "part.parquet"), os.path.join(directory, "part.csv")
+        temp_path = path + ".tmp"
+        frame.to_parquet(temp_path, index=False)
+    else:
+        path, stale = os.path.join(directory, "part.csv"), os.path.join(directory, "part.parquet")
+        temp_path = path + ".tmp"
+        schema.to_signal_csv(frame, temp_path)
+    os.replace(temp_path, path)
+    if os.path.exists(stale):
+        os.remove(stale)
+    return path
+
+
+def write_partitions(frame, root, etf, date_column=DATE_COLUMN):
+    """將單一 ETF 的燈號結果依年度寫入資料集 (覆寫同年度的分區)，回傳寫入的檔案"""
+    frame = schema.compact(frame)
+    years = frame[date_column].dt.year
+    return [_write_partition(part.reset_index(drop=True), partition_dir(root, etf, year))
+            for year, part in frame.groupby(years, sort=True)]
+
+
+def upsert_rows(frame, root, etf, date_column=DATE_COLUMN):
+    """將新的列併入單一 ETF 的分區 (只重寫涉及的年度，同一天以新的列為準)，回傳寫入的檔案"""
+    written = []
+    for year, rows in frame.groupby(pd.to_datetime(frame[date_column]).dt.year, sort=True):
+        directory = partition_dir(root, etf, year)
+        path = _partition_file(directory)
+        if path:
+            rows = pd.concat([_read_partition(path, None, None, None, date_column), rows], ignore_index=True)
+        # 分區與新的列的型別可能不同 (CSV 分區為原始文字)，合併後再一次套用精簡型別
+        rows = schema.compact(rows, from_text=True)
+        rows = rows.drop_duplicates(date_column, keep="last").sort_values(date_column, kind="stable")
+        written.append(_write_partition(rows.reset_index(drop=True), directory))
+    return written
+
+
+def partitions(root, etfs=None, start=None, end=None):
+    """依 ETF 與日期區間挑出分區，回傳 [(ETF, 年度, 檔案), ...] (只看資料夾名稱)"""
+    start_year = pd.Timestamp(start).year if start is not None else None
+    end_year = pd.Timestamp(end).year if end is not None else None
+    etfs = set(etfs) if etfs is not None else None
+
+    found = []
+    for etf_dir in sorted(glob.glob(os.path.join(root, "etf=*"))):
+        etf = os.path.basename(etf_dir)[len("etf="):]
+        if etfs is not None and etf not in etfs:
+            continue
+        for year_dir in sorted(glob.glob(os.path.join(etf_dir, "year=*"))):
+            year = int(os.path.basename(year_dir)[len("year="):])
+            if (start_year is not None and year < start_year) or (end_year is not None and year > end_year):
+                continue
+            path = _partition_file(year_dir)
+            if path:
+                found.append((etf, year, path))
+    return found
+
+
+def etf_codes(root):
+    """資料集中有資料的 ETF"""
+    return sorted({etf for etf, _, _ in partitions(root)})
+
+
+def last_modified(root, etfs=None):
+    """挑出的分區中最新的修改時間 (可作為快取鍵)，無分區時為 None"""
+    mtimes = [os.path.getmtime(path) for _, _, path in partitions(root, etfs)]
+    return max(mtimes) if mtimes else None
+
+
+def _read_partition(path, columns, start, end, date_column):
+    """讀取單一分區 (Parquet 在讀檔時過濾日期；CSV 回傳未轉型的原始資料)"""
+    if path.endswith(".parquet"):
+        filters = []
+        if start is not None:
+            filters.append((date_column, ">=", pd.Timestamp(start)))
+        if end is not None:
+            filters.append((date_column, "<=", pd.Timestamp(end)))
+        return pd.read_parquet(path, columns=columns, filters=filters or None)
+    return pd.read_csv(path, usecols=columns)
+
+
+def read_dataset(root=DATASET_DIR, etfs=None, start=None, end=None, columns=None, date_column=DATE_COLUMN):
+    """
+    讀取資料集 (只讀取符合 ETF / 日期區間的分區)
+    columns: 只讀取的欄位 (日期欄一定會讀)；回傳依 ETF、日期排序的資料表，第一欄為 ETF
+    """
+    if columns is not None and date_column not in columns:
+        columns = [date_column] + list(columns)
+
+    parquet_frames, csv_frames = [], []
+    for etf, _, path in partitions(root, etfs, start, end):
+        frame = _read_partition(path, columns, start, end, date_column)
+        frame.insert(0, "ETF", etf)
+        (parquet_frames if path.endswith(".parquet") else csv_frames).append(frame)
+    if not parquet_frames and not csv_frames:
+        return pd.DataFrame(columns=["ETF"] + (list(columns) if columns else [date_column]))
+
+    if csv_frames:
+        # CSV 分區合併後再一次套用精簡型別，各分區的欄位型別才會一致
+        parquet_frames.append(schema.compact(pd.concat(csv_frames, ignore_index=True), from_text=True))
+    result = pd.concat(parquet_frames, ignore_index=True)
+    if start is not None:
+        result = result[result[date_column] >= pd.Timestamp(start)]
+    if end is not None:
+        result = result[result[date_column] <= pd.Timestamp(end)]
+    return result.sort_values(["ETF", date_column], kind="stable").reset_index(drop=True)
+
+
+def find_ingest_files(targets):
+    """找出可匯入的燈號結果 CSV，回傳 [(ETF, 檔案), ...]"""
+    files = []
+    for target in targets:
+        paths = ([path for pattern in INGEST_PATTERNS for path in sorted(glob.glob(os.path.join(target, pattern)))]
+                 if os.path.isdir(target) else [target])
+        for path in paths:
+            for regex in INGEST_PATTERNS.values():
+                match = regex.search(os.path.basename(path))
+                if match:
+                    files.append((match.group("etf"), path))
+                    break
+    return files
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="將燈號結果 CSV 匯入分區資料集")
+    parser.add_argument("targets", nargs="*", default=["."], help="資料夾或檔案")
+    parser.add_argument("--output", default=DATASET_DIR, help="資料集資料夾")
+    args = parser.parse_args(argv)
+
+    for etf, path in find_ingest_files(args.targets):
+        try:
+            written = write_partitions(schema.read_signal_csv(path), args.output, etf)
+            print(f"已匯入: {path} → {len(written)} 個分區")
+        except Exception as e:
+            print(f"匯入 {path} 時發生錯誤: {e}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+# -----------------------------------------------------
+# 交易日索引
+#
+# 載入資料時建立一次：每個交易日 → 列位置、前一交易日的列位置，
+# 查詢「前一交易日」為 O(1)，週一、連假後也能找到上一個有資料的日期
+# (同一天有多筆時取第一筆)
+# -----------------------------------------------------
+import pandas as pd
+
+
+class TradingDateIndex:
+    """交易日 → 列位置 / 前一交易日列位置 的對照表"""
+
+    def __init__(self, dates):
+        self.positions = {}
+        self.previous = {}
+        last_position = None
+        for position, date in enumerate(pd.to_datetime(pd.Series(dates)).dt.date):
+            if date in self.positions:
+                continue
+            self.positions[date] = position
+            self.previous[date] = last_position
+            last_position = position
+        self.dates = list(self.positions)
+
+    @classmethod
+    def from_frame(cls, df, column="Date"):
+        """由資料表的日期欄建立 (資料表需已依日期排序)"""
+        return cls(df[column])
+
+    @staticmethod
+    def _as_date(date):
+        return pd.Timestamp(date).date()
+
+    def __contains__(self, date):
+        return self._as_date(date) in self.positions
+
+    def __len__(self):
+        return len(self.dates)
+
+    def position(self, date):
+        """該日的列位置，無資料時為 None"""
+        return self.positions.get(self._as_date(date))
+
+    def previous_position(self, date):
+        """前一交易日的列位置，無資料或為第一天時為 None"""
+        return self.previous.get(self._as_date(date))
@@ -0,0 +1,162 @@
+# -----------------------------------------------------
+# 燈號評分引擎
+#
+# backtesting.py、BT1/BT2、ETF_signalNEWTEST.py、TestResult.py 共用的
+# 「分項評分 → 加權總分 → 燈號分類」流程，整欄一次計算：
+#
+#   ENGINE = SignalEngine(
+#       scorers=[("折溢價分數", BandScorer("折溢價利率(%)", discount_bands(-1, 1))),
+#                ("VIX分數", BandScorer("VIX收盤價", vix_bands(15, 25)))],
+#       total=WeightedSum([("折溢價分數", 0.5), (("鉅亨網左側情緒", "兆豐左側情緒"), 0.1), ("VIX分數", 0.2)]),
+#       classifier=light_bands([0.8, 0.3, -0.3, -0.8]))
+#   result_df = ENGINE.run(result_df)   # 新增 折溢價分數、VIX分數、總分、燈號
+#
+# 各腳本的門檻、權重不同，皆以 Bands (依序比對的分段規則) 與 WeightedSum 組合，
+# 計算順序與原本各腳本的逐列公式相同，結果一致
+# -----------------------------------------------------
+import numbers
+
+import numpy as np
+import pandas as pd
+
+from signal_lib.scoring import LIGHT_LABELS, parse_rate
+
+OPERATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+
+
+def _as_float(values, fill_missing):
+    """轉為浮點陣列 (fill_missing=True 時空值補 0)"""
+    values = pd.to_numeric(pd.Series(values), errors="coerce").astype(float)
+    if fill_missing:
+        values = values.fillna(0)
+    return values.to_numpy()
+
+
+class Bands:
+    """
+    分段對照: rules [(輸出值, 條件), ...] 依序比對，第一個符合的規則為輸出，皆不符者為 default
+    條件為 (運算子, 門檻) 或其 list (需全部符合)；數值先乘上 scale 再比較，空值輸出為 NA
+    """
+
+    def __init__(self, rules, default=pd.NA, scale=1.0):
+        self.rules = [(output, [condition] if isinstance(condition[0], str) else list(condition))
+                      for output, condition in rules]
+        self.default = default
+        self.scale = scale
+
+    def __call__(self, values):
+        values = parse_rate(values)
+        v = values.to_numpy(dtype=float)
+        if self.scale != 1:
+            v = v * self.scale
+        missing = np.isnan(v)
+
+        with np.errstate(invalid="ignore"):
+            conditions = []
+            for _, condition in self.rules:
+                matched = np.ones(len(v), dtype=bool)
+                for operator, threshold in condition:
+                    matched &= OPERATORS[operator](v, threshold)
+                conditions.append(matched)
+
+        outputs = [output for output, _ in self.rules] + [self.default]
+        if all(isinstance(output, numbers.Integral) for output in outputs):
+            result = pd.Series(np.select(conditions, outputs[:-1], default=self.default),
+                               index=values.index, dtype="Int64")
+        elif all(isinstance(output, numbers.Real) for output in outputs):
+            result = pd.Series(np.select(conditions, outputs[:-1], default=self.default),
+                               index=values.index, dtype=float)
+        else:
+            result = pd.Series(np.select(conditions, outputs[:-1], default=None),
+                               index=values.index, dtype="object")
+            result[result.isna()] = self.default
+        result[missing] = np.nan if result.dtype == float else pd.NA
+        return result
+
+
+def discount_bands(discount_bound=-1, premium_bound=1):
+    """折溢價分數: ≤折價門檻 → 1，≥溢價門檻 → -1，其餘 → 0"""
+    return Bands([(1, ("<=", discount_bound)), (-1, (">=", premium_bound))], default=0)
+
+
+def vix_bands(vix_low, vix_mid):
+    """VIX分數: ≤低標 → -1，≤中標 → 0，其餘 → 1"""
+    return Bands([(-1, ("<=", vix_low)), (0, ("<=", vix_mid))], default=1)
+
+
+def vix_range_bands(vix_low, vix_high, scale=1.0):
+    """VIX分數 (不含等號): >高標 → 1，<低標 → -1，其餘 → 0"""
+    return Bands([(1, (">", vix_high)), (-1, ("<", vix_low))], default=0, scale=scale)
+
+
+def left_side_bands():
+    """左側情緒: 情緒總分 >0 → -1，<0 → 1，其餘 → 0 (情緒越負越可能進場)"""
+    return Bands([(-1, (">", 0)), (1, ("<", 0))], default=0)
+
+
+def light_bands(lower_bounds, operators=(">=", ">=", ">=", ">="), labels=LIGHT_LABELS):
+    """燈號: 依下界由高至低比對 (預設 分數 >= 下界)，皆不符者為最後一個燈號"""
+    rules = [(label, (operator, bound)) for label, operator, bound in zip(labels, operators, lower_bounds)]
+    return Bands(rules, default=labels[len(lower_bounds)])
+
+
+class BandScorer:
+    """以 Bands 將資料表的某一欄轉為分數"""
+
+    def __init__(self, column, bands):
+        self.column = column
+        self.bands = bands
+
+    def __call__(self, frame):
+        return self.bands(frame[self.column])
+
+
+class WeightedSum:
+    """
+    加權加總: terms [(欄位 或 欄位 tuple, 權重), ...]
+    tuple 內的欄位先相加再乘權重，各項由左至右相加 (與原本逐列公式的運算順序相同)
+    fill_missing=True 時空值視為 0，否則任一項為空值則結果為 NaN；decimals 不為 None 時四捨五入
+    """
+
+    def __init__(self, terms, fill_missing=True, decimals=None):
+        self.terms = [((columns,) if isinstance(columns, str) else tuple(columns), weight)
+                      for columns, weight in terms]
+        self.fill_missing = fill_missing
+        self.decimals = decimals
+
+    def __call__(self, frame):
+        total = None
+        for columns, weight in self.terms:
+            values = _as_float(frame[columns[0]], self.fill_missing)
+            for column in columns[1:]:
+                values = values + _as_float(frame[column], self.fill_missing)
+            values = values * weight
+            total = values if total is None else total + values
+        if self.decimals is not None:
+            total = np.round(total, self.decimals)
+        return pd.Series(total, index=frame.index)
+
+
+class SignalEngine:
+    """分項評分 → 加權總分 → 燈號，一次整欄計算"""
+
+    def __init__(self, scorers, total, classifier, total_column="總分", signal_column="燈號"):
+        self.scorers = list(scorers)  # [(輸出欄位, scorer), ...] 依序計算，後面的 scorer 可使用前面的輸出
+        self.total = total
+        self.classifier = classifier
+        self.total_column = total_column
+        self.signal_column = signal_column
+
+    def run(self, frame):
+        """回傳加上分項分數、總分與燈號欄位的新資料表 (已存在的欄位就地覆寫)"""
+        frame = frame.copy()
+        for column, scorer in self.scorers:
+            frame[column] = scorer(frame)
+        frame[self.total_column] = self.total(frame)
+        frame[self.signal_column] = self.classifier(frame[self.total_column])
+        return frame
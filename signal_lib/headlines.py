@@ -0,0 +1,84 @@
+# -----------------------------------------------------
+# 新聞標題的分塊讀取與每日情緒加總
+#
+# 鉅亨網標題依月份分檔，累積多年後全部讀進記憶體再 concat 會佔用大量記憶體；
+# 這裡改為逐檔、逐塊 (CHUNKSIZE 列) 讀取，每塊評分後立即依日期加總，
+# 只保留「日期 → 原始分數」的累計，記憶體用量與新聞總數無關
+#
+#   chunks = iter_headline_chunks(files, "時間", "標題")
+#   daily = daily_scores(chunks, matcher, start_date, end_date)   # 日期, 原始分數
+#
+# 有較新的 .parquet 時 (見 columnar_store) 以 pyarrow 分批讀取，只讀日期、標題兩欄
+#
+# workers > 1 時各塊分派到多個行程評分：編譯好的關鍵詞比對器在每個 worker 啟動時
+# 傳送一次 (runner 的共用資料)，各塊的每日小計依讀取順序合併，結果與單一行程完全相同
+# -----------------------------------------------------
+import pandas as pd
+
+from signal_lib.columnar_store import fresh_parquet
+from signal_lib.runner import imap_ordered, get_shared
+
+CHUNKSIZE = 50000  # 每塊列數
+
+
+def _read_chunks(path, columns, chunksize):
+    """逐塊讀取單一檔案的指定欄位 (欄名前後空白會去除)"""
+    parquet = fresh_parquet(path)
+    if parquet:
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(parquet).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    for chunk in pd.read_csv(path, chunksize=chunksize, usecols=lambda name: name.strip() in columns):
+        chunk.columns = chunk.columns.str.strip()
+        yield chunk
+
+
+def iter_headline_chunks(paths, date_column, title_column, chunksize=CHUNKSIZE):
+    """逐檔、逐塊產生只含 (日期, 標題) 的 DataFrame，日期為 datetime.date"""
+    if isinstance(paths, str):
+        paths = [paths]
+    for path in paths:
+        for chunk in _read_chunks(path, [date_column, title_column], chunksize):
+            yield pd.DataFrame({
+                "日期": pd.to_datetime(chunk[date_column]).dt.date,
+                "標題": chunk[title_column],
+            })
+
+
+def _filter_chunks(chunks, start_date, end_date):
+    """篩選日期範圍並略過空的塊，產生 runner 任務參數"""
+    for chunk in chunks:
+        if start_date is not None:
+            chunk = chunk[chunk["日期"] >= start_date]
+        if end_date is not None:
+            chunk = chunk[chunk["日期"] <= end_date]
+        if not chunk.empty:
+            yield (chunk,)
+
+
+def _chunk_totals(chunk):
+    """單一塊的每日小計 {日期: 原始分數} (比對器取自 runner 共用資料)"""
+    matcher = get_shared("matcher")
+    scores = pd.Series(matcher.score_many(chunk["標題"]), index=chunk["日期"].to_numpy())
+    return scores.groupby(level=0).sum().to_dict()
+
+
+def daily_scores(chunks, matcher, start_date=None, end_date=None, workers=1):
+    """
+    逐塊計算標題情緒分數並累加為每日總分 (回傳 日期, 原始分數，依日期排序)
+    workers: 評分的行程數 (1: 在目前行程執行，None: 依 CPU 核心數)
+    """
+    totals = {}
+    for partial in imap_ordered(_chunk_totals, _filter_chunks(chunks, start_date, end_date),
+                                shared={"matcher": matcher}, max_workers=workers):
+        for date, score in partial.items():
+            totals[date] = totals.get(date, 0) + score
+
+    dates = sorted(totals)
+    return pd.DataFrame({
+        "日期": pd.Series(dates, dtype="object"),
+        "原始分數": pd.Series([totals[date] for date in dates], dtype="int64"),
+    })
@@ -0,0 +1,97 @@
+# -----------------------------------------------------
+# 關鍵詞多模式比對 (Aho-Corasick)
+#
+# 將 positive.txt / negative.txt 編譯成一個自動機，
+# 每則標題只需走訪一次字元即可得到 正面詞數 - 負面詞數，
+# 結果與 sum(word in title for word in words) 完全相同
+# -----------------------------------------------------
+from collections import deque
+
+import pandas as pd
+
+
+class KeywordMatcher:
+    """正負面關鍵詞比對器 (建立一次，重複使用)"""
+
+    def __init__(self, positive_words, negative_words):
+        # 每個詞的權重 = 在正面詞庫出現次數 - 在負面詞庫出現次數
+        # (與原本逐詞 `word in title` 加總的結果一致，重複的詞會重複計分)
+        weights = {}
+        for word in positive_words:
+            weights[word] = weights.get(word, 0) + 1
+        for word in negative_words:
+            weights[word] = weights.get(word, 0) - 1
+
+        # 空字串必定出現在任何標題中
+        self._base_score = weights.pop("", 0)
+        words = [word for word, weight in weights.items() if weight != 0]
+        self._weights = [weights[word] for word in words]
+
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        self._build(words)
+
+    def _build(self, words):
+        """建立 trie 與失敗連結"""
+        goto, fail, output = self._goto, self._fail, self._output
+
+        for pattern_id, word in enumerate(words):
+            node = 0
+            for ch in word:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    fail.append(0)
+                    output.append(())
+                node = nxt
+            output[node] = output[node] + (pattern_id,)
+
+        # 以 BFS 建立失敗連結，並把失敗鏈上的輸出合併到節點上
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(ch, 0)
+                if output[fail[child]]:
+                    output[child] = output[child] + output[fail[child]]
+
+    def score(self, title):
+        """計算單則標題的情緒分數 (正面詞數 - 負面詞數)"""
+        if pd.isna(title):
+            return 0
+        if not isinstance(title, str):
+            title = str(title)
+
+        goto, fail, output = self._goto, self._fail, self._output
+        matched = set()
+        node = 0
+        for ch in title:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if output[node]:
+                matched.update(output[node])
+
+        weights = self._weights
+        return self._base_score + sum(weights[i] for i in matched)
+
+    def score_many(self, titles):
+        """計算多則標題的情緒分數，回傳 list"""
+        score = self.score
+        return [score(title) for title in titles]
+
+
+def load_keyword_matcher(positive_path, negative_path):
+    """從詞庫檔建立關鍵詞比對器"""
+    with open(positive_path, "r", encoding="utf-8") as f:
+        positive = [line.strip() for line in f]
+    with open(negative_path, "r", encoding="utf-8") as f:
+        negative = [line.strip() for line in f]
+    return KeywordMatcher(positive, negative)
@@ -0,0 +1,195 @@
+# -----------------------------------------------------
+# 回測績效指標
+#
+# 與 performance_summary.py 的計算方式相同：
+# 總報酬率、年化報酬率 (以日曆天 365 計)、勝率、平均每筆報酬、
+# 最大單次虧損、最大回撤 (皆為小數，非百分比)
+# 另計算 Sharpe、Sortino (日報酬年化，TRADING_DAYS 天)、Calmar (年化報酬 / |最大回撤|)
+# 與持倉比例 (有未平倉部位的天數比例，需提供每日訊號)
+#
+# matrix_metrics 以資金矩陣 (天數 × 組數，如 ETF 或參數組合) 一次計算所有組；
+# 各組可有不同的起訖日 (前後以 NaN 補齊)，以各組第一天與最後一天有資料的資金計算，
+# 各組日期不同時 (如滾動視窗各自靠上對齊) 可傳入日期矩陣 (天數 × 組數)
+# -----------------------------------------------------
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252  # 年化 Sharpe / Sortino 的每年交易日數
+
+METRIC_NAMES = ["start_equity", "end_equity", "n_trades", "total_return", "win_rate", "avg_return",
+                "worst_trade", "annualized_return", "max_drawdown",
+                "sharpe", "sortino", "calmar", "exposure"]
+
+
+def _trade_statistics(trade_returns, n_sets):
+    """各組交易次數、勝率、平均報酬、最大單次虧損 (無交易的組為 0)"""
+    counts = np.zeros(n_sets, dtype=np.int64)
+    win_rate, avg_return, worst_trade = np.zeros(n_sets), np.zeros(n_sets), np.zeros(n_sets)
+    if trade_returns is None:
+        nan = np.full(n_sets, np.nan)
+        return counts, nan, nan.copy(), nan.copy()
+
+    arrays = [np.asarray(returns, dtype=float) for returns in trade_returns]
+    counts[:] = [len(returns) for returns in arrays]
+    traded = counts > 0
+    if traded.any():
+        flat = np.concatenate([returns for returns in arrays if len(returns)])
+        offsets = np.concatenate([[0], np.cumsum(counts[traded])[:-1]])
+        win_rate[traded] = np.add.reduceat((flat > 0).astype(float), offsets) / counts[traded]
+        avg_return[traded] = np.add.reduceat(flat, offsets) / counts[traded]
+        worst_trade[traded] = np.minimum.reduceat(flat, offsets)
+    return counts, win_rate, avg_return, worst_trade
+
+
+def open_positions(signal_matrix):
+    """每日未平倉筆數 (天數 × 組數)：訊號 1 新增一筆，-1 在有部位時平倉一筆"""
+    signal_matrix = np.asarray(signal_matrix, dtype=np.int64)
+    if signal_matrix.ndim == 1:
+        signal_matrix = signal_matrix[:, None]
+    steps = np.clip(signal_matrix, -1, 1)
+    walk = np.cumsum(steps, axis=0)
+    # 沒有部位時的賣出訊號不動作: 以累計和減去其歷史最低點 (不高於 0) 即為未平倉筆數
+    return walk - np.minimum(np.minimum.accumulate(walk, axis=0), 0)
+
+
+def _nanoseconds(dates):
+    """日期 → int64 奈秒 (一維或二維)"""
+    dates = np.asarray(dates)
+    if dates.ndim == 2:
+        return dates.astype("datetime64[ns]").astype(np.int64)
+    return pd.to_datetime(pd.Series(dates)).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+
+def matrix_metrics(dates, equity, trade_returns=None, signals=None, risk_free_rate=0.0):
+    """
+    一次計算多組回測的績效指標
+    dates: 每日日期 (長度 = 天數) 或各組的日期矩陣 (天數 × 組數)；equity: 資金矩陣 (天數 × 組數，一維時視為一組)
+    trade_returns: 各組每筆交易報酬的 list (長度 = 組數)，None 時交易相關指標為 NaN
+    signals: 各組每日訊號 (天數 × 組數)，None 時持倉比例為 NaN
+    回傳 DataFrame (每組一列，欄位見 METRIC_NAMES)
+    """
+    equity = np.asarray(equity, dtype=float)
+    if equity.ndim == 1:
+        equity = equity[:, None]
+    n_days, n_sets = equity.shape
+    columns = np.arange(n_sets)
+
+    # 各組第一天與最後一天有資料的位置
+    valid = ~np.isnan(equity)
+    has_data = valid.any(axis=0)
+    if n_days:
+        first = np.where(has_data, valid.argmax(axis=0), 0)
+        last = np.where(has_data, n_days - 1 - valid[::-1].argmax(axis=0), 0)
+    else:
+        first = last = np.zeros(n_sets, dtype=np.int64)
+
+    # 報酬率
+    if n_days:
+        start_equity = np.where(has_data, equity[first, columns], np.nan)
+        end_equity = np.where(has_data, equity[last, columns], np.nan)
+    else:
+        start_equity = end_equity = np.full(n_sets, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        total_return = np.where(start_equity > 0, end_equity / start_equity - 1, np.nan)
+
+    # 年化報酬
+    if n_days:
+        nanoseconds = _nanoseconds(dates)
+        if nanoseconds.ndim == 1:
+            elapsed = nanoseconds[last] - nanoseconds[first]
+        else:
+            elapsed = nanoseconds[last, columns] - nanoseconds[first, columns]
+        total_days = np.where(has_data, elapsed // (86400 * 10 ** 9), 0)
+    else:
+        total_days = np.zeros(n_sets, dtype=np.int64)
+    with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+        annualized_return = np.where((total_days > 0) & ~np.isnan(total_return),
+                                     (1 + total_return) ** (365 / np.maximum(total_days, 1)) - 1, np.nan)
+
+    # 回撤
+    if n_days:
+        peak = np.fmax.accumulate(equity, axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            drawdown = np.nan_to_num((equity - peak) / peak, nan=0.0)
+        max_drawdown = np.where(has_data, drawdown.min(axis=0), np.nan)
+    else:
+        max_drawdown = np.full(n_sets, np.nan)
+
+    # 日報酬的 Sharpe / Sortino
+    with np.errstate(invalid="ignore", divide="ignore"):
+        daily = equity[1:] / equity[:-1] - 1 - risk_free_rate / TRADING_DAYS
+        n_returns = (~np.isnan(daily)).sum(axis=0)
+        mean = np.where(n_returns > 0, np.nansum(daily, axis=0) / np.maximum(n_returns, 1), np.nan)
+        deviation = np.where(np.isnan(daily), 0.0, daily - mean)
+        std = np.sqrt((deviation ** 2).sum(axis=0) / np.maximum(n_returns - 1, 1))
+        downside = np.sqrt((np.minimum(np.nan_to_num(daily, nan=0.0), 0) ** 2).sum(axis=0)
+                           / np.maximum(n_returns, 1))
+        scale = np.sqrt(TRADING_DAYS)
+        sharpe = np.where((n_returns > 1) & (std > 0), mean / std * scale, np.nan)
+        sortino = np.where((n_returns > 0) & (downside > 0), mean / downside * scale, np.nan)
+        calmar = np.where(max_drawdown < 0, annualized_return / np.abs(max_drawdown), np.nan)
+
+    # 持倉比例
+    if signals is not None and n_days:
+        held = (open_positions(signals) > 0) & valid
+        exposure = np.where(has_data, held.sum(axis=0) / np.maximum(valid.sum(axis=0), 1), np.nan)
+    else:
+        exposure = np.full(n_sets, np.nan)
+
+    n_trades, win_rate, avg_return, worst_trade = _trade_statistics(trade_returns, n_sets)
+    return pd.DataFrame(dict(zip(METRIC_NAMES, [
+        start_equity, end_equity, n_trades, total_return, win_rate, avg_return, worst_trade,
+        annualized_return, max_drawdown, sharpe, sortino, calmar, exposure,
+    ])))
+
+
+def performance_metrics(dates, equity, trade_returns, signals=None):
+    """計算單一回測的績效指標 (dict，同 matrix_metrics 的一列)"""
+    metrics = matrix_metrics(dates, equity, [trade_returns], signals)
+    return {name: metrics[name].iloc[0] for name in METRIC_NAMES}
+
+
+# 績效報告欄位 (同 performance_summary_report.csv)
+REPORT_COLUMNS = ["初始資金", "結束資金", "交易次數", "總報酬率(%)", "勝率(%)",
+                  "平均每筆報酬(%)", "最大單次虧損(%)", "年化報酬率(%)", "最大回撤(%)"]
+
+# 風險調整指標欄位 (report_frame(risk=True) 時附加在 REPORT_COLUMNS 之後)
+RISK_COLUMNS = ["夏普比率", "索提諾比率", "卡瑪比率", "持倉比例(%)"]
+
+
+def report_frame(metrics, risk=False):
+    """
+    將 matrix_metrics 的結果整批轉為報告格式 (資金取整數，比率轉為百分比取小數兩位)
+    risk=True 時附加 RISK_COLUMNS
+    """
+    def pct(name):
+        return np.round(metrics[name].to_numpy(dtype=float) * 100, 2)
+
+    def money(name):
+        values = np.round(metrics[name].to_numpy(dtype=float))
+        return values.astype(np.int64) if not np.isnan(values).any() else values
+
+    report = pd.DataFrame(dict(zip(REPORT_COLUMNS, [
+        money("start_equity"),
+        money("end_equity"),
+        metrics["n_trades"].to_numpy(),
+        pct("total_return"),
+        pct("win_rate"),
+        pct("avg_return"),
+        pct("worst_trade"),
+        pct("annualized_return"),
+        pct("max_drawdown"),
+    ])), index=metrics.index)
+    if risk:
+        for column, name in zip(RISK_COLUMNS[:3], ["sharpe", "sortino", "calmar"]):
+            report[column] = np.round(metrics[name].to_numpy(dtype=float), 2)
+        report[RISK_COLUMNS[3]] = pct("exposure")
+    return report
+
+
+def write_report(path, codes, metrics, risk=False, code_column="ETF代碼", encoding="utf-8"):
+    """寫出多檔 ETF 的績效報告 (欄位: ETF代碼 + REPORT_COLUMNS，同 performance_summary_report.csv)"""
+    report = report_frame(metrics, risk=risk)
+    report.insert(0, code_column, list(codes))
+    report.to_csv(path, index=False, encoding=encoding)
+    return report
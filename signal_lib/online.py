@@ -0,0 +1,177 @@
+# -----------------------------------------------------
+# 線上每日燈號 (增量更新)
+#
+# 不重跑整年度腳本，只保存計算下一天所需的狀態，新的一天進來時只算當天：
+#   折溢價分數   zscore.ZScoreState (近 window 日滾動平均/變異數 + 未出現正分的計數器)
+#   新聞輿情     當日各來源的原始分數累計 (新聞可分批加入)，收盤時以左側情緒分類
+#   部位         portfolio.PositionBook (同 performance_summary.py 的多筆倉位回測)
+# 狀態存成 JSON，當日結果以 ETF_signalNEWTEST.py 燈號結果的欄位附加到燈號檔
+#
+#   state = OnlineSignal.bootstrap("0050", ENGINE, premium_df, sentiment_df, vix_df, until="2025-06-30")
+#                                                                   # 第一次: 由歷史重新評分建立狀態
+#   state.add_headlines(date, "cnyes", titles, matcher)             # 盤中: 新聞分批加入 (可省略)
+#   row = state.close_day(ENGINE, date, price, rate, vix, sentiment={"ptt": 1})   # 一列的 DataFrame
+#   state.save("online_state_0050.json")
+#
+# 只處理有折溢價資料的交易日；分數與燈號與批次計算相同
+# (當日沒有 VIX 時指數綜合分數與總分為空，同批次計算，不沿用前一日的 VIX)
+# 建立狀態時以同一個評分引擎與同一份折溢價市價重算歷史燈號與部位 (不沿用燈號檔中的燈號與市價)，
+# 新舊交易日的部位才會一致
+# -----------------------------------------------------
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from signal_lib import portfolio, zscore
+from signal_lib.engine import left_side_bands
+from signal_lib.scoring import parse_rate
+
+# 新聞來源 → 燈號結果的左側情緒欄位 (同 sentiment_result.csv)
+SENTIMENT_SOURCES = {"cnyes": "鉅亨_左側情緒分類", "mega": "兆豐_左側情緒分類", "ptt": "PTT_左側情緒分類"}
+
+# 每日輸出欄位 (同 ETF_signalNEWTEST.py 的燈號結果)
+ROW_COLUMNS = ["Date", "市價", "折溢價利率(%)", "折溢價利率分數", "新聞輿情分數", "VIX",
+               "指數綜合分數", "折溢價分數", "總分", "燈號"]
+
+classify_sentiment = left_side_bands()
+
+
+class OnlineSignal:
+    """單一 ETF 的線上燈號狀態"""
+
+    def __init__(self, code, zscore_state, book, last_date=None, headline_totals=None):
+        self.code = code
+        self.zscore = zscore_state
+        self.book = book
+        self.last_date = last_date  # 最後處理的交易日 (YYYY-MM-DD)
+        self.headline_totals = headline_totals or {}  # {日期: {來源: 原始分數}}，收盤後清除
+
+    @classmethod
+    def bootstrap(cls, code, engine, premium_df, sentiment_df, vix_df, until=None,
+                  window=zscore.WINDOW, no_positive_days=zscore.NO_POSITIVE_DAYS):
+        """
+        由歷史資料建立狀態: until (含) 之前的交易日以 engine 一次評分，分數、燈號與部位同逐日 close_day
+        premium_df: 折溢價資料 (索引: 交易日期，同 data_cache.load_premium_discount)
+        sentiment_df: 左側情緒 (索引: 日期，欄位見 SENTIMENT_SOURCES)；vix_df: VIX (索引: 日期，Close 欄)
+        until: 燈號檔已輸出的最後一天 (None: 尚未輸出，狀態為空，所有交易日都視為新的一天)
+        """
+        premium_df = premium_df.sort_index()
+        premium_df = premium_df[~premium_df.index.duplicated(keep="last")]
+        premium_df = premium_df[premium_df.index <= pd.Timestamp(until)] if until is not None else premium_df.iloc[:0]
+        dates = premium_df.index
+
+        rates = parse_rate(premium_df["折溢價利率(%)"])
+        _, _, _, premium_scores = zscore.score_batch(rates.to_numpy(), window, no_positive_days)
+        state = zscore.ZScoreState.from_history(rates, window, no_positive_days)
+
+        daily = pd.DataFrame({
+            "市價": premium_df["市價"].to_numpy(),
+            "折溢價利率(%)": premium_df["折溢價利率(%)"].to_numpy(),
+            "折溢價分數": premium_scores.to_numpy(),
+            **{source: sentiment_df[column].reindex(dates).to_numpy()
+               for source, column in SENTIMENT_SOURCES.items()},
+            "VIX": vix_df["Close"].reindex(dates).to_numpy(),
+        })
+        scored = engine.run(daily)
+
+        traded = daily["市價"].notna().to_numpy()
+        signals = scored["燈號"].astype(object).map(portfolio.SIGNAL_MAP).fillna(0).astype(int)
+        book = portfolio.PositionBook.from_history(dates[traded], daily["市價"][traded].astype(float),
+                                                   signals[traded])
+
+        last_date = str(pd.Timestamp(until).date()) if until is not None else None
+        return cls(code, state, book, last_date)
+
+    def add_headlines(self, date, source, titles, matcher):
+        """盤中加入新聞標題，累計當日該來源的原始分數"""
+        date = str(pd.Timestamp(date).date())
+        totals = self.headline_totals.setdefault(date, {})
+        totals[source] = totals.get(source, 0) + int(np.sum(matcher.score_many(titles)))
+
+    def _sentiment(self, date, sentiment):
+        """當日各來源的左側情緒 (直接給定者優先，其次為累計的新聞原始分數，皆無則為空值)"""
+        totals = self.headline_totals.pop(date, {})
+        values = {}
+        for source in SENTIMENT_SOURCES:
+            if sentiment and pd.notna(sentiment.get(source, np.nan)):
+                values[source] = sentiment[source]
+            elif source in totals:
+                values[source] = classify_sentiment(pd.Series([totals[source]])).iloc[0]
+            else:
+                values[source] = np.nan
+        return values
+
+    def close_day(self, engine, date, price, rate, vix=np.nan, sentiment=None):
+        """
+        收盤後計算新的一天，回傳當日燈號結果 (一列的 DataFrame，欄位見 ROW_COLUMNS；另附資金與未平倉筆數)
+        engine: ETF_signalNEWTEST.ENGINE；sentiment: {來源: 左側情緒}，未給定的來源改用累計的新聞
+        """
+        date = pd.Timestamp(date)
+        key = str(date.date())
+        if self.last_date is not None and key <= self.last_date:
+            raise ValueError(f"{self.code}: {key} 不晚於最後處理日 {self.last_date}")
+
+        _, premium_score = self.zscore.update(parse_rate(pd.Series([rate])).iloc[0])
+        sentiment = self._sentiment(key, sentiment)
+        daily = pd.DataFrame({
+            "市價": [price],
+            "折溢價利率(%)": [rate],
+            "折溢價分數": [premium_score],
+            **{source: [value] for source, value in sentiment.items()},
+            "VIX": [vix],
+        })
+        scored = engine.run(daily)
+
+        light = scored["燈號"].iloc[0]
+        signal = portfolio.SIGNAL_MAP.get(light, 0) if pd.notna(light) else 0
+        if pd.notna(price):
+            self.book.step(key, float(price), signal)
+        self.last_date = key
+
+        return pd.DataFrame({
+            "Date": [date],
+            "市價": daily["市價"],
+            "折溢價利率(%)": daily["折溢價利率(%)"],
+            "折溢價利率分數": np.nan,
+            "新聞輿情分數": scored["新聞輿情分數"],
+            "VIX": daily["VIX"],
+            "指數綜合分數": scored["指數綜合分數"],
+            "折溢價分數": daily["折溢價分數"],
+            "總分": scored["總分"],
+            "燈號": scored["燈號"],
+            "資金": self.book.equity,
+            "未平倉筆數": len(self.book.lots),
+        })
+
+    def to_dict(self):
+        """轉為可存成 JSON 的 dict"""
+        return {
+            "code": self.code,
+            "last_date": self.last_date,
+            "headline_totals": self.headline_totals,
+            "zscore": self.zscore.to_dict(),
+            "book": self.book.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """由 to_dict 的結果還原狀態"""
+        return cls(data["code"], zscore.ZScoreState.from_dict(data["zscore"]),
+                   portfolio.PositionBook.from_dict(data["book"]),
+                   data["last_date"], data["headline_totals"])
+
+    def save(self, path):
+        """保存狀態 (先寫入暫存檔再取代，中斷時不會留下寫一半的檔案)"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """讀取 save 保存的狀態"""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
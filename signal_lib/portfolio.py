@@ -0,0 +1,204 @@
+# -----------------------------------------------------
+# 多筆倉位回測引擎 (FIFO)
+#
+# 與 performance_summary.py 原本的 iterrows 迴圈邏輯相同：
+#   燈號 1  → 以目前資金 * position_fraction 買進一筆 (含手續費)
+#   燈號 -1 → 賣出最早的一筆 (扣手續費與交易稅)，損益計入資金
+# 未平倉部位以陣列實作的佇列 (head/tail 指標) 保存，平倉為 O(1)；
+# 有安裝 numba 時以 njit 編譯，否則以純 Python/NumPy 執行，結果相同
+# 線上模式 PositionBook: 保存資金與未平倉部位，每日以 step 更新一天 (規則同上)，可存成 JSON
+# -----------------------------------------------------
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:  # numba 為選用套件
+    njit = None
+
+INITIAL_EQUITY = 100000
+TRANSACTION_COST_RATE = 0.001
+TAX_RATE = 0.003
+POSITION_FRACTION = 0.1  # 每次固定投入10%資金
+
+# 燈號轉換 (未列出的燈號視為 0，不動作)
+SIGNAL_MAP = {
+    '淺綠燈': 1,
+    '綠燈': 1,
+    '淺紅燈': -1,
+    '紅燈': -1,
+    '黃燈': 0
+}
+
+
+def _simulate_fifo(prices, signals, initial_equity, position_fraction, cost_rate, tax_rate):
+    """回測核心: 回傳 (每日資金, 交易紀錄陣列...)"""
+    n = len(prices)
+    equity_curve = np.empty(n)
+
+    # 未平倉部位佇列 (每天最多新增一筆，容量 n 即足夠)
+    lot_day = np.empty(n, np.int64)
+    lot_price = np.empty(n)
+    lot_size = np.empty(n)
+    head = 0
+    tail = 0
+
+    # 交易紀錄
+    entry_day = np.empty(n, np.int64)
+    exit_day = np.empty(n, np.int64)
+    entry_price = np.empty(n)
+    exit_price = np.empty(n)
+    trade_return = np.empty(n)
+    position_size = np.empty(n)
+    profit = np.empty(n)
+    n_trades = 0
+
+    equity = initial_equity
+    for i in range(n):
+        signal = signals[i]
+        if signal == 1:
+            lot_day[tail] = i
+            lot_size[tail] = equity * position_fraction
+            lot_price[tail] = prices[i] * (1 + cost_rate)
+            tail += 1
+
+        elif signal == -1 and tail > head:
+            sell_price = prices[i] * (1 - cost_rate - tax_rate)
+            ret = (sell_price / lot_price[head]) - 1
+            pnl = lot_size[head] * ret
+            equity += pnl
+
+            entry_day[n_trades] = lot_day[head]
+            exit_day[n_trades] = i
+            entry_price[n_trades] = lot_price[head]
+            exit_price[n_trades] = sell_price
+            trade_return[n_trades] = ret
+            position_size[n_trades] = lot_size[head]
+            profit[n_trades] = pnl
+            n_trades += 1
+            head += 1
+
+        equity_curve[i] = equity
+
+    return (equity_curve, entry_day[:n_trades], exit_day[:n_trades], entry_price[:n_trades],
+            exit_price[:n_trades], trade_return[:n_trades], position_size[:n_trades], profit[:n_trades])
+
+
+if njit is not None:
+    _simulate_fifo_kernel = njit(cache=True)(_simulate_fifo)
+else:
+    _simulate_fifo_kernel = _simulate_fifo
+
+
+def simulate(prices, signals, initial_equity=INITIAL_EQUITY, position_fraction=POSITION_FRACTION,
+             cost_rate=TRANSACTION_COST_RATE, tax_rate=TAX_RATE):
+    """
+    執行單一回測
+    prices: 每日價格，signals: 每日燈號訊號 (1 買進 / -1 賣出 / 0 不動作)
+    回傳 (每日資金 ndarray, 交易紀錄 dict of ndarray，日期以索引表示)
+    """
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    signals = np.ascontiguousarray(signals, dtype=np.int64)
+    if njit is None:
+        # 純 Python 執行時，list 的逐筆存取比 ndarray 快
+        prices, signals = prices.tolist(), signals.tolist()
+    (equity_curve, entry_day, exit_day, entry_price, exit_price,
+     trade_return, position_size, profit) = _simulate_fifo_kernel(
+        prices, signals, float(initial_equity), position_fraction, cost_rate, tax_rate)
+
+    trades = {
+        "entry_day": entry_day,
+        "exit_day": exit_day,
+        "entry_price": entry_price,
+        "exit_price": exit_price,
+        "return": trade_return,
+        "position_size": position_size,
+        "profit": profit,
+    }
+    return equity_curve, trades
+
+
+def simulate_many(prices, signal_matrix, **kwargs):
+    """以同一價格序列回測多組訊號 (signal_matrix: 天數 × 組數)，回傳 (資金矩陣, 各組交易紀錄)"""
+    signal_matrix = np.asarray(signal_matrix)
+    equity = np.empty(signal_matrix.shape, dtype=np.float64)
+    trades = []
+    for j in range(signal_matrix.shape[1]):
+        equity[:, j], trade = simulate(prices, signal_matrix[:, j], **kwargs)
+        trades.append(trade)
+    return equity, trades
+
+
+class PositionBook:
+    """線上模式的部位狀態: 每日以 step(日期, 價格, 訊號) 更新，結果與 simulate 逐日相同"""
+
+    def __init__(self, equity=INITIAL_EQUITY, lots=(), position_fraction=POSITION_FRACTION,
+                 cost_rate=TRANSACTION_COST_RATE, tax_rate=TAX_RATE):
+        self.equity = float(equity)
+        self.lots = deque(tuple(lot) for lot in lots)  # 未平倉部位 (進場日期, 含手續費的進場價, 投入金額)，先進先出
+        self.position_fraction = position_fraction
+        self.cost_rate = cost_rate
+        self.tax_rate = tax_rate
+
+    def step(self, date, price, signal):
+        """加入新的一天，回傳當日平倉的交易紀錄 dict (無平倉時為 None)"""
+        if signal == 1:
+            self.lots.append((str(date), price * (1 + self.cost_rate), self.equity * self.position_fraction))
+        elif signal == -1 and self.lots:
+            entry_date, entry_price, size = self.lots.popleft()
+            sell_price = price * (1 - self.cost_rate - self.tax_rate)
+            ret = (sell_price / entry_price) - 1
+            pnl = size * ret
+            self.equity += pnl
+            return {"entry_date": entry_date, "exit_date": str(date), "entry_price": entry_price,
+                    "exit_price": sell_price, "return": ret, "position_size": size, "profit": pnl}
+        return None
+
+    @classmethod
+    def from_history(cls, dates, prices, signals, initial_equity=INITIAL_EQUITY,
+                     position_fraction=POSITION_FRACTION, cost_rate=TRANSACTION_COST_RATE, tax_rate=TAX_RATE):
+        """以歷史資料回測 (simulate) 後建立狀態: 未平倉部位為尚未被 FIFO 平倉的買進"""
+        prices = np.asarray(prices, dtype=float)
+        signals = np.asarray(signals, dtype=np.int64)
+        dates = pd.to_datetime(pd.Series(dates)).dt.date.to_numpy()
+        equity_curve, trades = simulate(prices, signals, initial_equity, position_fraction, cost_rate, tax_rate)
+        buys = np.flatnonzero(signals == 1)[len(trades["return"]):]
+        lots = [(str(dates[i]), prices[i] * (1 + cost_rate), equity_curve[i] * position_fraction) for i in buys]
+        equity = equity_curve[-1] if len(equity_curve) else initial_equity
+        return cls(equity, lots, position_fraction, cost_rate, tax_rate)
+
+    def to_dict(self):
+        """轉為可存成 JSON 的 dict"""
+        return {
+            "equity": self.equity,
+            "lots": [list(lot) for lot in self.lots],
+            "position_fraction": self.position_fraction,
+            "cost_rate": self.cost_rate,
+            "tax_rate": self.tax_rate,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """由 to_dict 的結果還原狀態"""
+        return cls(data["equity"], data["lots"], data["position_fraction"], data["cost_rate"], data["tax_rate"])
+
+
+def trade_log(trades, dates):
+    """將交易紀錄轉為 DataFrame (欄位同 multi_position_trade_log_*.csv)"""
+    dates = pd.to_datetime(pd.Series(dates)).reset_index(drop=True)
+    entry_date = dates.iloc[trades["entry_day"]].reset_index(drop=True)
+    exit_date = dates.iloc[trades["exit_day"]].reset_index(drop=True)
+    if len(entry_date) == 0:
+        return pd.DataFrame()
+    return pd.DataFrame({
+        "entry_date": entry_date,
+        "exit_date": exit_date,
+        "entry_price": trades["entry_price"],
+        "exit_price": trades["exit_price"],
+        "return": trades["return"],
+        "position_size": trades["position_size"],
+        "profit": trades["profit"],
+        "holding_days": (exit_date - entry_date).dt.days,
+    })
@@ -0,0 +1,176 @@
+# -----------------------------------------------------
+# 階段計時與效能分析
+#
+#   with profiling.span("2. 載入折溢價"):
+#       ...
+# 預設關閉：span() 直接回傳同一個 nullcontext，不計時也不追蹤記憶體
+# 以 --profile 開啟後 (見 add_arguments / run_main)：
+#   - 記錄每個 span 的執行時間與期間的記憶體峰值 (tracemalloc)
+#   - 結束時印出各階段計時表
+#   - 可另外以 --profiler cprofile|pyinstrument 輸出函式層級的分析報告
+# 同名 span 會合併統計 (次數、總時間、最長時間、最大峰值)
+# -----------------------------------------------------
+import contextlib
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+import unicodedata
+
+_NULL_SPAN = contextlib.nullcontext()
+_enabled = False
+_track_memory = False
+_records = []  # (名稱, 秒數, 峰值位元組 或 None)
+_stack = []  # 進行中的 span (追蹤巢狀 span 的記憶體峰值)
+
+
+def enable(memory=True):
+    """開啟計時 (memory=True 時一併以 tracemalloc 追蹤記憶體峰值)"""
+    global _enabled, _track_memory
+    _enabled = True
+    _track_memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    """關閉計時"""
+    global _enabled
+    _enabled = False
+    if _track_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """清除已記錄的計時"""
+    _records.clear()
+
+
+class _Span:
+    def __init__(self, name):
+        self.name = name
+        self.peak = 0
+
+    def __enter__(self):
+        if _track_memory:
+            # 重設峰值前先併入外層 span，避免外層的峰值遺失
+            _, peak = tracemalloc.get_traced_memory()
+            if _stack:
+                _stack[-1].peak = max(_stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+        _stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        _stack.pop()
+        peak = None
+        if _track_memory:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            peak = self.peak
+            if _stack:
+                _stack[-1].peak = max(_stack[-1].peak, peak)
+        _records.append((self.name, seconds, peak))
+        return False
+
+
+def span(name):
+    """計時區塊 (未開啟時不做任何事)"""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def summary():
+    """依名稱彙總: [(名稱, 次數, 總秒數, 最長秒數, 最大峰值位元組 或 None)]，依首次出現順序"""
+    rows = {}
+    for name, seconds, peak in _records:
+        if name not in rows:
+            rows[name] = [name, 0, 0.0, 0.0, peak]
+        row = rows[name]
+        row[1] += 1
+        row[2] += seconds
+        row[3] = max(row[3], seconds)
+        if peak is not None:
+            row[4] = max(row[4] or 0, peak)
+    return [tuple(row) for row in rows.values()]
+
+
+def _pad(text, width, left=True):
+    """依顯示寬度補空白 (中文字佔兩格)"""
+    text = str(text)
+    display = sum(2 if unicodedata.east_asian_width(c) in "WF" else 1 for c in text)
+    space = " " * max(width - display, 0)
+    return text + space if left else space + text
+
+
+def report():
+    """各階段計時表 (文字)"""
+    widths = [32, 6, 12, 10, 16]
+    rows = [["階段", "次數", "總時間(s)", "最長(s)", "記憶體峰值(MB)"]]
+    for name, calls, total, longest, peak in summary():
+        peak_text = f"{peak / 1024 ** 2:.1f}" if peak is not None else "-"
+        rows.append([name, calls, f"{total:.3f}", f"{longest:.3f}", peak_text])
+    return "\n".join("".join(_pad(value, width, left=(i == 0)) for i, (value, width) in enumerate(zip(row, widths)))
+                     for row in rows)
+
+
+def run_profiler(func, tool="cprofile", output=None, top=30):
+    """以 cProfile 或 pyinstrument 執行 func，output 為報告檔 (未指定時印出)"""
+    if tool == "pyinstrument":
+        from pyinstrument import Profiler  # 選用套件
+
+        profiler = Profiler()
+        profiler.start()
+        try:
+            return func()
+        finally:
+            profiler.stop()
+            if output:
+                with open(output, "w", encoding="utf-8") as f:
+                    f.write(profiler.output_html() if output.endswith(".html") else profiler.output_text())
+                print(f"效能分析報告已保存到: {output}")
+            else:
+                print(profiler.output_text(unicode=True))
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func)
+    finally:
+        if output:
+            profiler.dump_stats(output)
+            print(f"效能分析報告已保存到: {output} (可用 snakeviz 或 pstats 檢視)")
+        else:
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+            print(stream.getvalue())
+
+
+def add_arguments(parser):
+    """加入 --profile 相關參數"""
+    parser.add_argument("--profile", action="store_true", help="印出各階段計時與記憶體峰值")
+    parser.add_argument("--profiler", choices=["cprofile", "pyinstrument"],
+                        help="另外輸出函式層級的效能分析 (需搭配 --profile)")
+    parser.add_argument("--profile-output", help="效能分析報告檔 (.prof 或 .html)，未指定時印出")
+
+
+def run_main(func, args):
+    """依參數執行 func：未指定 --profile 時直接執行"""
+    if not args.profile:
+        return func()
+    enable()
+    try:
+        with span("總計"):
+            if args.profiler:
+                return run_profiler(func, args.profiler, args.profile_output)
+            return func()
+    finally:
+        print("\n各階段計時:")
+        print(report())
+        disable()
@@ -0,0 +1,27 @@
+# -----------------------------------------------------
+# 背景繪圖
+#
+# 數值結果輸出後，再把圖表 (matplotlib PNG、plotly HTML) 交給背景行程池繪製，
+# 不佔用計算流程的時間；繪圖函式應在函式內才 import matplotlib / plotly，
+# 不需要圖表的批次執行 (--no-plots) 就完全不會載入這些套件
+# 開啟 profiling 時改為在目前行程依序繪製，以便記錄各圖的計時
+# -----------------------------------------------------
+from signal_lib import profiling
+from signal_lib.runner import run_parallel
+
+
+def _render(name, func, args):
+    with profiling.span(name):
+        return func(*args)
+
+
+def render_in_background(jobs, max_workers=None):
+    """
+    平行繪製圖表
+    jobs: [(名稱, 繪圖函式, args), ...]，繪圖函式需為模組層級函式
+    回傳 (results, failures)，格式同 runner.run_parallel
+    """
+    if profiling.is_enabled():
+        max_workers = 1
+    tasks = [(name, (name, func, args)) for name, func, args in jobs]
+    return run_parallel(_render, tasks, max_workers=max_workers)
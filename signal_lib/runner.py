@@ -0,0 +1,107 @@
+# -----------------------------------------------------
+# 多行程回測執行器
+#
+# 將多支 ETF (或 ETF × 年度) 的回測分派到 ProcessPoolExecutor：
+#   - 共用資料 (VIX、輿情等) 透過 initializer 在每個 worker 啟動時傳送一次，
+#     不會隨每個任務重複 pickle；任務內以 get_shared(名稱) 取得
+#   - 結果依任務順序回傳，與完成先後無關
+#   - 單一任務失敗只記錄錯誤，不會中斷整批
+# 任務數量很多 (例如逐塊處理的新聞標題) 時改用 imap_ordered：
+# 任務逐一送出、同時進行中的任務數有上限，結果依送出順序產生
+# 任務函式需為模組層級函式 (可被 pickle)
+# -----------------------------------------------------
+import os
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+_SHARED = {}
+
+
+def _init_worker(shared):
+    """worker 啟動時保存共用資料"""
+    global _SHARED
+    _SHARED = shared
+
+
+def get_shared(name):
+    """取得共用資料"""
+    return _SHARED[name]
+
+
+def _run_task(func, key, args):
+    """執行單一任務，例外轉為錯誤訊息回傳"""
+    try:
+        return key, func(*args), None
+    except Exception:
+        return key, None, traceback.format_exc()
+
+
+def run_parallel(func, tasks, shared=None, max_workers=None):
+    """
+    平行執行 func(*args)
+    tasks: [(任務鍵, args), ...]
+    回傳 (results, failures)：
+      results  依任務順序的 [(任務鍵, 回傳值), ...] (僅成功者)
+      failures {任務鍵: 錯誤訊息}
+    max_workers=1 時在目前行程中依序執行 (方便除錯)
+    """
+    tasks = list(tasks)
+    shared = shared or {}
+    outcomes = {}
+
+    if max_workers == 1:
+        _init_worker(shared)
+        for key, args in tasks:
+            outcomes[key] = _run_task(func, key, args)[1:]
+    else:
+        max_workers = min(max_workers or os.cpu_count() or 1, max(len(tasks), 1))
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(shared,)) as pool:
+            futures = {pool.submit(_run_task, func, key, args): key for key, args in tasks}
+            for future in as_completed(futures):
+                try:
+                    outcomes[futures[future]] = future.result()[1:]
+                except Exception:
+                    # worker 異常結束或參數無法 pickle
+                    outcomes[futures[future]] = (None, traceback.format_exc())
+
+    results = [(key, outcomes[key][0]) for key, _ in tasks if outcomes[key][1] is None]
+    failures = {key: outcomes[key][1] for key, _ in tasks if outcomes[key][1] is not None}
+    return results, failures
+
+
+def imap_ordered(func, args_iter, shared=None, max_workers=None, prefetch=2):
+    """
+    平行執行 func(*args) 並依 args_iter 的順序逐一產生回傳值
+    args_iter 可為 generator，同時進行中的任務最多 max_workers × prefetch 個，
+    不會一次把所有任務讀進記憶體；任務的例外會直接拋出
+    max_workers=1 時在目前行程中依序執行
+    """
+    shared = shared or {}
+    if max_workers == 1:
+        previous = _SHARED
+        _init_worker(shared)
+        try:
+            for args in args_iter:
+                yield func(*args)
+        finally:
+            _init_worker(previous)
+        return
+
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(shared,)) as pool:
+        pending = deque()
+        for args in args_iter:
+            pending.append(pool.submit(func, *args))
+            if len(pending) >= max_workers * prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def report_failures(failures):
+    """印出失敗的任務"""
+    for key, error in failures.items():
+        print(f"❌ {key} 執行失敗:\n{error}")
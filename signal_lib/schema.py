@@ -0,0 +1,148 @@
+# -----------------------------------------------------
+# 每日燈號表的精簡型別 (compact schema)
+#
+# 各腳本輸出的燈號表欄位名稱相同，依欄位名稱套用固定型別：
+#   日期            Date, 日期, 交易日期              → datetime64
+#   價格 / 利率      市價, 淨值, VIX, 折溢價利率(%) ... → float64 ("0.12%" 轉為 0.12)
+#   分項分數         折溢價分數, VIX分數, 左側情緒 ...  → Int8 (整數分數) 或 float32
+#   總分            總分                             → float32
+#   燈號            燈號, 評分燈號                    → category (LIGHT_LABELS，內部為 int8 代碼)
+#   交易日標記       is_trading_day                   → boolean
+# 空值一律保留 (Int8 / boolean 為可為空型別，float 為 NaN，燈號為 NaN)
+#
+#   df = read_signal_csv("燈號結果_0050_2024.csv")   # CSV → 精簡型別
+#   to_signal_csv(df, "燈號結果_0050_2024.csv")      # expand 後寫出 CSV
+#   append_signal_csv(rows, "ETF_signal_0050.csv")   # 依既有標題列附加新的列 (檔案不存在時同 to_signal_csv)
+#
+# expand 為 compact 的反向轉換：折溢價利率(%) 寫回 "0.12%" 字串，分數與總分轉回 float64 / Int64，
+# 燈號轉回字串；未經 compact 的資料表原樣寫出
+# 分類與門檻比較請在轉為 float32 之前以 float64 計算 (engine.py)；
+# float32 無法還原原本 float64 的末幾位 (例如 -0.15000000000000002 寫回為 -0.15)，
+# 需要與原本輸出逐字元相同時，請寫出 compact 之前的資料表
+# -----------------------------------------------------
+import os
+
+import numpy as np
+import pandas as pd
+
+from signal_lib.scoring import LIGHT_LABELS, parse_rate
+
+DATE_COLUMNS = ("Date", "日期", "交易日期")
+FLOAT_COLUMNS = ("市價", "淨值", "Close", "VIX", "VIX收盤價", "折溢價利率(%)", "折溢價利率", "折溢價率")
+PERCENT_COLUMNS = ("折溢價利率(%)",)  # 原始資料為 "0.12%" 字串的欄位
+SCORE_COLUMNS = (
+    "折溢價分數", "折溢價利率分數", "VIX分數", "指數綜合分數", "恐慌分數",
+    "鉅亨網左側情緒", "兆豐左側情緒", "PTT左側情緒", "新聞輿情分數",
+    "鉅亨_左側情緒分類", "兆豐_左側情緒分類", "PTT_輿情分數",
+)
+TOTAL_COLUMNS = ("總分",)
+SIGNAL_COLUMNS = ("燈號", "評分燈號")
+FLAG_COLUMNS = ("is_trading_day",)
+
+LIGHT_DTYPE = pd.CategoricalDtype(LIGHT_LABELS)
+
+
+def _score_dtype(values, from_text):
+    """分項分數型別: 整數型別 (或由 CSV 讀入且皆為整數值) → Int8，其餘 → float32"""
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_integer_dtype(values):
+        return "Int8"
+    if from_text:
+        finite = pd.to_numeric(values, errors="coerce").dropna()
+        if ((finite == finite.round()) & (finite.abs() <= 127)).all():
+            return "Int8"
+    return "float32"
+
+
+def signal_codes(lights):
+    """燈號 → int8 代碼 (LIGHT_LABELS 的索引，空值或未知燈號為 -1)"""
+    return pd.Categorical(lights, dtype=LIGHT_DTYPE).codes.astype(np.int8)
+
+
+def lights_from_codes(codes):
+    """int8 代碼 → 燈號 (category)"""
+    return pd.Categorical.from_codes(np.asarray(codes, dtype=np.int8), dtype=LIGHT_DTYPE)
+
+
+def compact(frame, from_text=False):
+    """
+    回傳套用精簡型別的新資料表 (不認得的欄位維持原樣)
+    from_text=True 表示資料剛由 CSV 讀入：整數分數可能因空值被讀成 float，改依數值判斷是否為整數
+    """
+    frame = frame.copy()
+    for column in frame.columns:
+        values = frame[column]
+        if column in DATE_COLUMNS:
+            frame[column] = pd.to_datetime(values)
+        elif column in FLOAT_COLUMNS:
+            frame[column] = parse_rate(values).astype("float64").to_numpy()
+        elif column in SCORE_COLUMNS:
+            dtype = _score_dtype(values, from_text)
+            numbers = pd.to_numeric(values, errors="coerce")
+            frame[column] = numbers.astype("Float64").astype(dtype) if dtype == "Int8" else numbers.astype(dtype)
+        elif column in TOTAL_COLUMNS:
+            frame[column] = pd.to_numeric(values, errors="coerce").astype("float32")
+        elif column in SIGNAL_COLUMNS:
+            frame[column] = pd.Categorical(values, dtype=LIGHT_DTYPE)
+        elif column in FLAG_COLUMNS:
+            frame[column] = values.astype("boolean")
+    return frame
+
+
+def format_rate(values):
+    """折溢價利率數值 → "0.12%" 字串 (至少兩位小數，同 MoneyDJ；空值維持空值)"""
+    numbers = parse_rate(values)
+    return numbers.map(lambda x: f"{x:.2f}%" if round(x, 2) == x else f"{x}%", na_action="ignore")
+
+
+def _widen(values):
+    """float32 → float64 (以 float32 的最短十進位表示轉換，0.1 不會變成 0.10000000149011612)"""
+    return pd.to_numeric(values.astype(str), errors="coerce").astype("float64")
+
+
+def expand(frame):
+    """compact 的反向轉換，回傳新的資料表 (已是原本型別的欄位維持原樣)"""
+    frame = frame.copy()
+    for column in frame.columns:
+        values = frame[column]
+        if column in PERCENT_COLUMNS and pd.api.types.is_numeric_dtype(values):
+            frame[column] = format_rate(values).astype(object)
+        elif column in SCORE_COLUMNS + TOTAL_COLUMNS:
+            if values.dtype == "float32":
+                frame[column] = _widen(values)
+            elif values.dtype == "Int8":
+                frame[column] = values.astype("Int64")
+        elif column in SIGNAL_COLUMNS and isinstance(values.dtype, pd.CategoricalDtype):
+            frame[column] = values.astype(object)
+    return frame
+
+
+def read_signal_csv(path, **csv_kwargs):
+    """讀取燈號表 CSV 並套用精簡型別"""
+    return compact(pd.read_csv(path, **csv_kwargs), from_text=True)
+
+
+def to_signal_csv(frame, path, encoding="utf-8-sig", **csv_kwargs):
+    """寫出燈號表 CSV (先 expand；日期為 YYYY-MM-DD，空值為空白)"""
+    expand(frame).to_csv(path, index=False, encoding=encoding, **csv_kwargs)
+    return path
+
+
+def append_signal_csv(frame, path, encoding="utf-8-sig", **csv_kwargs):
+    """
+    將新的列附加到燈號表 CSV (已存在的檔案不重寫標題列與 BOM)
+    新的列依既有檔案的標題列選取、排列欄位 (多的欄位不寫入)；缺少標題列中的欄位時拋出 ValueError
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return to_signal_csv(frame, path, encoding=encoding, **csv_kwargs)
+    header = list(pd.read_csv(path, nrows=0, encoding=encoding).columns)
+    missing = [column for column in header if column not in frame.columns]
+    if missing:
+        raise ValueError(f"{path} 的欄位 {missing} 不在新的列中，無法附加")
+    expand(frame[header]).to_csv(path, mode="a", header=False, index=False,
+                         encoding="utf-8" if encoding == "utf-8-sig" else encoding, **csv_kwargs)
+    return path
+
+
+def memory_usage(frame):
+    """資料表佔用的記憶體 (位元組，含字串內容)"""
+    return int(frame.memory_usage(index=True, deep=True).sum())
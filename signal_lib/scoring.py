@@ -0,0 +1,18 @@
+# -----------------------------------------------------
+# 評分共用定義
+#
+# 燈號名稱與折溢價利率的解析；分項分數、總分與燈號的分類門檻
+# 皆以 engine.py 的 Bands / WeightedSum 計算 (門檻只定義在一處)
+# -----------------------------------------------------
+import pandas as pd
+
+LIGHT_LABELS = ["深綠燈", "淺綠燈", "黃燈", "淺紅燈", "紅燈"]
+
+
+def parse_rate(rates):
+    """將折溢價利率 ("0.12%" 或數值) 轉為浮點數，無法轉換者為 NaN"""
+    rates = pd.Series(rates)
+    if pd.api.types.is_numeric_dtype(rates):
+        return rates.astype(float)
+    text = rates.astype(str).str.replace("%", "", regex=False).str.strip()
+    return pd.to_numeric(text, errors="coerce")
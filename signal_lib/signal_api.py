@@ -0,0 +1,263 @@
+# -----------------------------------------------------
+# 本機燈號查詢 API (HTTP/JSON)
+#
+# 只使用標準函式庫 (asyncio)，可完全離線執行：
+# 啟動時將資料夾中的燈號載入記憶體 (精簡型別 + 交易日索引，同儀表板)，資料來源與儀表板直接讀檔時相同：
+#   分區資料集 (資料夾/signal_dataset，見 dataset.py) 中有的 ETF 讀其分區，其餘讀 ETF_signal_{code}.csv
+# 每列事先轉成 JSON 可用的 dict，查詢只是字典與列位置查找；
+# 查詢前檢查檔案修改時間 (最多每 RELOAD_INTERVAL 秒一次)，檔案更新後只重新載入該 ETF
+#
+#   python -m signal_lib.signal_api [資料夾] [--dataset 資料集資料夾] [--host 127.0.0.1] [--port 8765]
+#
+#   GET /etfs                                       可查詢的 ETF、資料區間與資料來源 (分區資料集或 CSV 路徑)
+#   GET /dates/{code}                               所有交易日
+#   GET /signal/{code}/{YYYY-MM-DD}                 該日燈號 (row) 與前一交易日 (previous)
+#   GET /range/{code}?start=YYYY-MM-DD&end=...      區間內每日燈號 (省略 start / end 為不限)
+#   GET /latest/{code}                              最新一個交易日
+# 回應皆為 JSON；查無資料為 404，參數錯誤為 400
+#
+# 用戶端以 fetch_json(API_URL, "/latest/0050") 查詢，連不上時拋出 OSError，由呼叫端改為讀檔
+# -----------------------------------------------------
+import argparse
+import asyncio
+import bisect
+import glob
+import json
+import os
+import sys
+import time
+import urllib.parse
+import urllib.request
+
+import pandas as pd
+
+from signal_lib import dataset
+from signal_lib.date_index import TradingDateIndex
+from signal_lib.schema import read_signal_csv
+
+HOST = "127.0.0.1"
+PORT = 8765
+API_URL = f"http://{HOST}:{PORT}"
+RELOAD_INTERVAL = 1.0  # 檢查檔案是否更新的最短間隔 (秒)
+SIGNAL_PATTERN = "ETF_signal_*.csv"
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               500: "Internal Server Error"}
+
+
+class SignalTable:
+    """單一 ETF 的燈號表 (依日期排序，只保留有總分的列)"""
+
+    def __init__(self, code, frame, mtime, source=None):
+        self.code = code
+        self.mtime = mtime
+        self.source = source  # 讀取的 CSV 或分區資料集路徑
+        self.index = TradingDateIndex.from_frame(frame)
+        frame = frame.assign(Date=frame["Date"].dt.strftime("%Y-%m-%d"))
+        for column in frame.columns[frame.dtypes == "float32"]:
+            # float32 以最短的十進位表示轉為 float64 (同 CSV 中的數字)，避免 JSON 出現 0.200000003
+            frame[column] = frame[column].astype(str).astype("float64")
+        self.rows = json.loads(frame.to_json(orient="records", force_ascii=False))
+        self.dates = [row["Date"] for row in self.rows]
+
+    @classmethod
+    def load(cls, code, path):
+        mtime = os.path.getmtime(path)
+        frame = read_signal_csv(path)
+        frame = frame[frame["總分"].notna()].sort_values("Date").reset_index(drop=True)
+        return cls(code, frame, mtime, path)
+
+    @classmethod
+    def from_dataset(cls, code, root):
+        """由分區資料集只讀取該 ETF 的分區 (mtime 為分區最新的修改時間)"""
+        mtime = dataset.last_modified(root, [code])
+        frame = dataset.read_dataset(root, etfs=[code]).drop(columns="ETF")
+        frame = frame[frame["總分"].notna()].reset_index(drop=True)
+        return cls(code, frame, mtime, root)
+
+    def signal(self, date):
+        """該日與前一交易日的資料，無資料時為 None"""
+        position = self.index.position(date)
+        if position is None:
+            return None
+        previous = self.index.previous_position(date)
+        return {"code": self.code, "row": self.rows[position],
+                "previous": self.rows[previous] if previous is not None else None}
+
+    def range(self, start=None, end=None):
+        """日期區間內的列 (含起訖日)"""
+        low = bisect.bisect_left(self.dates, start) if start else 0
+        high = bisect.bisect_right(self.dates, end) if end else len(self.dates)
+        return {"code": self.code, "rows": self.rows[low:high]}
+
+    def latest(self):
+        return {"code": self.code, "row": self.rows[-1] if self.rows else None}
+
+    def summary(self):
+        return {"code": self.code, "rows": len(self.rows),
+                "start": self.dates[0] if self.dates else None,
+                "end": self.dates[-1] if self.dates else None,
+                "source": self.source}
+
+
+class SignalCache:
+    """資料夾中所有 ETF 燈號表的記憶體快取 (依檔案修改時間自動重新載入)"""
+
+    def __init__(self, directory=".", pattern=SIGNAL_PATTERN, reload_interval=RELOAD_INTERVAL, dataset_dir=None):
+        self.directory = directory
+        self.pattern = pattern
+        self.dataset_dir = dataset_dir if dataset_dir is not None else os.path.join(directory, dataset.DATASET_DIR)
+        self.reload_interval = reload_interval
+        self.tables = {}
+        self.errors = {}
+        self._checked = None
+        self.refresh(force=True)
+
+    def _code(self, path):
+        prefix, suffix = self.pattern.split("*")
+        return os.path.basename(path)[len(prefix):-len(suffix)]
+
+    def _sources(self):
+        """{ETF: (CSV 路徑 或 None (讀資料集), 修改時間)}: 資料集中有的 ETF 讀分區，其餘讀 CSV"""
+        sources = {}
+        for code, _, path in dataset.partitions(self.dataset_dir):
+            mtime = os.path.getmtime(path)
+            sources[code] = (None, max(mtime, sources[code][1]) if code in sources else mtime)
+        for path in glob.glob(os.path.join(self.directory, self.pattern)):
+            sources.setdefault(self._code(path), (path, os.path.getmtime(path)))
+        return sources
+
+    def refresh(self, force=False):
+        """重新載入新增或修改過的 ETF，移除已刪除的 ETF"""
+        now = time.monotonic()
+        if not force and self._checked is not None and now - self._checked < self.reload_interval:
+            return
+        self._checked = now
+
+        sources = self._sources()
+        for code in set(self.tables) - set(sources):
+            del self.tables[code]
+        for code, (path, mtime) in sources.items():
+            table = self.tables.get(code)
+            if table is not None and table.mtime == mtime:
+                continue
+            try:
+                self.tables[code] = (SignalTable.load(code, path) if path is not None
+                                     else SignalTable.from_dataset(code, self.dataset_dir))
+                self.errors.pop(code, None)
+            except Exception as e:  # 檔案寫入中或格式錯誤: 保留舊資料，下次再試
+                self.errors[code] = str(e)
+
+    def get(self, code):
+        self.refresh()
+        return self.tables.get(code)
+
+
+# ------------------------------------------------------
+# HTTP 處理
+# ------------------------------------------------------
+
+def _valid_date(value):
+    """YYYY-MM-DD 格式的日期字串，格式錯誤時為 None"""
+    try:
+        return pd.Timestamp(value).strftime("%Y-%m-%d")
+    except (ValueError, TypeError):
+        return None
+
+
+def route(cache, path, query):
+    """依路徑查詢，回傳 (狀態碼, JSON 物件)"""
+    parts = [urllib.parse.unquote(part) for part in path.strip("/").split("/") if part]
+    if parts == ["etfs"]:
+        cache.refresh()
+        return 200, {"etfs": [cache.tables[code].summary() for code in sorted(cache.tables)],
+                     "errors": cache.errors}
+    if len(parts) < 2 or parts[0] not in ("dates", "signal", "range", "latest"):
+        return 404, {"error": f"未知的路徑: {path}"}
+
+    table = cache.get(parts[1])
+    if table is None:
+        return 404, {"error": f"找不到 ETF {parts[1]} 的燈號資料"}
+
+    if parts[0] == "dates" and len(parts) == 2:
+        return 200, {"code": table.code, "dates": table.dates}
+    if parts[0] == "latest" and len(parts) == 2:
+        return 200, table.latest()
+    if parts[0] == "signal" and len(parts) == 3:
+        date = _valid_date(parts[2])
+        if date is None:
+            return 400, {"error": f"日期格式錯誤: {parts[2]}"}
+        result = table.signal(date)
+        return (200, result) if result else (404, {"error": f"{table.code} 在 {date} 沒有資料"})
+    if parts[0] == "range" and len(parts) == 2:
+        bounds = {key: query.get(key, [None])[0] for key in ("start", "end")}
+        dates = {key: _valid_date(value) if value else None for key, value in bounds.items()}
+        if any(bounds[key] and dates[key] is None for key in bounds):
+            return 400, {"error": "start / end 日期格式錯誤"}
+        return 200, table.range(dates["start"], dates["end"])
+    return 404, {"error": f"未知的路徑: {path}"}
+
+
+async def _handle(cache, reader, writer):
+    try:
+        request_line = (await reader.readline()).decode("latin-1").split()
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):  # 略過標頭
+            pass
+        if len(request_line) < 2:
+            status, body = 400, {"error": "無效的請求"}
+        elif request_line[0] != "GET":
+            status, body = 405, {"error": "只支援 GET"}
+        else:
+            url = urllib.parse.urlsplit(request_line[1])
+            try:
+                status, body = route(cache, url.path, urllib.parse.parse_qs(url.query))
+            except Exception as e:
+                status, body = 500, {"error": str(e)}
+
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        writer.write((f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                      "Content-Type: application/json; charset=utf-8\r\n"
+                      f"Content-Length: {len(payload)}\r\n"
+                      "Connection: close\r\n\r\n").encode("latin-1") + payload)
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(cache, host=HOST, port=PORT):
+    """啟動 API 伺服器 (持續執行直到中斷)"""
+    server = await asyncio.start_server(lambda r, w: _handle(cache, r, w), host, port)
+    print(f"燈號 API 已啟動: http://{host}:{port} (ETF: {', '.join(sorted(cache.tables)) or '無'})")
+    for code in sorted(cache.tables):
+        print(f"  {code}: {cache.tables[code].source}")
+    async with server:
+        await server.serve_forever()
+
+
+def fetch_json(base_url, path, timeout=1.0):
+    """查詢 API，回傳 JSON 物件 (連不上或 HTTP 錯誤時拋出 OSError / urllib.error.HTTPError)"""
+    with urllib.request.urlopen(base_url.rstrip("/") + path, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本機燈號查詢 API")
+    parser.add_argument("directory", nargs="?", default=".", help="ETF_signal_{code}.csv 所在資料夾")
+    parser.add_argument("--dataset", default=None,
+                        help=f"燈號分區資料集 (預設: 資料夾/{dataset.DATASET_DIR})，其中有的 ETF 優先讀取")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--reload-interval", type=float, default=RELOAD_INTERVAL,
+                        help="檢查檔案更新的最短間隔 (秒)")
+    args = parser.parse_args(argv)
+
+    cache = SignalCache(args.directory, reload_interval=args.reload_interval, dataset_dir=args.dataset)
+    try:
+        asyncio.run(serve(cache, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# -----------------------------------------------------
+# 權重與燈號門檻參數掃描 (grid search)
+#
+# 各分項分數 (折溢價、三個左側情緒總和、VIX) 只依分類門檻計算一次，
+# 所有權重組合以矩陣乘法一次算出總分：
+#   總分矩陣 (天數 × 權重組數) = round(分項矩陣 (天數 × 3) @ 權重矩陣.T, 2)
+# 再依每組燈號下界轉為燈號與買賣訊號，交給 portfolio.simulate_many 回測，
+# 以 metrics.matrix_metrics 一次計算所有權重組合的績效後排序
+# 只使用交易日 (市價非空值) 的資料回測
+# -----------------------------------------------------
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from signal_lib import portfolio
+from signal_lib.engine import BandScorer, discount_bands, vix_bands
+from signal_lib.scoring import LIGHT_LABELS
+from signal_lib.metrics import REPORT_COLUMNS, matrix_metrics, report_frame
+
+SENTIMENT_COLUMNS = ["鉅亨網左側情緒", "兆豐左側情緒", "PTT左側情緒"]
+PARAMETER_COLUMNS = ["折溢價權重", "輿情權重", "VIX權重", "折價界線", "溢價界線",
+                     "VIX低標", "VIX中標", "深綠燈下界", "淺綠燈下界", "黃燈下界", "淺紅燈下界"]
+
+
+def weight_grid(discount_weights, sentiment_weights, vix_weights):
+    """權重組合矩陣 (組數 × 3)，欄位順序: 折溢價、輿情、VIX"""
+    return np.array(list(itertools.product(discount_weights, sentiment_weights, vix_weights)),
+                    dtype=float).reshape(-1, 3)
+
+
+def vix_grid(vix_lows, vix_mids):
+    """VIX (低標, 中標) 組合，只保留 低標 < 中標"""
+    return [(low, mid) for low, mid in itertools.product(vix_lows, vix_mids) if low < mid]
+
+
+def bound_grid(dark_green, light_green, yellow, light_red):
+    """燈號下界組合 (深綠、淺綠、黃、淺紅)，只保留由高至低嚴格遞減者"""
+    return [bounds for bounds in itertools.product(dark_green, light_green, yellow, light_red)
+            if all(a > b for a, b in zip(bounds, bounds[1:]))]
+
+
+def component_matrix(frame, discount_bounds, vix_bounds):
+    """計算分項矩陣 (天數 × 3): 折溢價分數、三個左側情緒總和、VIX分數 (空值視為0)"""
+    def as_float(values):
+        return pd.to_numeric(values, errors="coerce").fillna(0).to_numpy(dtype=float)
+
+    discount = BandScorer("折溢價利率(%)", discount_bands(*discount_bounds))(frame)
+    vix = BandScorer("VIX收盤價", vix_bands(*vix_bounds))(frame)
+    sentiment = sum(as_float(frame[column]) for column in SENTIMENT_COLUMNS)
+    return np.column_stack([as_float(discount), sentiment, as_float(vix)])
+
+
+def light_codes(scores, lower_bounds):
+    """依燈號下界 (由高至低) 轉為燈號索引 (對應 LIGHT_LABELS)，與 engine.light_bands 相同"""
+    codes = np.zeros(scores.shape, dtype=np.int8)
+    for bound in lower_bounds:
+        codes += scores < bound
+    return codes
+
+
+def _signal_table(labels=LIGHT_LABELS, signal_map=portfolio.SIGNAL_MAP):
+    """燈號索引 → 買賣訊號的對照陣列"""
+    return np.array([signal_map.get(label, 0) for label in labels], dtype=np.int64)
+
+
+def run_sweep(frame, weights, vix_pairs, bound_sets, discount_pairs=((-1, 1),),
+              sort_by="年化報酬率(%)", **simulate_kwargs):
+    """
+    執行參數掃描
+    frame: backtesting.load_component_frame 的每日資料表
+    weights: weight_grid 的權重矩陣；vix_pairs / bound_sets / discount_pairs: 門檻組合
+    回傳依 sort_by 由高至低排序的結果表 (參數欄位 + 績效報告欄位)
+    """
+    frame = frame[frame["市價"].notna()].reset_index(drop=True)
+    prices = pd.to_numeric(frame["市價"], errors="coerce").to_numpy(dtype=float)
+    dates = frame["日期"]
+    weights = np.asarray(weights, dtype=float).reshape(-1, 3)
+    signal_table = _signal_table()
+
+    blocks = []
+    for discount_bounds, vix_bounds in itertools.product(discount_pairs, vix_pairs):
+        components = component_matrix(frame, discount_bounds, vix_bounds)
+        scores = np.round(components @ weights.T, 2)
+        for lower_bounds in bound_sets:
+            signals = signal_table[light_codes(scores, lower_bounds)]
+            equity, trades = portfolio.simulate_many(prices, signals, **simulate_kwargs)
+            metrics = matrix_metrics(dates, equity, [trade["return"] for trade in trades])
+            params = pd.DataFrame(
+                [[*weight, *discount_bounds, *vix_bounds, *lower_bounds] for weight in weights],
+                columns=PARAMETER_COLUMNS)
+            blocks.append(pd.concat([params, report_frame(metrics)], axis=1))
+
+    result = pd.concat(blocks, ignore_index=True) if blocks else pd.DataFrame(
+        columns=PARAMETER_COLUMNS + REPORT_COLUMNS)
+    return result.sort_values(sort_by, ascending=False, kind="stable").reset_index(drop=True)
+
@@ -0,0 +1,87 @@
+# -----------------------------------------------------
+# 滾動視窗 (walk-forward) 回測
+#
+# 完整歷史只載入、評分一次 (load_component_frame + ENGINE.run)，
+# 各視窗的樣本內 / 樣本外區間只是對同一份燈號結果切片：
+#   各區間由空手、初始資金開始以 portfolio.simulate 回測，
+#   各視窗的資金曲線靠上對齊排成矩陣 (區間天數 × 視窗數，較短的區間以 NaN 補齊)，
+#   連同各視窗的日期矩陣以 metrics.matrix_metrics 一次計算所有視窗的績效
+#
+#   scored = ENGINE.run(load_component_frame(ETF_CODE, START_DATE, END_DATE))
+#   windows = rolling_windows(scored["市價"].notna().sum(), train=252, test=63)   # expanding=True 為擴張視窗
+#   report = walk_forward(scored, windows)   # 每個視窗一列: 區間日期 + 樣本內 / 樣本外績效
+#
+# 視窗長度以交易日 (市價非空值的列) 計；分項分數與燈號皆為逐日計算，
+# 因此切片結果與只載入該區間重新評分相同
+# -----------------------------------------------------
+import numpy as np
+import pandas as pd
+
+from signal_lib import portfolio
+from signal_lib.metrics import REPORT_COLUMNS, RISK_COLUMNS, matrix_metrics, report_frame
+
+SEGMENTS = ("樣本內", "樣本外")
+WINDOW_COLUMNS = ["視窗", "樣本內起", "樣本內訖", "樣本外起", "樣本外訖"]
+
+
+def rolling_windows(n_days, train, test, step=None, expanding=False):
+    """
+    產生視窗 [(樣本內起, 樣本內訖, 樣本外起, 樣本外訖), ...] (列索引，訖為不含的上界)
+    train / test: 樣本內 / 樣本外交易日數；step: 每次前進的天數 (預設 test)
+    expanding=True 時樣本內一律由第 0 天開始 (擴張視窗)
+    """
+    step = step or test
+    windows = []
+    test_start = train
+    while test_start + test <= n_days:
+        train_start = 0 if expanding else test_start - train
+        windows.append((train_start, test_start, test_start, test_start + test))
+        test_start += step
+    return windows
+
+
+def _segment_metrics(dates, prices, signals, bounds, simulate_kwargs):
+    """各視窗同一區段 (樣本內或樣本外) 分別回測，以資金矩陣一次計算績效"""
+    n_days = max((end - start for start, end in bounds), default=0)
+    equity = np.full((n_days, len(bounds)), np.nan)
+    date_matrix = np.full((n_days, len(bounds)), np.datetime64("NaT"), dtype="datetime64[ns]")
+    signal_matrix = np.zeros((n_days, len(bounds)), dtype=np.int64)
+    trade_returns = []
+    for j, (start, end) in enumerate(bounds):
+        length = end - start
+        equity[:length, j], trades = portfolio.simulate(prices[start:end], signals[start:end], **simulate_kwargs)
+        date_matrix[:length, j] = dates[start:end]
+        signal_matrix[:length, j] = signals[start:end]
+        trade_returns.append(trades["return"])
+    return matrix_metrics(date_matrix, equity, trade_returns, signals=signal_matrix)
+
+
+def walk_forward(frame, windows, price_column="市價", signal_column="燈號",
+                 signal_map=portfolio.SIGNAL_MAP, **simulate_kwargs):
+    """
+    以已評分的完整歷史資料表執行滾動視窗回測
+    frame: 含日期、市價、燈號的每日資料表 (只使用交易日)；windows: rolling_windows 的結果
+    回傳每個視窗一列的結果表: WINDOW_COLUMNS + 各區段的績效欄位 (欄名加上「樣本內」/「樣本外」前綴)
+    """
+    frame = frame[frame[price_column].notna()].reset_index(drop=True)
+    dates = pd.to_datetime(frame["日期"]).to_numpy(dtype="datetime64[ns]")
+    prices = pd.to_numeric(frame[price_column], errors="coerce").to_numpy(dtype=float)
+    signals = frame[signal_column].astype(object).map(signal_map).fillna(0).to_numpy(dtype=np.int64)
+
+    result = pd.DataFrame({"視窗": np.arange(1, len(windows) + 1)})
+    reports = []
+    for k, segment in enumerate(SEGMENTS):
+        bounds = [(window[2 * k], window[2 * k + 1]) for window in windows]
+        result[f"{segment}起"] = [pd.Timestamp(dates[start]).date() for start, _ in bounds]
+        result[f"{segment}訖"] = [pd.Timestamp(dates[end - 1]).date() for _, end in bounds]
+
+        report = report_frame(_segment_metrics(dates, prices, signals, bounds, simulate_kwargs), risk=True)
+        report.columns = [f"{segment}{column}" for column in REPORT_COLUMNS + RISK_COLUMNS]
+        reports.append(report)
+    return pd.concat([result[WINDOW_COLUMNS], *reports], axis=1)
+
+
+def summarize(result, segment="樣本外", columns=("總報酬率(%)", "年化報酬率(%)", "最大回撤(%)", "夏普比率")):
+    """各視窗績效的分布摘要 (平均、標準差、最小、中位數、最大)"""
+    names = [f"{segment}{column}" for column in columns]
+    return result[names].agg(["mean", "std", "min", "median", "max"]).round(2)
@@ -0,0 +1,164 @@
+# -----------------------------------------------------
+# 折溢價動態 z-score 評分
+#
+# 與 ETF_signalNEWTEST.py 原本的逐筆迴圈規則相同：
+#   z = (折溢價率 - 近 window 日平均) / 近 window 日標準差
+#   z ≤ -1.2 → 0.5，z ≤ -0.3 → 0.25，z ≥ 1.2 → -0.5，z ≥ 0.3 → -0.25，其餘 → 0
+#   連續 no_positive_days 天 (z 有值的天數) 未出現 ≥ 0.25 時，
+#   若 -0.5 ≤ z ≤ 0.3 則強制補 0.25 (補分不會重置計數)
+#
+# 兩種模式：
+#   批次 score_batch: 整段歷史一次以陣列運算計算，計數器以累加和求得
+#   線上 ZScoreState: 保存滾動狀態 (Welford 平均/變異數 + 計數器)，
+#                     新的一天只需 O(1) 更新，不需重算歷史；可存成 JSON
+# -----------------------------------------------------
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+WINDOW = 60
+NO_POSITIVE_DAYS = 120
+
+
+def base_scores(z):
+    """z-score 門檻分數 (z 為空值者為 NaN)"""
+    z = np.asarray(z, dtype=float)
+    with np.errstate(invalid="ignore"):
+        scores = np.select([z <= -1.2, z <= -0.3, z >= 1.2, z >= 0.3],
+                           [0.5, 0.25, -0.5, -0.25], default=0.0)
+    scores[np.isnan(z)] = np.nan
+    return scores
+
+
+def rolling_zscore(rates, window=WINDOW):
+    """計算滾動平均、標準差與 z-score，回傳 (z_mean, z_std, z_score)"""
+    rates = pd.Series(rates, dtype=float)
+    z_mean = rates.rolling(window=window).mean()
+    z_std = rates.rolling(window=window).std()
+    return z_mean, z_std, (rates - z_mean) / z_std
+
+
+def dynamic_scores(z, no_positive_days=NO_POSITIVE_DAYS):
+    """依 z-score 計算分數 (含連續未出現正分時的補分規則)"""
+    z = np.asarray(z, dtype=float)
+    scores = base_scores(z)
+    valid = ~np.isnan(z)
+    with np.errstate(invalid="ignore"):
+        positive = valid & (scores >= 0.25)
+
+    # 計數器: 自上次出現正分後 (z 有值的) 天數
+    valid_count = np.cumsum(valid)
+    last_reset = np.maximum.accumulate(np.where(positive, valid_count, 0))
+    counter = valid_count - last_reset
+
+    with np.errstate(invalid="ignore"):
+        forced = valid & ~positive & (counter >= no_positive_days) & (z >= -0.5) & (z <= 0.3)
+    scores[forced] = 0.25
+    return scores
+
+
+def score_batch(rates, window=WINDOW, no_positive_days=NO_POSITIVE_DAYS):
+    """批次計算整段歷史，回傳 (z_mean, z_std, z_score, 分數)"""
+    z_mean, z_std, z_score = rolling_zscore(rates, window)
+    scores = pd.Series(dynamic_scores(z_score.to_numpy(), no_positive_days), index=z_score.index)
+    return z_mean, z_std, z_score, scores
+
+
+class ZScoreState:
+    """線上模式的滾動狀態: 每日以 update(折溢價率) 取得當日 (z-score, 分數)"""
+
+    def __init__(self, window=WINDOW, no_positive_days=NO_POSITIVE_DAYS):
+        self.window = window
+        self.no_positive_days = no_positive_days
+        self.values = deque()  # 近 window 日的折溢價率 (含空值)
+        self.count = 0  # 視窗內非空值筆數
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.no_positive = 0
+
+    def _add(self, value):
+        if math.isnan(value):
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def _remove(self, value):
+        if math.isnan(value):
+            return
+        self.count -= 1
+        if self.count == 0:
+            self.mean = self.m2 = 0.0
+            return
+        delta = value - self.mean
+        self.mean -= delta / self.count
+        self.m2 -= delta * (value - self.mean)
+
+    def update(self, rate):
+        """加入新的一天，回傳 (z-score, 分數)，z-score 無法計算時皆為 NaN"""
+        rate = float(rate) if pd.notna(rate) else math.nan
+        self.values.append(rate)
+        self._add(rate)
+        if len(self.values) > self.window:
+            self._remove(self.values.popleft())
+
+        if self.count < self.window:  # 視窗未滿或含空值
+            return math.nan, math.nan
+        std = math.sqrt(max(self.m2, 0.0) / (self.count - 1))
+        if std == 0:
+            z = math.nan if rate == self.mean else math.copysign(math.inf, rate - self.mean)
+        else:
+            z = (rate - self.mean) / std
+        if math.isnan(z):
+            return z, math.nan
+
+        score = float(base_scores([z])[0])
+        if score >= 0.25:
+            self.no_positive = 0
+        else:
+            self.no_positive += 1
+            if self.no_positive >= self.no_positive_days and -0.5 <= z <= 0.3:
+                score = 0.25
+        return z, score
+
+    @classmethod
+    def from_history(cls, rates, window=WINDOW, no_positive_days=NO_POSITIVE_DAYS):
+        """以歷史資料建立狀態 (計數器以批次模式求得)"""
+        state = cls(window, no_positive_days)
+        rates = pd.Series(rates, dtype=float).to_numpy()
+        _, _, z_score = rolling_zscore(rates, window)
+        z = z_score.to_numpy()
+        valid = ~np.isnan(z)
+        positive = np.flatnonzero(valid & (base_scores(z) >= 0.25))
+        start = positive[-1] + 1 if len(positive) else 0
+        state.no_positive = int(valid[start:].sum())
+        for value in rates[-window:]:
+            state.values.append(float(value))
+            state._add(float(value))
+        return state
+
+    def to_dict(self):
+        """轉為可存成 JSON 的 dict"""
+        return {
+            "window": self.window,
+            "no_positive_days": self.no_positive_days,
+            "values": [None if math.isnan(v) else v for v in self.values],
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "no_positive": self.no_positive,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """由 to_dict 的結果還原狀態"""
+        state = cls(data["window"], data["no_positive_days"])
+        state.values = deque(math.nan if v is None else v for v in data["values"])
+        state.count = data["count"]
+        state.mean = data["mean"]
+        state.m2 = data["m2"]
+        state.no_positive = data["no_positive"]
+        return state
@@ -0,0 +1,18 @@
+import pandas as pd
+
+from signal_lib import dataset
+
+
+def _rows(dates, totals):
+    return pd.DataFrame({"Date": pd.to_datetime(dates), "市價": [100.0] * len(dates),
+                         "總分": totals, "燈號": ["黃燈"] * len(dates)})
+
+
+def test_upsert_rows_merges_into_partitions(tmp_path):
+    dataset.write_partitions(_rows(["2024-12-30", "2024-12-31"], [0.1, 0.2]), tmp_path, "0050")
+    dataset.upsert_rows(_rows(["2024-12-31", "2025-01-02"], [-0.15, 0.3]), tmp_path, "0050")
+
+    assert [year for _, year, _ in dataset.partitions(tmp_path, etfs=["0050"])] == [2024, 2025]
+    frame = dataset.read_dataset(tmp_path, etfs=["0050"])
+    assert frame["Date"].dt.strftime("%Y-%m-%d").tolist() == ["2024-12-30", "2024-12-31", "2025-01-02"]
+    assert frame["總分"].astype(float).round(6).tolist() == [0.1, -0.15, 0.3]
@@ -0,0 +1,44 @@
+# KeywordMatcher 與原本逐詞 `word in title` 加總的結果需完全相同
+import random
+
+import numpy as np
+import pytest
+
+from signal_lib.keyword_matcher import KeywordMatcher
+
+
+def naive_score(title, positive_words, negative_words):
+    """原本 export_sentiment_score.calculate_sentiment 的算法"""
+    if title is None or (isinstance(title, float) and np.isnan(title)):
+        return 0
+    pos = sum(word in title for word in positive_words)
+    neg = sum(word in title for word in negative_words)
+    return pos - neg
+
+
+def random_words(rng, count, alphabet="利多漲跌空壞佳降升差"):
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(count)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_naive_counts(seed):
+    rng = random.Random(seed)
+    positive = random_words(rng, 30)
+    negative = random_words(rng, 30) + positive[:3]  # 同時出現在正負面詞庫的詞
+    positive += positive[:2]  # 重複的詞
+    titles = ["".join(rng.choice("利多漲跌空壞佳降升差好") for _ in range(rng.randint(0, 25)))
+              for _ in range(300)]
+
+    matcher = KeywordMatcher(positive, negative)
+    expected = [naive_score(title, positive, negative) for title in titles]
+    assert [matcher.score(title) for title in titles] == expected
+    assert matcher.score_many(titles) == expected
+
+
+def test_empty_word_and_missing_title():
+    positive, negative = ["", "漲"], ["跌"]
+    matcher = KeywordMatcher(positive, negative)
+    for title in ["", "漲跌", "大漲", "跌跌"]:
+        assert matcher.score(title) == naive_score(title, positive, negative)
+    assert matcher.score(np.nan) == 0
+    assert matcher.score(None) == 0
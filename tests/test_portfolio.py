@@ -0,0 +1,78 @@
+# portfolio.simulate / PositionBook 與 performance_summary.py 原本的 iterrows 迴圈結果需相同
+import numpy as np
+import pandas as pd
+import pytest
+
+from signal_lib import portfolio
+
+
+def baseline_backtest(dates, prices, signals, equity=100000, position_fraction=0.1,
+                      transaction_cost_rate=0.001, tax_rate=0.003):
+    """原本 performance_summary.py 的多筆倉位回測 (回傳 每日資金, 交易紀錄)"""
+    positions, equity_curve, trades = [], [], []
+    for date, price, signal in zip(dates, prices, signals):
+        if signal == 1:
+            positions.append({"entry_date": date, "entry_price": price * (1 + transaction_cost_rate),
+                              "position_size": equity * position_fraction})
+        elif signal == -1 and positions:
+            position = positions.pop(0)
+            exit_price = price * (1 - transaction_cost_rate - tax_rate)
+            ret = (exit_price / position["entry_price"]) - 1
+            profit = position["position_size"] * ret
+            equity += profit
+            trades.append({"entry_date": position["entry_date"], "exit_date": date,
+                           "entry_price": position["entry_price"], "exit_price": exit_price,
+                           "return": ret, "position_size": position["position_size"], "profit": profit})
+        equity_curve.append(equity)
+    return np.array(equity_curve), pd.DataFrame(trades)
+
+
+def sample(seed, days=400):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2023-01-02", periods=days)
+    prices = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.01, days))), 2)
+    signals = rng.choice([-1, 0, 1], size=days, p=[0.3, 0.4, 0.3])
+    return dates, prices, signals
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_simulate_matches_baseline(seed):
+    dates, prices, signals = sample(seed)
+    expected_equity, expected_trades = baseline_backtest(dates, prices, signals)
+
+    equity, trades = portfolio.simulate(prices, signals)
+    np.testing.assert_allclose(equity, expected_equity, rtol=1e-12)
+    log = portfolio.trade_log(trades, dates)
+    for column in ["entry_date", "exit_date"]:
+        assert log[column].tolist() == expected_trades[column].tolist()
+    for column in ["entry_price", "exit_price", "return", "position_size", "profit"]:
+        np.testing.assert_allclose(log[column], expected_trades[column], rtol=1e-12)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_position_book_matches_baseline(seed):
+    dates, prices, signals = sample(seed)
+    expected_equity, expected_trades = baseline_backtest(dates, prices, signals)
+
+    book = portfolio.PositionBook()
+    equity, closed = [], []
+    for date, price, signal in zip(dates, prices, signals):
+        trade = book.step(str(date.date()), float(price), int(signal))
+        if trade is not None:
+            closed.append(trade)
+        equity.append(book.equity)
+    np.testing.assert_allclose(equity, expected_equity, rtol=1e-12)
+    np.testing.assert_allclose([trade["profit"] for trade in closed], expected_trades["profit"], rtol=1e-12)
+
+
+def test_position_book_from_history_continues_like_baseline():
+    dates, prices, signals = sample(7)
+    expected_equity, _ = baseline_backtest(dates, prices, signals)
+
+    book = portfolio.PositionBook.from_history(dates[:250], prices[:250], signals[:250])
+    book = portfolio.PositionBook.from_dict(book.to_dict())  # 存成 JSON 後還原
+    equity = []
+    for date, price, signal in zip(dates[250:], prices[250:], signals[250:]):
+        book.step(str(date.date()), float(price), int(signal))
+        equity.append(book.equity)
+    np.testing.assert_allclose(equity, expected_equity[250:], rtol=1e-12)
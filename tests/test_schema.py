@@ -0,0 +1,39 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from signal_lib import schema
+
+
+def _csv(frame):
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False)
+    return buffer.getvalue()
+
+
+def test_expand_inverts_compact():
+    frame = pd.DataFrame({
+        "Date": pd.to_datetime(["2024-01-02", "2024-01-03", "2024-01-04"]),
+        "市價": [98.5, np.nan, 97.0],
+        "折溢價利率(%)": ["-0.05%", np.nan, "0.125%"],
+        "新聞輿情分數": [0.2, np.nan, -0.1],
+        "指數綜合分數": pd.array([1, None, 0], dtype="Int64"),
+        "總分": [-0.15, np.nan, 0.1],
+        "燈號": ["黃燈", np.nan, "紅燈"],
+        "is_trading_day": [True, False, True],
+    })
+    compacted = schema.compact(frame)
+    assert compacted["總分"].dtype == "float32"
+    assert _csv(schema.expand(compacted)) == _csv(frame)
+
+
+def test_append_writes_header_order(tmp_path):
+    path = tmp_path / "ETF_signal_0050.csv"
+    first = pd.DataFrame({"Date": pd.to_datetime(["2024-01-02"]), "折溢價利率(%)": ["0.20%"], "總分": [0.5]})
+    schema.to_signal_csv(first, path)
+    later = schema.compact(pd.DataFrame({"總分": [-0.15], "Date": pd.to_datetime(["2024-01-03"]),
+                                         "折溢價利率(%)": ["-0.10%"]}))
+    schema.append_signal_csv(later, path)
+    assert path.read_text(encoding="utf-8-sig").splitlines() == [
+        "Date,折溢價利率(%),總分", "2024-01-02,0.20%,0.5", "2024-01-03,-0.10%,-0.15"]
@@ -0,0 +1,42 @@
+# -----------------------------------------------------
+# ETF_signalNEWTEST.py 的輸出需與原本 (逐日填值版本) 的腳本逐字元相同
+#
+# fixtures/signal_newtest/expected 為原本腳本以同一份輸入資料輸出的燈號結果：
+#   折溢價利率(%) 保留 "0.12%" 字串、新聞輿情分數與總分為 float64 (例如 -0.15000000000000002)、
+#   年度第一天沒有折溢價分數時該欄的 0 分寫為 "0" (2023)，有分數時寫為 "0.0" (2024)
+# -----------------------------------------------------
+import filecmp
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "抓進場出場時機-Wade"))
+
+import ETF_signalNEWTEST as newtest  # noqa: E402
+from signal_lib import dataset  # noqa: E402
+
+DATA_DIR = os.path.join(ROOT, "tests", "fixtures", "signal_newtest")
+YEARS = ["2023", "2024"]
+
+
+@pytest.fixture
+def outputs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ("path_SentimentAnalyze", "path_VIX_Data", "path_ETF_PremiumDiscount"):
+        monkeypatch.setattr(newtest, name, DATA_DIR)
+    monkeypatch.setattr(newtest, "ETF_list", ["0050"])
+    monkeypatch.setattr(newtest, "data_year_list", YEARS)
+    newtest.main(max_workers=1, plots=False)
+    return tmp_path
+
+
+@pytest.mark.parametrize("year", YEARS)
+def test_output_matches_baseline(outputs, year):
+    name = f"燈號結果_0050_{year}.csv"
+    assert filecmp.cmp(outputs / name, os.path.join(DATA_DIR, "expected", name), shallow=False)
+
+
+def test_dataset_partitions_written(outputs):
+    assert sorted(year for _, year, _ in dataset.partitions(outputs / newtest.DATASET_DIR)) == [2023, 2024]
@@ -0,0 +1,83 @@
+# zscore.score_batch / ZScoreState 與 ETF_signalNEWTEST.py 原本逐筆迴圈的結果需相同
+import numpy as np
+import pandas as pd
+import pytest
+
+from signal_lib import zscore
+
+
+def baseline_scores(rates, window=60, no_positive_days=120):
+    """原本 score_PremiumDiscount_z_dynamic 的迴圈 (回傳 z-score, 分數)"""
+    rates = pd.Series(rates, dtype=float)
+    z_score = (rates - rates.rolling(window=window).mean()) / rates.rolling(window=window).std()
+
+    scores = []
+    no_positive = 0
+    for z in z_score:
+        if pd.isna(z):
+            scores.append(np.nan)
+            continue
+        if z <= -1.2:
+            score = 0.5
+        elif z <= -0.3:
+            score = 0.25
+        elif z >= 1.2:
+            score = -0.5
+        elif z >= 0.3:
+            score = -0.25
+        else:
+            score = 0
+        if score >= 0.25:
+            no_positive = 0
+        else:
+            no_positive += 1
+            if no_positive >= no_positive_days and -0.5 <= z <= 0.3:
+                score = 0.25
+        scores.append(score)
+    return z_score.to_numpy(), np.array(scores, dtype=float)
+
+
+def sample_rates(seed, days=900):
+    """隨機漫步的折溢價率 (含空值)，長時間上升的區段會觸發 120 天補分規則"""
+    rng = np.random.default_rng(seed)
+    rates = np.round(np.cumsum(rng.normal(0.004, 0.05, days)), 2)
+    rates[rng.random(days) < 0.01] = np.nan
+    return rates
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_score_batch_matches_baseline(seed):
+    rates = sample_rates(seed)
+    expected_z, expected = baseline_scores(rates, no_positive_days=30)
+    _, _, z_score, scores = zscore.score_batch(pd.Series(rates), window=60, no_positive_days=30)
+    np.testing.assert_allclose(z_score.to_numpy(), expected_z, rtol=1e-9, equal_nan=True)
+    np.testing.assert_array_equal(scores.to_numpy(dtype=float), expected)
+
+
+def test_forced_score_rule_is_exercised():
+    # 測試資料確實包含「連續未出現正分而強制補 0.25」的日子
+    rates = sample_rates(0)
+    z, forced = baseline_scores(rates, no_positive_days=30)
+    plain = zscore.base_scores(np.nan_to_num(z, nan=99.0))
+    assert ((forced == 0.25) & (plain < 0.25)).any()
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_online_state_matches_baseline(seed):
+    rates = sample_rates(seed)
+    expected_z, expected = baseline_scores(rates, no_positive_days=30)
+
+    state = zscore.ZScoreState(window=60, no_positive_days=30)
+    results = [state.update(rate) for rate in rates]
+    np.testing.assert_allclose([z for z, _ in results], expected_z, rtol=1e-6, atol=1e-9, equal_nan=True)
+    np.testing.assert_array_equal([score for _, score in results], expected)
+
+
+def test_state_from_history_continues_like_baseline():
+    rates = sample_rates(1)
+    _, expected = baseline_scores(rates, no_positive_days=30)
+
+    state = zscore.ZScoreState.from_history(rates[:500], window=60, no_positive_days=30)
+    state = zscore.ZScoreState.from_dict(state.to_dict())  # 存成 JSON 後還原
+    scores = [state.update(rate)[1] for rate in rates[500:]]
+    np.testing.assert_array_equal(scores, expected[500:])
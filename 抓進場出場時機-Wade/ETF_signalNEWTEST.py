@@ -1,11 +1,17 @@
 # 整合鉅亨與兆豐新聞情緒、折溢價、VIX，輸出情緒燈號與圖表
 import pandas as pd
 import os
-import matplotlib
-import matplotlib.pyplot as plt
 import numpy as np
-import plotly.express as px
 import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 專案根目錄 (signal_lib)
+from signal_lib.assembly import assemble_daily_frame
+from signal_lib import data_cache
+from signal_lib.scoring import parse_rate
+from signal_lib import zscore, profiling, rendering, schema, dataset
+from signal_lib.engine import SignalEngine, BandScorer, WeightedSum, vix_range_bands, light_bands
+from signal_lib.runner import run_parallel, get_shared, report_failures
 
 # 各資料路徑
 path_SentimentAnalyze = 'C:/Users/USER/PycharmProjects/Group4/GITHUB/SentimentAnalyze'
@@ -21,6 +27,11 @@ ETF_list = ['00757','0052', '00713', '00830', '00733', '00850', '00692', '0050',
 # data_year_list = ['2020']
 # ETF_list = ['0052' ]
 
+MAX_WORKERS = None  # 平行執行的行程數 (None: 依 CPU 核心數，1: 不平行)
+
+# 所有 ETF × 年度的燈號結果另寫入同一個分區資料集 (etf=/year=，見 signal_lib/dataset.py)
+DATASET_DIR = 'signal_dataset'
+
 # --- 參數設定（可調整） ---
 WEIGHT_PREMIUM = 0.5  # 折溢價率占比
 WEIGHT_CNYES = 0.1    # 鉅亨新聞權重
@@ -28,23 +39,21 @@ WEIGHT_MEGA = 0.1     # 兆豐新聞權重
 WEIGHT_PTT = 0.1      # PTT 輿情權重
 WEIGHT_VIX = 0.2      # VIX 占比權重
 
-# --- 設定字體避免中文亂碼 ---
-matplotlib.rcParams['font.family'] = 'Microsoft JhengHei'
-matplotlib.rcParams['axes.unicode_minus'] = False
-
-# --- 詞庫讀取 ---
-positive_words = pd.read_csv(os.path.join(f"{path_SentimentAnalyze}", "positive.txt"), header=None)[0].dropna().tolist()
-negative_words = pd.read_csv(os.path.join(f"{path_SentimentAnalyze}", "negative.txt"), header=None)[0].dropna().tolist()
-
-# function
-def classify_score_index(vix):
-    if pd.isna(vix): return pd.NA
-    if vix > 22.72:
-        return 1
-    elif vix < 17.12:
-        return -1
-    else:
-        return 0
+# --- 評分引擎 (見 signal_lib/engine.py) ---
+# 新聞輿情分數 = 三個左側情緒 * 各自權重 (空值視為0)
+# 指數綜合分數: VIX > 22.72 → 1，< 17.12 → -1，其餘 → 0
+# 總分 = 折溢價分數 * WEIGHT_PREMIUM + 新聞輿情分數 + 指數綜合分數 * WEIGHT_VIX (任一為空則為空)
+# 燈號: >= 0.8 深綠燈，>= 0.1 淺綠燈，> -0.3 黃燈，> -0.8 淺紅燈，其餘 紅燈
+ENGINE = SignalEngine(
+    scorers=[
+        ("新聞輿情分數", WeightedSum([("cnyes", WEIGHT_CNYES), ("mega", WEIGHT_MEGA), ("ptt", WEIGHT_PTT)],
+                                     fill_missing=True)),
+        ("指數綜合分數", BandScorer("VIX", vix_range_bands(17.12, 22.72))),
+    ],
+    total=WeightedSum([("折溢價分數", WEIGHT_PREMIUM), ("新聞輿情分數", 1), ("指數綜合分數", WEIGHT_VIX)],
+                      fill_missing=False),
+    classifier=light_bands([0.8, 0.1, -0.3, -0.8], operators=(">=", ">=", ">", ">")),
+)
 
 # def score_PremiumDiscount_weighted(p):
 #     if pd.isna(p): return pd.NA
@@ -66,156 +75,160 @@ def classify_score_index(vix):
 
 # --- 動態 z-score 分數函式（含擴大補強） ---
 def score_PremiumDiscount_z_dynamic(df, window=60):
+    # 門檻與「連續 120 天未出現 score >= 0.25 則強制補 +0.25」規則見 signal_lib/zscore.py
     df = df.copy()
-    df["折溢價率"] = df["折溢價利率(%)"].str.replace('%', '').astype(float)
-    df["z_mean"] = df["折溢價率"].rolling(window=window).mean()
-    df["z_std"] = df["折溢價率"].rolling(window=window).std()
-    df["z_score"] = (df["折溢價率"] - df["z_mean"]) / df["z_std"]
-
-    scores = []
-    no_positive_days = 0
-    for z in df["z_score"]:
-        score = 0
-        if pd.isna(z):
-            scores.append(pd.NA)
-            continue
-
-        if z <= -1.2:
-            score = 0.5
-        elif z <= -0.3:
-            score = 0.25
-        elif z >= 1.2:
-            score = -0.5
-        elif z >= 0.3:
-            score = -0.25
-        else:
-            score = 0
-
-        # 擴大補強條件：若連續 120 天未出現 score >= 0.25 則強制補 +0.25
-        if score >= 0.25:
-            no_positive_days = 0
-        else:
-            no_positive_days += 1
-            if no_positive_days >= 120 and -0.5 <= z <= 0.3:
-                score = 0.25
-
-        scores.append(score)
-
-    df["折溢價分數"] = scores
+    df["折溢價率"] = parse_rate(df["折溢價利率(%)"])
+    df["z_mean"], df["z_std"], df["z_score"], df["折溢價分數"] = zscore.score_batch(
+        df["折溢價率"], window=window, no_positive_days=120)
     return df
 
-def classify_signal(score):
-    if pd.isna(score): return pd.NA
-    if score >= 0.8: return "深綠燈"
-    elif 0.1 <= score < 0.8: return "淺綠燈"
-    elif -0.3 < score < 0.1: return "黃燈"
-    elif -0.8 < score <= -0.3: return "淺紅燈"
-    elif score <= -0.8: return "紅燈"
-    else: return pd.NA
-
-# 開始跑數據
-for ETF in ETF_list:
-    for data_year in data_year_list:
-        # --- 讀取資料 ---
-        df_PremiumDiscount = pd.read_csv(os.path.join(f"{path_ETF_PremiumDiscount}", f"MoneyDJ_ETF_PremiumDiscount_{ETF}.csv"))
-        # df_PremiumDiscount.set_index("交易日期", inplace=True)
-        # df_PremiumDiscount.index = pd.to_datetime(df_PremiumDiscount.index)
-        df_PremiumDiscount["交易日期"] = pd.to_datetime(df_PremiumDiscount["交易日期"])
-        df_PremiumDiscount.set_index("交易日期", inplace=True)
-        df_PremiumDiscount = score_PremiumDiscount_z_dynamic(df_PremiumDiscount)
-
-        df_sentiment = pd.read_csv(os.path.join(f"{path_SentimentAnalyze}", "sentiment_result.csv"))
-        df_sentiment["日期"] = pd.to_datetime(df_sentiment["日期"]).dt.date
-        df_sentiment.set_index("日期", inplace=True)
-
-        df_VIX = pd.read_csv(os.path.join(f"{path_VIX_Data}", "vix_daily.csv"))
-        df_VIX["Date"] = pd.to_datetime(df_VIX["Date"])
-        df_VIX.set_index("Date", inplace=True)
-
-        # --- 初始化主資料表 ---
-        start_date = f"{data_year}-01-01"
-        end_date = f"{data_year}-12-31"
-        all_dates = pd.date_range(start=start_date, end=end_date, freq="D")
+def load_premium_discount_scored(path):
+    """讀取折溢價資料並計算動態 z-score 分數 (同一檔案只計算一次)"""
+    return data_cache.cached_load(
+        path, "premium_discount_z",
+        lambda p: score_PremiumDiscount_z_dynamic(data_cache.load_premium_discount(p)))
+
+# --- 單一 ETF × 年度 ---
+def run_etf_year(ETF, data_year, df_sentiment, df_VIX):
+    """計算單一 ETF、單一年度的燈號，輸出燈號結果 CSV (互動圖見 plot_etf_year)"""
+    with profiling.span(f"{ETF} {data_year}"):
+        return _run_etf_year(ETF, data_year, df_sentiment, df_VIX)
+
+
+def _run_etf_year(ETF, data_year, df_sentiment, df_VIX):
+    # --- 初始化主資料表 ---
+    start_date = f"{data_year}-01-01"
+    end_date = f"{data_year}-12-31"
+    all_dates = pd.date_range(start=start_date, end=end_date, freq="D")
+
+    # --- 讀取資料 (每個檔案只解析一次，z-score 以完整歷史計算一次後取年度區間) ---
+    with profiling.span("讀取資料"):
+        df_PremiumDiscount = load_premium_discount_scored(
+            os.path.join(f"{path_ETF_PremiumDiscount}", f"MoneyDJ_ETF_PremiumDiscount_{ETF}.csv"))
+        df_PremiumDiscount = data_cache.slice_dates(df_PremiumDiscount, start_date, end_date)
+
+        df_sentiment = data_cache.slice_dates(df_sentiment, start_date, end_date)
+        df_VIX = data_cache.slice_dates(df_VIX, start_date, end_date)
+
+    # --- 填入每日資料 (各來源一次對齊到日曆) ---
+    with profiling.span("組合每日資料"):
+        daily = assemble_daily_frame(all_dates, [
+            (df_PremiumDiscount, {"市價": "市價", "折溢價利率(%)": "折溢價利率(%)", "折溢價分數": "折溢價分數"}),
+            (df_sentiment, {"鉅亨_左側情緒分類": "cnyes", "兆豐_左側情緒分類": "mega", "PTT_左側情緒分類": "ptt"}),
+            (df_VIX, {"Close": "VIX"}),
+        ])
+
+    with profiling.span("計算總分與燈號"):
+        scored = ENGINE.run(daily)
 
         result = pd.DataFrame({
-            "Date": all_dates,
-            "市價": pd.Series([pd.NA] * len(all_dates), dtype="object"),
-            "折溢價利率(%)": pd.Series([pd.NA] * len(all_dates), dtype="object"),
-            "折溢價利率分數": pd.Series([np.nan] * len(all_dates), dtype="float"),
-            "新聞輿情分數": pd.Series([np.nan] * len(all_dates), dtype="float"),
-            "VIX": pd.Series([pd.NA] * len(all_dates), dtype="object"),
-            "指數綜合分數": pd.Series([pd.NA] * len(all_dates), dtype="Int64"),
+            "Date": daily["Date"],
+            "市價": daily["市價"],
+            "折溢價利率(%)": daily["折溢價利率(%)"],
+            "折溢價利率分數": np.nan,
+            "新聞輿情分數": scored["新聞輿情分數"],
+            "VIX": daily["VIX"],
+            "指數綜合分數": scored["指數綜合分數"],
+            "折溢價分數": pd.to_numeric(daily["折溢價分數"], errors="coerce"),
+            "總分": scored["總分"],
+            "燈號": scored["燈號"],
         })
+        # 與原本逐日填值的輸出相同：年度第一天沒有折溢價分數時此欄為 object，0 分寫為 "0"
+        if result["折溢價分數"].isna().iloc[0]:
+            scores = result["折溢價分數"].astype(object)
+            result["折溢價分數"] = scores.where(scores != 0, 0)
 
-        # --- 填入每日資料 ---
-        for d in all_dates:
-            d_date = d.date()
-            result.loc[result["Date"] == d, "市價"] = df_PremiumDiscount["市價"].get(d, pd.NA)
-            result.loc[result["Date"] == d, "折溢價利率(%)"] = df_PremiumDiscount["折溢價利率(%)"].get(d, pd.NA)
-            result.loc[result["Date"] == d, "折溢價分數"] = df_PremiumDiscount["折溢價分數"].get(d, pd.NA)
-
-
-            cnyes = df_sentiment["鉅亨_左側情緒分類"].get(d_date, pd.NA)
-            mega = df_sentiment["兆豐_左側情緒分類"].get(d_date, pd.NA)
-            ptt = df_sentiment["PTT_左側情緒分類"].get(d_date, pd.NA)
-            score = (
-                    (float(cnyes) if not pd.isna(cnyes) else 0) * WEIGHT_CNYES +
-                    (float(mega) if not pd.isna(mega) else 0) * WEIGHT_MEGA +
-                    (float(ptt) if not pd.isna(ptt) else 0) * WEIGHT_PTT
-            )
-            result.loc[result["Date"] == d, "新聞輿情分數"] = score
-
-            vix = df_VIX["Close"].get(d, pd.NA)
-            result.loc[result["Date"] == d, "VIX"] = vix
-            result.loc[result["Date"] == d, "指數綜合分數"] = classify_score_index(vix)
-
-        # --- 總分與燈號 ---
-        result["總分"] = (
-                result["折溢價分數"] * WEIGHT_PREMIUM +
-                result["新聞輿情分數"].astype("float") +
-                result["指數綜合分數"].astype("float") * WEIGHT_VIX
-        )
-
-        result["燈號"] = result["總分"].apply(classify_signal)
-        result.to_csv(f"燈號結果_{ETF}_{data_year}.csv", index=False, encoding="utf-8-sig")
+    with profiling.span("輸出燈號結果 CSV"):
+        schema.to_signal_csv(result, f"燈號結果_{ETF}_{data_year}.csv")
         print("✅ 已輸出燈號結果.csv")
 
-        # --- 動態互動圖 ---
-        # 過濾掉「黃燈」和 NA 的燈號資料，以及市價為 NA 的列
-        plot_df = result[(result["燈號"].notna()) & (result["燈號"] != "黃燈")].dropna(subset=["市價"])
-
-        # 市價轉為數值型別（確保是可畫的數值）
-        plot_df["市價"] = pd.to_numeric(plot_df["市價"], errors="coerce")
-
-        # 繪製互動圖（點）
-        fig = px.scatter(
-            plot_df,
-            x="Date", y="市價", color="燈號",
-            title=f"互動式：市價與燈號標記（不含黃燈）_{ETF}_{data_year}",
-            hover_data=["總分", "折溢價利率(%)"],
-            color_discrete_map={
-                "紅燈": "red",
-                "淺紅燈": "salmon",
-                "淺綠燈": "lightgreen",
-                "深綠燈": "green"
-            }
-        )
-
-        # 折線：市價走勢（過濾掉 NA）
-        fig.add_scatter(
-            x=result["Date"],
-            y=result["市價"],
-            mode="lines",
-            name="收盤價",
-            line=dict(color="blue")
-        )
-
-
-        # 輸出為 HTML
-        fig.write_html(f"signal_plot_interactive_{ETF}_{data_year}.html")
-        print("✅ 互動圖已儲存為 signal_plot_interactive.html")
-
-        # 輸出 PNG
-        # fig.write_image("signal_plot_interactive.png", scale=2)
-        # print("✅ 靜態圖已儲存為 signal_plot_interactive.png")
+    # 每個任務只寫自己的 ETF × 年度分區，平行執行時不會互相覆寫
+    # 資料集存精簡型別 (float32 分數、category 燈號，見 signal_lib/schema.py)
+    with profiling.span("寫入分區資料集"):
+        dataset.write_partitions(schema.compact(result), DATASET_DIR, ETF)
+
+    return f"燈號結果_{ETF}_{data_year}.csv"
+
+
+def plot_etf_year(ETF, data_year):
+    """讀取燈號結果 CSV，輸出市價與燈號的互動圖 (plotly 在需要時才載入)"""
+    import plotly.express as px
+
+    result = pd.read_csv(f"燈號結果_{ETF}_{data_year}.csv", parse_dates=["Date"])
+
+    # --- 動態互動圖 ---
+    # 過濾掉「黃燈」和 NA 的燈號資料，以及市價為 NA 的列
+    plot_df = result[(result["燈號"].notna()) & (result["燈號"] != "黃燈")].dropna(subset=["市價"])
+
+    # 市價轉為數值型別（確保是可畫的數值）
+    plot_df["市價"] = pd.to_numeric(plot_df["市價"], errors="coerce")
+
+    # 繪製互動圖（點）
+    fig = px.scatter(
+        plot_df,
+        x="Date", y="市價", color="燈號",
+        title=f"互動式：市價與燈號標記（不含黃燈）_{ETF}_{data_year}",
+        hover_data=["總分", "折溢價利率(%)"],
+        color_discrete_map={
+            "紅燈": "red",
+            "淺紅燈": "salmon",
+            "淺綠燈": "lightgreen",
+            "深綠燈": "green"
+        }
+    )
 
+    # 折線：市價走勢（過濾掉 NA）
+    fig.add_scatter(
+        x=result["Date"],
+        y=result["市價"],
+        mode="lines",
+        name="收盤價",
+        line=dict(color="blue")
+    )
+
+
+    # 輸出為 HTML
+    fig.write_html(f"signal_plot_interactive_{ETF}_{data_year}.html")
+    print("✅ 互動圖已儲存為 signal_plot_interactive.html")
+
+    # 輸出 PNG
+    # fig.write_image("signal_plot_interactive.png", scale=2)
+    # print("✅ 靜態圖已儲存為 signal_plot_interactive.png")
+
+    return f"signal_plot_interactive_{ETF}_{data_year}.html"
+
+
+def run_etf_year_task(ETF, data_year):
+    """平行執行用: 輿情與 VIX 資料由 runner 在 worker 啟動時傳入一次"""
+    return run_etf_year(ETF, data_year, get_shared("sentiment"), get_shared("vix"))
+
+
+def main(max_workers=MAX_WORKERS, plots=True):
+    with profiling.span("讀取輿情與VIX"):
+        df_sentiment = data_cache.load_sentiment(os.path.join(f"{path_SentimentAnalyze}", "sentiment_result.csv"))
+        df_VIX = data_cache.load_vix(os.path.join(f"{path_VIX_Data}", "vix_daily.csv"))
+
+    tasks = [((ETF, data_year), (ETF, data_year)) for ETF in ETF_list for data_year in data_year_list]
+    results, failures = run_parallel(run_etf_year_task, tasks,
+                                     shared={"sentiment": df_sentiment, "vix": df_VIX},
+                                     max_workers=max_workers)
+
+    for (ETF, data_year), output_file in results:
+        print(f"✅ {ETF} {data_year}: {output_file}")
+    report_failures(failures)
+
+    # --- 互動圖: 燈號結果都輸出後才於背景行程繪製 (--no-plots 時略過) ---
+    if plots:
+        jobs = [(f"互動圖 {ETF} {data_year}", plot_etf_year, (ETF, data_year)) for (ETF, data_year), _ in results]
+        _, plot_failures = rendering.render_in_background(jobs, max_workers=max_workers)
+        report_failures(plot_failures)
+
+
+# 開始跑數據
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ETF 情緒燈號 (多 ETF × 年度)")
+    parser.add_argument("--no-plots", action="store_true", help="不繪製互動圖 (不載入 plotly)")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    # 計時只記錄在目前行程，開啟 --profile 時改為依序執行以取得每個 ETF × 年度的計時
+    profiling.run_main(lambda: main(max_workers=1 if args.profile else MAX_WORKERS, plots=not args.no_plots), args)
@@ -0,0 +1,97 @@
+# 線上每日燈號: 只計算新交易日的分數與燈號，附加到 ETF_signal_{ETF}.csv (見 signal_lib/online.py)
+# 資料路徑、評分引擎同 ETF_signalNEWTEST.py
+# 第一次執行時以折溢價、輿情、VIX 歷史重新評分建立狀態 (online_state_{ETF}.json)，
+# 既有的 ETF_signal_{ETF}.csv 只決定從哪一天之後開始附加；之後每天執行一次即可
+# 燈號檔旁的分區資料集 (signal_dataset) 已有該 ETF 時，新的列也併入其分區：
+# 儀表板、signal_api 與 performance_summary.py 在資料集有該 ETF 時只讀分區
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 專案根目錄 (signal_lib)
+from signal_lib import data_cache, dataset, schema
+from signal_lib.columnar_store import read_table
+from signal_lib.online import OnlineSignal, SENTIMENT_SOURCES, ROW_COLUMNS
+import ETF_signalNEWTEST as newtest
+
+SIGNAL_DIR = "."  # ETF_signal_{ETF}.csv 與 online_state_{ETF}.json 所在資料夾
+
+
+def state_path(ETF):
+    return os.path.join(SIGNAL_DIR, f"online_state_{ETF}.json")
+
+
+def signal_path(ETF):
+    return os.path.join(SIGNAL_DIR, f"ETF_signal_{ETF}.csv")
+
+
+def dataset_root():
+    return os.path.join(SIGNAL_DIR, dataset.DATASET_DIR)
+
+
+def update_etf(ETF, df_sentiment, df_VIX):
+    """計算並附加最後處理日之後的交易日，回傳新增的列 (DataFrame)"""
+    df_PremiumDiscount = data_cache.load_premium_discount(
+        os.path.join(f"{newtest.path_ETF_PremiumDiscount}", f"MoneyDJ_ETF_PremiumDiscount_{ETF}.csv"))
+
+    if os.path.exists(state_path(ETF)):
+        state = OnlineSignal.load(state_path(ETF))
+    else:
+        until = None
+        if os.path.exists(signal_path(ETF)):
+            written = pd.to_datetime(read_table(signal_path(ETF))["Date"])
+            until = written.max() if written.notna().any() else None
+        state = OnlineSignal.bootstrap(ETF, newtest.ENGINE, df_PremiumDiscount, df_sentiment, df_VIX, until)
+        print(f"{ETF}: 以歷史資料建立狀態 (最後處理日 {state.last_date})")
+
+    new_days = df_PremiumDiscount.sort_index()
+    if state.last_date is not None:
+        new_days = new_days[new_days.index > pd.Timestamp(state.last_date)]
+    new_days = new_days[~new_days.index.duplicated(keep="last")]
+
+    rows = []
+    for date, day in new_days.iterrows():
+        sentiment = {source: df_sentiment[column].get(date, np.nan) for source, column in SENTIMENT_SOURCES.items()}
+        vix = df_VIX["Close"].get(date, np.nan)
+        rows.append(state.close_day(newtest.ENGINE, date, day["市價"], day["折溢價利率(%)"], vix, sentiment))
+
+    rows = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(columns=ROW_COLUMNS)
+    if not rows.empty:
+        # 不先轉為精簡型別，附加的列與 ETF_signalNEWTEST.py 輸出的文字相同
+        schema.append_signal_csv(rows[ROW_COLUMNS], signal_path(ETF))
+        # 資料集沒有該 ETF 時讀取端讀燈號檔，不另建分區 (只有新的列的分區會取代燈號檔中的歷史)
+        if dataset.partitions(dataset_root(), etfs=[ETF]):
+            dataset.upsert_rows(rows[ROW_COLUMNS], dataset_root(), ETF)
+            print(f"{ETF}: 新的列已併入分區資料集 {dataset_root()}")
+    state.save(state_path(ETF))
+    return rows
+
+
+def main():
+    df_sentiment = data_cache.load_sentiment(os.path.join(f"{newtest.path_SentimentAnalyze}", "sentiment_result.csv"))
+    df_sentiment = df_sentiment[~df_sentiment.index.duplicated(keep="last")]
+    df_VIX = data_cache.load_vix(os.path.join(f"{newtest.path_VIX_Data}", "vix_daily.csv"))
+    df_VIX = df_VIX[~df_VIX.index.duplicated(keep="last")]
+
+    for ETF in newtest.ETF_list:
+        start = time.perf_counter()
+        rows = update_etf(ETF, df_sentiment, df_VIX)
+        elapsed = (time.perf_counter() - start) * 1000
+        if rows.empty:
+            print(f"{ETF}: 沒有新的交易日 ({elapsed:.1f} ms)")
+            continue
+        last = rows.iloc[-1]
+        print(f"✅ {ETF}: 新增 {len(rows)} 天，{last['Date'].date()} 總分 {last['總分']:.2f} {last['燈號']}，"
+              f"資金 {last['資金']:,.0f}，未平倉 {last['未平倉筆數']} 筆 ({elapsed:.1f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ETF 線上每日燈號 (增量更新)")
+    parser.add_argument("--signal-dir", default=SIGNAL_DIR, help="ETF_signal_{ETF}.csv 與狀態檔所在資料夾")
+    args = parser.parse_args()
+    SIGNAL_DIR = args.signal_dir
+    main()